@@ -1,8 +1,7 @@
 from copy import deepcopy
 import numpy as np
-import itertools
 
-from pepmass import ModifiedPeptideMassCalculator
+from pepmass import ModifiedPeptideMassCalculator, CachedMassCalculator
 from .modseq import check_modifications
 
 class AssayBuilder():
@@ -11,9 +10,15 @@ class AssayBuilder():
                  fragment_types=None,
                  fragment_charges=None,
                  fragment_loss_types=None,
+                 mass_cache_size=10000,
                  **kwargs):
         if mass_calculator is None:
             mass_calculator = ModifiedPeptideMassCalculator()
+        if mass_cache_size is not None and mass_cache_size > 0 and \
+            not isinstance(mass_calculator, CachedMassCalculator):
+            mass_calculator = CachedMassCalculator(
+                mass_calculator, maxsize=mass_cache_size
+            )
         self.mass_calculator = mass_calculator
 
         if fragment_types is None:
@@ -29,6 +34,12 @@ class AssayBuilder():
         self.fragment_loss_types = fragment_loss_types
 
 
+    def mass_cache_stats(self):
+        if isinstance(self.mass_calculator, CachedMassCalculator):
+            return self.mass_calculator.cache_stats()
+        return None
+
+
     def assay(self, sequence, charge=None, modification=None, fragments=None,
               **kwargs):
         result = {
@@ -55,54 +66,63 @@ class AssayBuilder():
         return result
 
 
-    def theoretical_fragments(self, sequence, modification=None, **kwargs):
-        def get_fragment_annotation(fragment_type, fragment_number,
-                                    charge, loss=None, **kwargs):
-            return fragment_type + \
-                (str(fragment_number) if fragment_number is not None else '') + \
-                ('-' + loss if loss is not None and loss != 'noloss' else '') + \
-                '^+' + str(charge)
+    def fragment_annotation(self, fragment_type, fragment_number,
+                            charge, loss=None, **kwargs):
+        return fragment_type + \
+            (str(fragment_number) if fragment_number is not None else '') + \
+            ('-' + loss if loss is not None and loss != 'noloss' else '') + \
+            '^+' + str(charge)
 
-        fragment_mz = []
-        fragment_type = []
-        fragment_number = []
-        fragment_charge = []
-        fragment_loss_type = []
-        fragment_annotation = []
 
-        frag_type = kwargs.pop('fragment_type', None)
-        if frag_type is None:
-            frag_type = list(self.fragment_types)
+    def fragment_options(self, fragment_type=None, fragment_loss_type=None,
+                         fragment_charge=None):
+        if fragment_type is None:
+            fragment_type = list(self.fragment_types)
         else:
-            if isinstance(frag_type, str):
-                frag_type = [frag_type]
-            frag_type = [
-                x for x in frag_type
+            if isinstance(fragment_type, str):
+                fragment_type = [fragment_type]
+            fragment_type = [
+                x for x in fragment_type
                 if x in self.fragment_types
             ]
 
-        frag_loss_type = kwargs.pop('fragment_loss_type', None)
-        if frag_loss_type is None:
-            frag_loss_type = list(self.fragment_loss_types)
+        if fragment_loss_type is None:
+            fragment_loss_type = list(self.fragment_loss_types)
         else:
-            if isinstance(frag_loss_type, str):
-                frag_loss_type = [frag_loss_type]
-            frag_loss_type = [
-                x for x in frag_loss_type
+            if isinstance(fragment_loss_type, str):
+                fragment_loss_type = [fragment_loss_type]
+            fragment_loss_type = [
+                x for x in fragment_loss_type
                 if x in self.fragment_loss_types
             ]
 
-        frag_charge = kwargs.pop('fragment_charge', None)
-        if frag_charge is None:
-            frag_charge = list(self.fragment_charges)
+        if fragment_charge is None:
+            fragment_charge = list(self.fragment_charges)
         else:
-            if isinstance(frag_charge, int):
-                frag_charge = [frag_charge]
-            frag_charge = [
+            if isinstance(fragment_charge, int):
+                fragment_charge = [fragment_charge]
+            fragment_charge = [
                 x for x in fragment_charge
                 if x in self.fragment_charges
             ]
 
+        return fragment_type, fragment_loss_type, fragment_charge
+
+
+    def theoretical_fragments(self, sequence, modification=None, **kwargs):
+        fragment_mz = []
+        fragment_type = []
+        fragment_number = []
+        fragment_charge = []
+        fragment_loss_type = []
+        fragment_annotation = []
+
+        frag_type, frag_loss_type, frag_charge = self.fragment_options(
+            fragment_type=kwargs.pop('fragment_type', None),
+            fragment_loss_type=kwargs.pop('fragment_loss_type', None),
+            fragment_charge=kwargs.pop('fragment_charge', None)
+        )
+
         peptide_fragments = self.mass_calculator.fragment_mz(
             sequence=sequence,
             modification=modification,
@@ -120,7 +140,7 @@ class AssayBuilder():
             frgnum = [i + 1 for i, x in enumerate(frgmz) if x is not None]
             frgmz = [frgmz[i - 1] for i in frgnum]
             frgannot = [
-                get_fragment_annotation(
+                self.fragment_annotation(
                     fragment_type=frgtype,
                     fragment_number=i,
                     loss=frglossTpye,
@@ -153,6 +173,73 @@ class AssayBuilder():
         return result
 
 
+    def theoretical_fragments_batch(self, sequences, modifications=None,
+                                    return_generator=False, **kwargs):
+        sequences = list(sequences)
+        if modifications is None:
+            modifications = [None] * len(sequences)
+        else:
+            modifications = list(modifications)
+
+        frag_type, frag_loss_type, frag_charge = self.fragment_options(
+            fragment_type=kwargs.pop('fragment_type', None),
+            fragment_loss_type=kwargs.pop('fragment_loss_type', None),
+            fragment_charge=kwargs.pop('fragment_charge', None)
+        )
+
+        if hasattr(self.mass_calculator, 'fragment_mz_matrix'):
+            fragment_mz, ion_types = self.mass_calculator.fragment_mz_matrix(
+                sequences, modifications,
+                fragment_type=frag_type,
+                loss=frag_loss_type,
+                charge=frag_charge
+            )
+        else:
+            fragment_mz = None
+
+        def _assay(i):
+            if fragment_mz is None:
+                return self.theoretical_fragments(
+                    sequences[i], modification=modifications[i],
+                    fragment_type=frag_type,
+                    fragment_loss_type=frag_loss_type,
+                    fragment_charge=frag_charge,
+                    **kwargs
+                )
+
+            mz = fragment_mz[i, :len(sequences[i]) - 1]
+            ion_index, position = np.nonzero(~np.isnan(mz).T)
+            frgnum = (position + 1).tolist()
+            ions = [ion_types[j] for j in ion_index.tolist()]
+
+            return {
+                'peptideSequence': sequences[i],
+                'modification': modifications[i],
+
+                'fragments': {
+                    'fragmentMZ': mz[position, ion_index].tolist(),
+                    'fragmentType': [x['fragment_type'] for x in ions],
+                    'fragmentNumber': frgnum,
+                    'fragmentCharge': [x['charge'] for x in ions],
+                    'fragmentLossType': [x['loss'] for x in ions],
+                    'fragmentAnnotation': [
+                        self.fragment_annotation(
+                            fragment_type=x['fragment_type'],
+                            fragment_number=n,
+                            loss=x['loss'],
+                            charge=x['charge']
+                        )
+                        for x, n in zip(ions, frgnum)
+                    ]
+                }
+            }
+
+        result = (_assay(i) for i in range(len(sequences)))
+        if not return_generator:
+            result = list(result)
+        return result
+
+
     def update_precursor_mz(self, assay):
         sequence = assay['peptideSequence']
         modification = assay.get('modification', None)
@@ -180,15 +267,15 @@ class AssayBuilder():
         fragment_charge = fragments['fragmentCharge']
         fragment_loss_type = fragments['fragmentLossType']
 
-        fragment_types = list(set(fragment_type) \
+        fragment_types = sorted(set(fragment_type) \
             .intersection(self.fragment_types))
         if len(fragment_types) > 0:
             peptide_fragments = self.mass_calculator.fragment_mz(
                 sequence=sequence,
                 modification=modification,
                 fragment_type=fragment_types,
-                loss=list(set(fragment_loss_type)),
-                charge=list(set(fragment_charge)),
+                loss=sorted(set(fragment_loss_type), key=str),
+                charge=sorted(set(fragment_charge)),
                 **kwargs
             )
         else:
@@ -219,20 +306,175 @@ class AssayBuilder():
         return assay
 
 
+    def fragment_block(self, assay, columns=None):
+        fragments = assay['fragments']
+        if columns is None:
+            columns = list(fragments.keys())
+
+        block = {}
+        for k in columns:
+            v = fragments[k]
+            if k in ('fragmentMZ', 'fragmentIntensity',
+                     'fragmentNumber', 'fragmentCharge'):
+                try:
+                    v = np.array(v, dtype=float)
+                except (TypeError, ValueError):
+                    v = np.array(
+                        [np.nan if x is None else x for x in v],
+                        dtype=float
+                    )
+            else:
+                v = np.array(v, dtype=object)
+            block[k] = v
+        return block
+
+
+    def _fragment_mask_by_values(self, values, accepted):
+        if isinstance(accepted, (str, int)):
+            accepted = [accepted]
+        accepted = set(accepted)
+        return np.fromiter(
+            (x is not None and x in accepted for x in values),
+            dtype=bool, count=len(values)
+        )
+
+
+    def fragment_type_mask(self, assay, fragment_type=None):
+        if fragment_type == None:
+            fragment_type = self.fragment_types
+
+        return self._fragment_mask_by_values(
+            assay['fragments']['fragmentType'],
+            fragment_type
+        )
+
+
+    def fragment_amino_acid_number_mask(self, assay, min_amino_acid_number):
+        number = self.fragment_block(assay, ['fragmentNumber'])
+        with np.errstate(invalid='ignore'):
+            return number['fragmentNumber'] >= min_amino_acid_number
+
+
+    def fragment_charge_mask(self, assay, fragment_charge=None):
+        if fragment_charge == None:
+            fragment_charge = self.fragment_charges
+
+        return self._fragment_mask_by_values(
+            assay['fragments']['fragmentCharge'],
+            fragment_charge
+        )
+
+
+    def fragment_loss_type_mask(self, assay, fragment_loss_type=None):
+        if fragment_loss_type == None:
+            fragment_loss_type = self.fragment_loss_types
+        if isinstance(fragment_loss_type, str):
+            fragment_loss_type = [fragment_loss_type]
+        fragment_loss_type = set(fragment_loss_type)
+        noloss = 'noloss' in fragment_loss_type
+
+        loss_type = assay['fragments']['fragmentLossType']
+        return np.fromiter(
+            (
+                (x is None or x == 'None' or x == '') and noloss or \
+                (x is not None and x in fragment_loss_type)
+                for x in loss_type
+            ),
+            dtype=bool, count=len(loss_type)
+        )
+
+
+    def fragment_mz_mask(self, assay, min_mz=None, max_mz=None):
+        mz = self.fragment_block(assay, ['fragmentMZ'])['fragmentMZ']
+        mask = ~np.isnan(mz)
+        if min_mz is not None:
+            mask[mask] = mz[mask] >= min_mz
+        if max_mz is not None:
+            mask[mask] = mz[mask] <= max_mz
+        return mask
+
+
+    def isolation_window_mask(self, assay, swath_windows):
+        precursor_mz = assay['precursorMZ']
+        isolation_window_index = np.where(
+            (swath_windows['start'] < precursor_mz) & \
+            (swath_windows['end'] > precursor_mz)
+        )[0]
+
+        mask = np.ones(len(assay['fragments']['fragmentMZ']), dtype=bool)
+        for i in isolation_window_index:
+            mask &= ~self.fragment_mz_mask(
+                assay,
+                min_mz=swath_windows['start'][i],
+                max_mz=swath_windows['end'][i]
+            )
+        return mask
+
+
+    def fragment_intensity_mask(self, assay,
+                                absolute_intensity=None,
+                                relative_intensity=None,
+                                top_n=None,
+                                fragment_mask=None):
+        intensity = self.fragment_block(
+            assay, ['fragmentIntensity']
+        )['fragmentIntensity']
+        mask = ~np.isnan(intensity)
+        if fragment_mask is not None:
+            mask &= fragment_mask
+        if not mask.any():
+            return mask
+
+        if relative_intensity is not None:
+            threshold = relative_intensity * np.max(intensity[mask])
+            if absolute_intensity is None:
+                absolute_intensity = threshold
+            else:
+                absolute_intensity = max(absolute_intensity, threshold)
+
+        if absolute_intensity is not None:
+            mask[mask] = intensity[mask] >= absolute_intensity
+
+        if top_n is not None:
+            fragment_index = np.flatnonzero(mask)
+            order = np.argsort(-intensity[fragment_index], kind='stable')
+            mask[fragment_index[order[top_n:]]] = False
+        return mask
+
+
+    def _filter_fragments_by_mask(self, assay, mask,
+                                  return_index=False, copy=True):
+        fragment_index = np.flatnonzero(mask).tolist()
+
+        if return_index:
+            return fragment_index
+        else:
+            return self.filter_fragments_by_index(
+                assay,
+                fragment_index=fragment_index,
+                copy=copy
+            )
+
+
     def filter_fragments_by_index(self, assay, fragment_index,
                                   invert=False, copy=True):
+        fragments = assay['fragments']
         if copy:
-            assay = deepcopy(assay)
+            # fragment columns are rebuilt below, only copy the other fields
+            assay = {
+                k: deepcopy(v) if k != 'fragments' else {}
+                for k, v in assay.items()
+            }
 
         if invert:
             fragment_index = set(fragment_index)
-            for k, v in assay['fragments'].items():
+            for k, v in list(fragments.items()):
                 assay['fragments'][k] = [
                     x for i, x in enumerate(v)
                     if i not in fragment_index
                 ]
         else:
-            for k, v in assay['fragments'].items():
+            for k, v in list(fragments.items()):
                 assay['fragments'][k] = [v[i] for i in fragment_index]
 
         return assay
@@ -240,148 +482,63 @@ class AssayBuilder():
 
     def filter_fragments_by_type(self, assay, fragment_type=None,
                                  return_index=False, copy=True):
-        if fragment_type == None:
-            fragment_type = self.fragment_types
-
-        fragment_index = [
-            i
-            for i, x in enumerate(assay['fragments']['fragmentType'])
-            if x is not None and (\
-            isinstance(fragment_type, str) and x == fragment_type or \
-            x in fragment_type)
-        ]
+        return self._filter_fragments_by_mask(
+            assay,
+            self.fragment_type_mask(assay, fragment_type),
+            return_index=return_index, copy=copy
+        )
 
-        if return_index:
-            return fragment_index
-        else:
-            return self.filter_fragments_by_index(
-                assay,
-                fragment_index=fragment_index,
-                copy=copy
-            )
 
     def filter_fragments_by_amino_acid_number(self, assay,
                                               min_amino_acid_number,
                                               return_index=False,
                                               copy=True):
-        fragment_index = [
-            i
-            for i, x in enumerate(assay['fragments']['fragmentNumber'])
-            if x is not None and x >= min_amino_acid_number
-        ]
-
-        if return_index:
-            return fragment_index
-        else:
-            return self.filter_fragments_by_index(
-                assay,
-                fragment_index=fragment_index,
-                copy=copy
-            )
+        return self._filter_fragments_by_mask(
+            assay,
+            self.fragment_amino_acid_number_mask(
+                assay, min_amino_acid_number
+            ),
+            return_index=return_index, copy=copy
+        )
 
 
     def filter_fragments_by_charge(self, assay, fragment_charge=None,
                                    return_index=False, copy=True):
-        if fragment_charge == None:
-            fragment_charge = self.fragment_charges
-
-        fragment_index = [
-            i
-            for i, x in enumerate(assay['fragments']['fragmentCharge'])
-            if x is not None and (\
-            isinstance(fragment_charge, int) and x == fragment_charge or \
-            x in fragment_charge)
-        ]
-
-        if return_index:
-            return fragment_index
-        else:
-            return self.filter_fragments_by_index(
-                assay,
-                fragment_index=fragment_index,
-                copy=copy
-            )
+        return self._filter_fragments_by_mask(
+            assay,
+            self.fragment_charge_mask(assay, fragment_charge),
+            return_index=return_index, copy=copy
+        )
 
 
     def filter_fragments_by_loss_type(self, assay, fragment_loss_type=None,
                                       return_index=False, copy=True):
-        if fragment_loss_type == None:
-            fragment_loss_type = self.fragment_loss_types
-
-        fragment_index = [
-            i
-            for i, x in enumerate(assay['fragments']['fragmentLossType'])
-            if (x is None or x == 'None' or x == '') and \
-                (fragment_loss_type == 'noloss' or 'noloss' in fragment_loss_type) or \
-               (x == fragment_loss_type or x in fragment_loss_type)
-        ]
-
-        if return_index:
-            return fragment_index
-        else:
-            return self.filter_fragments_by_index(
-                assay,
-                fragment_index=fragment_index,
-                copy=copy
-            )
+        return self._filter_fragments_by_mask(
+            assay,
+            self.fragment_loss_type_mask(assay, fragment_loss_type),
+            return_index=return_index, copy=copy
+        )
 
 
     def filter_fragments_by_mz(self, assay, min_mz=None, max_mz=None,
                                return_index=False, copy=True):
-        fragment_index = [
-            i
-            for i, x in enumerate(assay['fragments']['fragmentMZ'])
-            if x is not None and \
-            (min_mz is None or x >= min_mz) and \
-            (max_mz is None or x <= max_mz)
-        ]
-
-        if return_index:
-            return fragment_index
-        else:
-            return self.filter_fragments_by_index(
-                assay,
-                fragment_index=fragment_index,
-                copy=copy
-            )
+        return self._filter_fragments_by_mask(
+            assay,
+            self.fragment_mz_mask(assay, min_mz=min_mz, max_mz=max_mz),
+            return_index=return_index, copy=copy
+        )
 
 
     def exclude_fragments_in_isolation_window(
             self, assay, swath_windows, return_index=False, copy=True):
-        precursor_mz = assay['precursorMZ']
-        isolation_window_index = np.where(
-            (swath_windows['start'] < precursor_mz) & \
-            (swath_windows['end'] > precursor_mz)
-        )[0]
-        if len(isolation_window_index) == 0:
-            if not return_index:
-                return assay
-            else:
-                return [
-                    i for i, x in enumerate(assay['fragments']['fragmentMZ'])
-                ]
-
-        exclude = set(itertools.chain.from_iterable((
-            self.filter_fragments_by_mz(
-                assay,
-                min_mz=swath_windows['start'][i],
-                max_mz=swath_windows['end'][i],
-                return_index=True
-            )
-            for i in isolation_window_index
-        )))
+        mask = self.isolation_window_mask(assay, swath_windows)
+        if not return_index and mask.all():
+            return assay
 
-        if not return_index:
-            return self.filter_fragments_by_index(
-                assay,
-                fragment_index=list(exclude),
-                invert=True, copy=copy
-            )
-        else:
-            return [
-                i for i, x in enumerate(assay['fragments']['fragmentMZ'])
-                if i not in exclude
-            ]
+        return self._filter_fragments_by_mask(
+            assay, mask,
+            return_index=return_index, copy=copy
+        )
 
 
     def filter_fragments_by_intensity(self, assay,
@@ -389,174 +546,106 @@ class AssayBuilder():
                                       relative_intensity=None,
                                       top_n=None,
                                       return_index=False, copy=True):
-        if len(assay['fragments']['fragmentIntensity']) > 0:
-            if relative_intensity is not None:
-                intensity = relative_intensity * max(
-                    x for x in assay['fragments']['fragmentIntensity']
-                    if x is not None
-                )
-                if absolute_intensity is None:
-                    absolute_intensity = intensity
-                else:
-                    absolute_intensity = max(absolute_intensity, intensity)
-
-            fragment_intensity = assay['fragments']['fragmentIntensity']
-            fragment_index = [
-                i
-                for i, x in enumerate(fragment_intensity)
-                if x is not None and \
-                (absolute_intensity is None or x >= absolute_intensity)
-            ]
-
-            if top_n is not None:
-                fragment_index = sorted(
-                    fragment_index,
-                    key=lambda k: fragment_intensity[k],
-                    reverse=True
-                )[:top_n]
-                fragment_index.sort()
-
-        else:
-            fragment_index = []
-
-        if return_index:
-            return fragment_index
-        else:
-            return self.filter_fragments_by_index(
+        return self._filter_fragments_by_mask(
+            assay,
+            self.fragment_intensity_mask(
                 assay,
-                fragment_index=fragment_index,
-                copy=copy
-            )
+                absolute_intensity=absolute_intensity,
+                relative_intensity=relative_intensity,
+                top_n=top_n
+            ),
+            return_index=return_index, copy=copy
+        )
 
 
-    def filter_fragments(self, assay,
-                         max_fragment_number=None,
-                         fragment_type=None,
-                         fragment_charge=None,
-                         fragment_loss_type=None,
-                         min_fragment_amino_acid_number=None,
-                         min_fragment_mz=None,
-                         max_fragment_mz=None,
-                         swath_windows=None,
-                         min_relative_fragment_intensity=None,
-                         return_index=False, copy=True):
-        fragment_index = None
+    def fragment_mask(self, assay,
+                      max_fragment_number=None,
+                      fragment_type=None,
+                      fragment_charge=None,
+                      fragment_loss_type=None,
+                      min_fragment_amino_acid_number=None,
+                      min_fragment_mz=None,
+                      max_fragment_mz=None,
+                      swath_windows=None,
+                      min_relative_fragment_intensity=None):
+        mask = np.ones(len(assay['fragments']['fragmentType']), dtype=bool)
+
         if fragment_type is not None:
-            fragment_index_1 = self.filter_fragments_by_type(
-                assay, fragment_type,
-                return_index=True
-            )
-            if fragment_index is None:
-                fragment_index = set(fragment_index_1)
-            else:
-                fragment_index = fragment_index \
-                    .intersection(fragment_index_1)
+            mask &= self.fragment_type_mask(assay, fragment_type)
 
         if fragment_charge is not None:
-            fragment_index_1 = self.filter_fragments_by_charge(
-                assay, fragment_charge,
-                return_index=True
-            )
-            if fragment_index is None:
-                fragment_index = set(fragment_index_1)
-            else:
-                fragment_index = fragment_index \
-                    .intersection(fragment_index_1)
+            mask &= self.fragment_charge_mask(assay, fragment_charge)
 
         if fragment_loss_type is not None:
-            fragment_index_1 = self.filter_fragments_by_loss_type(
-                assay, fragment_loss_type,
-                return_index=True
-            )
-            if fragment_index is None:
-                fragment_index = set(fragment_index_1)
-            else:
-                fragment_index = fragment_index \
-                    .intersection(fragment_index_1)
+            mask &= self.fragment_loss_type_mask(assay, fragment_loss_type)
 
         if min_fragment_amino_acid_number is not None:
-            fragment_index_1 = self.filter_fragments_by_amino_acid_number(
-                assay,
-                min_amino_acid_number=min_fragment_amino_acid_number,
-                return_index=True
+            mask &= self.fragment_amino_acid_number_mask(
+                assay, min_fragment_amino_acid_number
             )
-            if fragment_index is None:
-                fragment_index = set(fragment_index_1)
-            else:
-                fragment_index = fragment_index \
-                    .intersection(fragment_index_1)
 
         if min_fragment_mz is not None or \
             max_fragment_mz is not None:
-            fragment_index_1 = self.filter_fragments_by_mz(
-                assay, min_mz=min_fragment_mz, max_mz=max_fragment_mz,
-                return_index=True
+            mask &= self.fragment_mz_mask(
+                assay, min_mz=min_fragment_mz, max_mz=max_fragment_mz
             )
-            if fragment_index is None:
-                fragment_index = set(fragment_index_1)
-            else:
-                fragment_index = fragment_index \
-                    .intersection(fragment_index_1)
 
         if swath_windows is not None:
-            fragment_index_1 = self.exclude_fragments_in_isolation_window(
-                assay, swath_windows=swath_windows,
-                return_index=True
-            )
-            if fragment_index is None:
-                fragment_index = set(fragment_index_1)
-            else:
-                fragment_index = fragment_index \
-                    .intersection(fragment_index_1)
-
-        if fragment_index is not None:
-            fragment_index = list(fragment_index)
-            assay_1 = self.filter_fragments_by_index(assay, fragment_index)
-        else:
-            assay_1 = assay
+            mask &= self.isolation_window_mask(assay, swath_windows)
 
+        # intensity thresholds and top N are relative to the fragments
+        # remaining after the filters above
         if max_fragment_number is not None or \
             min_relative_fragment_intensity is not None:
-            fragment_index_1 = self.filter_fragments_by_intensity(
-                assay_1,
+            mask = self.fragment_intensity_mask(
+                assay,
                 relative_intensity=min_relative_fragment_intensity,
                 top_n=max_fragment_number,
-                return_index=True
+                fragment_mask=mask
             )
 
-            if fragment_index is None:
-                fragment_index = fragment_index_1
-            else:
-                fragment_index = [fragment_index[i] for i in fragment_index_1]
+        return mask
 
-        if return_index:
-            if fragment_index is None:
-                fragment_index = list(
-                    range(0, len(assay['fragments']['fragmentType']))
-                )
-            return fragment_index
-        else:
-            if fragment_index is not None:
-                assay = self.filter_fragments_by_index(
-                    assay, fragment_index,
-                    copy=copy
-                )
+
+    def filter_fragments(self, assay,
+                         max_fragment_number=None,
+                         fragment_type=None,
+                         fragment_charge=None,
+                         fragment_loss_type=None,
+                         min_fragment_amino_acid_number=None,
+                         min_fragment_mz=None,
+                         max_fragment_mz=None,
+                         swath_windows=None,
+                         min_relative_fragment_intensity=None,
+                         return_index=False, copy=True):
+        kwargs = dict(
+            max_fragment_number=max_fragment_number,
+            fragment_type=fragment_type,
+            fragment_charge=fragment_charge,
+            fragment_loss_type=fragment_loss_type,
+            min_fragment_amino_acid_number=min_fragment_amino_acid_number,
+            min_fragment_mz=min_fragment_mz,
+            max_fragment_mz=max_fragment_mz,
+            swath_windows=swath_windows,
+            min_relative_fragment_intensity=min_relative_fragment_intensity
+        )
+        if not return_index and \
+            all(v is None for v in kwargs.values()):
             return assay
 
+        return self._filter_fragments_by_mask(
+            assay,
+            self.fragment_mask(assay, **kwargs),
+            return_index=return_index, copy=copy
+        )
+
 
     def select_quantifying_transitions(self, assay, copy=True, **kwargs):
         if copy:
             assay = deepcopy(assay)
 
-        fragment_index = self.filter_fragments(
-            assay, return_index=True,
-            **kwargs
-        )
-
-        assay['fragments']['quantifyingTransition'] = [
-            i in fragment_index
-            for i in range(0, len(assay['fragments']['fragmentType']))
-        ]
+        assay['fragments']['quantifyingTransition'] = \
+            self.fragment_mask(assay, **kwargs).tolist()
         return assay
 
 
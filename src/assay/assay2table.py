@@ -1,4 +1,8 @@
+import gzip
+import itertools
+import numbers
 import pandas as pd
+from collections import OrderedDict
 
 from .modseq import stringify_modification
 from .values import get_assay_values
@@ -24,13 +28,126 @@ class AssayToDataFrameConverter:
 
 
     def assays_to_dataframe(self, assays, **func_args):
-        return pd.concat(
-            filter(len, (
-                self.assay_to_dataframe(x, index=i, **func_args)
-                for i, x in enumerate(assays)
-            )), 
-            ignore_index=True
-        )
+        data = self.assays_to_columns(assays, **func_args)
+        return pd.DataFrame({
+            k: _to_series(v) for k, v in data.items()
+        })
+
+
+    def assays_to_columns(self, assays, start=0, **func_args):
+        data = OrderedDict()
+        for i, assay in enumerate(assays, start=start):
+            d = get_assay_values(assay, self.columns, dict(func_args, index=i))
+
+            n = None
+            for v in d.values():
+                if isinstance(v, (list, tuple)):
+                    if n is None:
+                        n = len(v)
+                    elif len(v) != n:
+                        raise ValueError(
+                            'column lengths not match: ' + \
+                            str(assay.get('peptideSequence', None))
+                        )
+            if n is None:
+                n = 1
+
+            for k, v in d.items():
+                column = data.get(k, None)
+                if column is None:
+                    column = data[k] = []
+                if isinstance(v, (list, tuple)):
+                    column.extend(v)
+                else:
+                    column.extend(itertools.repeat(v, n))
+
+        if len(data) == 0:
+            data = OrderedDict(
+                (p.get('name') if isinstance(p, dict) else p, [])
+                for p in self.columns
+            )
+        return data
+
+
+    def assays_to_dataframe_chunks(self, assays, chunk_size=10000,
+                                   **func_args):
+        assays = iter(assays)
+        start = 0
+        while True:
+            chunk = list(itertools.islice(assays, chunk_size))
+            if len(chunk) == 0:
+                break
+            yield pd.DataFrame({
+                k: _to_series(v)
+                for k, v in self.assays_to_columns(
+                    chunk, start=start, **func_args
+                ).items()
+            })
+            start += len(chunk)
+
+
+    def write_table(self, assays, file, chunk_size=10000, sep=None,
+                    callback=None, **func_args):
+        if file.endswith('.parquet'):
+            return self.write_parquet(
+                assays, file, chunk_size=chunk_size, callback=callback,
+                **func_args
+            )
+
+        if sep is None:
+            sep = ',' if file.endswith('.csv') or file.endswith('.csv.gz') \
+                else '\t'
+
+        if file.endswith('.gz'):
+            f = gzip.open(file, 'wt', newline='')
+        else:
+            f = open(file, 'w', newline='')
+
+        rows = 0
+        with f:
+            for i, data in enumerate(self.assays_to_dataframe_chunks(
+                assays, chunk_size=chunk_size, **func_args
+            )):
+                data.to_csv(f, index=False, sep=sep, header=(i == 0))
+                rows += len(data)
+                if callback is not None:
+                    callback(data)
+        return rows
+
+
+    def write_parquet(self, assays, file, chunk_size=10000, callback=None,
+                      **func_args):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = 0
+        writer = None
+        try:
+            for data in self.assays_to_dataframe_chunks(
+                assays, chunk_size=chunk_size, **func_args
+            ):
+                table = pa.Table.from_pandas(data, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(file, table.schema)
+                else:
+                    table = table.cast(writer.schema)
+                writer.write_table(table)
+                rows += len(data)
+                if callback is not None:
+                    callback(data)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+
+
+def _to_series(values):
+    series = pd.Series(values)
+    if series.dtype.kind == 'f' and series.hasnans and \
+        any(isinstance(x, numbers.Integral) for x in values):
+        series = pd.Series(values, dtype=object)
+    return series
 
 
 
@@ -1,4 +1,9 @@
+import heapq
 import itertools
+import logging
+import os
+import pickle
+import tempfile
 import numpy as np
 
 from .modseq import stringify_modification
@@ -19,11 +24,17 @@ class AssayCombiner():
         )
 
 
-    def remove_redundant(self, assays, return_generator=False):
-        result = (
-            self.combine_replicates(spectra)
-            for spectra in self.group_replicates(assays)
+    def remove_redundant(self, assays, return_generator=False,
+                         workers=None, spill_threshold=None, temp_dir=None):
+        groups = self.group_replicates(
+            assays,
+            spill_threshold=spill_threshold,
+            temp_dir=temp_dir
         )
+        if workers is not None and workers > 1:
+            result = combine_replicates_parallel(self, groups, workers=workers)
+        else:
+            result = (self.combine_replicates(spectra) for spectra in groups)
         result = (x for x in result if x is not None)
 
         if not return_generator:
@@ -32,17 +43,16 @@ class AssayCombiner():
         return result
 
 
-    def group_replicates(self, assays):
-        def get_key(assay):
-            d = get_assay_values(assay, self.group_key)
-            return tuple(map(str, d.values()))
+    def replicate_key(self, assay):
+        d = get_assay_values(assay, self.group_key)
+        return tuple(map(str, d.values()))
+
 
-        return (
-            list(v)
-            for k, v in itertools.groupby(
-                sorted(assays, key=get_key),
-                key=get_key
-            )
+    def group_replicates(self, assays, spill_threshold=None, temp_dir=None):
+        return group_by_key(
+            assays, self.replicate_key,
+            spill_threshold=spill_threshold,
+            temp_dir=temp_dir
         )
 
 
@@ -53,6 +63,201 @@ class AssayCombiner():
         return spectra[0]
 
 
+    def combiner_config(self):
+        return {
+            'combiner': type(self).__name__,
+            'group_key': [
+                p.get('name') if isinstance(p, dict) else p
+                for p in self.group_key
+            ]
+        }
+
+
+    def merge_state(self, state, spectra):
+        if state is not None and state['assay'] is not None:
+            spectra = [state['assay']] + list(spectra)
+        return {'assay': self.combine_replicates(spectra)}
+
+
+    def state_result(self, state):
+        return state['assay']
+
+
+    def update(self, states, assays, return_generator=False,
+               spill_threshold=None, temp_dir=None):
+        groups = self.group_replicates(
+            assays,
+            spill_threshold=spill_threshold,
+            temp_dir=temp_dir
+        )
+        for spectra in groups:
+            key = self.replicate_key(spectra[0])
+            state = self.merge_state(states.get(key, None), spectra)
+            state['result'] = self.state_result(state)
+            states[key] = state
+
+        result = (states[k]['result'] for k in sorted(states))
+        result = (x for x in result if x is not None)
+
+        if not return_generator:
+            result = list(result)
+
+        return result
+
+
+def save_replicate_states(states, file, config=None):
+    with open(file, 'wb') as f:
+        pickle.dump(
+            {'config': config, 'states': states}, f,
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+
+def load_replicate_states(file, config=None):
+    with open(file, 'rb') as f:
+        data = pickle.load(f)
+
+    if config is not None and data['config'] != config:
+        raise ValueError(
+            'replicate states created with different options: ' + \
+            str(data['config'])
+        )
+    return data['states']
+
+
+def group_by_key(items, key, spill_threshold=None, partitions=64,
+                 temp_dir=None):
+    if spill_threshold is None:
+        groups = {}
+        for x in items:
+            groups.setdefault(key(x), []).append(x)
+        for k in sorted(groups):
+            yield groups[k]
+        return
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as spill_dir:
+        buffers = [[] for _ in range(partitions)]
+        files = [None] * partitions
+
+        def spill():
+            for i in range(partitions):
+                if len(buffers[i]) == 0:
+                    continue
+                if files[i] is None:
+                    files[i] = open(os.path.join(
+                        spill_dir, 'partition_' + str(i) + '.pickle'
+                    ), 'w+b')
+                pickle.dump(
+                    buffers[i], files[i],
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+                buffers[i] = []
+
+        try:
+            buffered = 0
+            for x in items:
+                k = key(x)
+                buffers[hash(k) % partitions].append((k, x))
+                buffered += 1
+                if buffered >= spill_threshold:
+                    spill()
+                    buffered = 0
+
+            if all(f is None for f in files):
+                groups = {}
+                for k, x in itertools.chain.from_iterable(buffers):
+                    groups.setdefault(k, []).append(x)
+                for k in sorted(groups):
+                    yield groups[k]
+                return
+
+            # each key lives in one partition: write the groups of every
+            # partition sorted by key, then merge the partitions in key order
+            for i in range(partitions):
+                groups = {}
+                if files[i] is not None:
+                    files[i].seek(0)
+                    while True:
+                        try:
+                            chunk = pickle.load(files[i])
+                        except EOFError:
+                            break
+                        for k, x in chunk:
+                            groups.setdefault(k, []).append(x)
+                    files[i].close()
+                for k, x in buffers[i]:
+                    groups.setdefault(k, []).append(x)
+                buffers[i] = []
+                if len(groups) == 0:
+                    files[i] = None
+                    continue
+
+                files[i] = open(os.path.join(
+                    spill_dir, 'sorted_' + str(i) + '.pickle'
+                ), 'w+b')
+                for k in sorted(groups):
+                    pickle.dump(
+                        (k, groups[k]), files[i],
+                        protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                del groups
+
+            def read_groups(f):
+                f.seek(0)
+                while True:
+                    try:
+                        yield pickle.load(f)
+                    except EOFError:
+                        break
+
+            for _, group in heapq.merge(
+                *(read_groups(f) for f in files if f is not None),
+                key=lambda x: x[0]
+            ):
+                yield group
+
+        finally:
+            for f in files:
+                if f is not None and not f.closed:
+                    f.close()
+
+
+_combiner = None
+
+
+def _init_combiner(combiner):
+    global _combiner
+    _combiner = combiner
+
+
+def _combine_replicates(spectra):
+    return _combiner.combine_replicates(spectra)
+
+
+def combine_replicates_parallel(combiner, groups, workers=None,
+                                chunk_size=16):
+    import multiprocessing
+
+    # the scripts calling this have no __main__ guard, so worker processes
+    # can only be forked; other start methods would re-run the script
+    if multiprocessing.get_start_method() != 'fork':
+        logging.warning(
+            'multiprocessing start method is not fork, combine serially'
+        )
+        yield from (combiner.combine_replicates(spectra) for spectra in groups)
+        return
+
+    with multiprocessing.Pool(
+        workers,
+        initializer=_init_combiner,
+        initargs=(combiner,)
+    ) as pool:
+        yield from pool.imap(
+            _combine_replicates, groups,
+            chunksize=chunk_size
+        )
+
+
 class BestReplicateAssayCombiner(AssayCombiner):
     def __init__(self,
                  group_key=None,
@@ -79,6 +284,15 @@ class BestReplicateAssayCombiner(AssayCombiner):
         return spectra[index]
 
 
+    def combiner_config(self):
+        config = super(BestReplicateAssayCombiner, self).combiner_config()
+        config.update({
+            'score': self.score,
+            'higher_score_better': self.higher_score_better
+        })
+        return config
+
+
 def peptide_group_key(within_run=False):
     group_key = [
         'peptideSequence',
@@ -2,7 +2,7 @@ import numpy as np
 import copy
 
 from .combine import AssayCombiner
-from .similarity import SimilarityScorer
+from .similarity import SimilarityScorer, aligned_fragment_matrix
 
 class ConsensusAssayCombiner(AssayCombiner):
     def __init__(self, 
@@ -38,105 +38,238 @@ class ConsensusAssayCombiner(AssayCombiner):
             if len(spectra) == 0:
                 return None
         
+        weight = self.replicate_weights(spectra)
+        sorted_index = self.sort_replicates(weight)
+
+        spectra = [spectra[i] for i in sorted_index]
+        weight = weight[sorted_index]
+        if len(spectra) == 0:
+            return None
+
+        fragment_index = self.similarity_scorer.fragment_index_matrix(spectra)
+        present = fragment_index >= 0
+        if self.peak_quorum is not None:
+            keep = present.sum(axis=0) / len(spectra) > self.peak_quorum
+            fragment_index = fragment_index[:, keep]
+            present = present[:, keep]
+
+        if fragment_index.shape[1] == 0:
+            return None
+
+        replicate_weight = weight[:, np.newaxis] * present
+        total_weight = replicate_weight.sum(axis=0)
+
+        def weighted_mean(key):
+            values = np.zeros(fragment_index.shape, dtype=np.float64)
+            for i, spec in enumerate(spectra):
+                values[i, present[i]] = np.asarray(
+                    spec['fragments'][key], dtype=np.float64
+                )[fragment_index[i, present[i]]]
+            return ((values * replicate_weight).sum(axis=0) / total_weight) \
+                .tolist()
+
+        first = np.argmax(present, axis=0).tolist()
+        first_index = fragment_index[first, np.arange(len(first))].tolist()
+
+        fragments = {}
+        for k in spectra[0]['fragments'].keys():
+            if k == 'fragmentIntensity' or k == 'fragmentMZ':
+                fragments[k] = weighted_mean(k)
+                continue
+
+            arrays = [spec['fragments'].get(k, None) for spec in spectra]
+            fragments[k] = [
+                arrays[i][x] if arrays[i] is not None else None
+                for i, x in zip(first, first_index)
+            ]
+
+        return {
+            k: fragments if k == 'fragments' else copy.deepcopy(v)
+            for k, v in spectra[0].items()
+        }
+
+
+    def replicate_weights(self, spectra):
         if self.replicate_weight is not None:
-            weight = [
+            return np.array([
                 spec['metadata'][self.replicate_weight]
                 for spec in spectra
-            ]
+            ], dtype=np.float64)
+        else:
+            return np.ones(len(spectra), dtype=np.float64)
+
+
+    def sort_replicates(self, weight):
+        if self.replicate_weight is not None:
             sorted_index = np.argsort(weight)[::-1]
         else:
-            weight = [1 for x in range(len(spectra))]
-            sorted_index = np.array(list(range(len(spectra))))
-        
+            sorted_index = np.arange(len(weight))
+
         if self.maximum_replicates_number is not None:
             sorted_index = sorted_index[:self.maximum_replicates_number]
-        
-        spectra = [spectra[i] for i in sorted_index]     
-        weight = [weight[i] for i in sorted_index]     
-        if len(spectra) == 0:
-            return None        
-        
-        fragment_index = self.similarity_scorer.align_fragments(spectra)
-        if self.peak_quorum is not None:
-            fragment_index = [
-                t
-                for t in fragment_index
-                if sum(map(lambda x: x is not None, t)) / len(spectra) \
-                    > self.peak_quorum
+        return sorted_index
+
+
+    def remove_dissimilar_replicates(self, spectra):
+        return self.similar_replicates(
+            self.similarity_scorer.similarity_matrix(spectra)
+        )
+
+
+    def similar_replicates(self, similarity):
+        n = len(similarity)
+        score = np.median(
+            similarity[~np.eye(n, dtype=bool)].reshape((n, n - 1)),
+            axis=1
+        )
+        return np.flatnonzero(
+            score > self.replicate_similarity_threshold
+        ).tolist()
+
+
+    def combiner_config(self):
+        config = super(ConsensusAssayCombiner, self).combiner_config()
+        config.update({
+            'replicate_similarity_threshold': \
+                self.replicate_similarity_threshold,
+            'replicate_weight': self.replicate_weight,
+            'maximum_replicates_number': self.maximum_replicates_number,
+            'peak_quorum': self.peak_quorum
+        })
+        return config
+
+
+    def merge_state(self, state, spectra):
+        if state is None and len(spectra) == 1:
+            return {'assay': spectra[0]}
+        if state is not None and 'assay' in state:
+            spectra = [state['assay']] + list(spectra)
+            state = None
+        if state is None:
+            state = {
+                'headers': [],
+                'weight': np.zeros(0, dtype=np.float64),
+                'annotation': [],
+                'index': np.zeros((0, 0), dtype=np.int64),
+                'values': {
+                    'fragmentIntensity': np.zeros((0, 0), dtype=np.float64),
+                    'fragmentMZ': np.zeros((0, 0), dtype=np.float64)
+                },
+                'fields': {}
+            }
+
+        aligned = aligned_fragment_matrix(spectra)
+        columns = {x: i for i, x in enumerate(state['annotation'])}
+        col = np.array([
+            columns.setdefault(x, len(columns))
+            for x in aligned['annotation']
+        ], dtype=np.int64)
+        new_col = np.flatnonzero(col >= len(state['annotation']))
+
+        shape = (len(state['headers']) + len(spectra), len(columns))
+
+        def append_rows(matrix, rows, fill):
+            result = np.full(shape, fill, dtype=matrix.dtype)
+            result[:matrix.shape[0], :matrix.shape[1]] = matrix
+            result[matrix.shape[0]:, col] = rows
+            return result
+
+        present = aligned['index'] >= 0
+        values = {}
+        for k, matrix in state['values'].items():
+            rows = np.zeros(aligned['index'].shape, dtype=np.float64)
+            for i, spec in enumerate(spectra):
+                array = spec['fragments'].get(k, None)
+                if array is not None:
+                    rows[i, present[i]] = np.asarray(
+                        array, dtype=np.float64
+                    )[aligned['index'][i, present[i]]]
+            values[k] = append_rows(matrix, rows, 0)
+
+        first = np.argmax(present[:, new_col], axis=0).tolist()
+        first_index = aligned['index'][first, new_col].tolist()
+        fields = {}
+        for k in set(state['fields'].keys()).union(*(
+            spec['fragments'].keys() for spec in spectra
+        )):
+            if k in state['values']:
+                continue
+            arrays = [spec['fragments'].get(k, None) for spec in spectra]
+            fields[k] = state['fields'].get(
+                k, [None] * len(state['annotation'])
+            ) + [
+                arrays[i][x] if arrays[i] is not None else None
+                for i, x in zip(first, first_index)
             ]
-            
-        if len(fragment_index) == 0:
+
+        return {
+            'headers': state['headers'] + [
+                {
+                    k: tuple(v.keys()) if k == 'fragments' else v
+                    for k, v in spec.items()
+                }
+                for spec in spectra
+            ],
+            'weight': np.concatenate([
+                state['weight'], self.replicate_weights(spectra)
+            ]),
+            'annotation': list(columns.keys()),
+            'index': append_rows(state['index'], aligned['index'], -1),
+            'values': values,
+            'fields': fields
+        }
+
+
+    def state_result(self, state):
+        if 'assay' in state:
+            return state['assay']
+
+        rows = np.arange(len(state['headers']))
+        if self.replicate_similarity_threshold is not None:
+            rows = np.array(self.similar_replicates(
+                self.similarity_scorer.intensity_similarity_matrix(
+                    state['values']['fragmentIntensity']
+                )
+            ), dtype=np.int64)
+            if len(rows) == 0:
+                return None
+
+        rows = rows[self.sort_replicates(state['weight'][rows])]
+        if len(rows) == 0:
             return None
-        
-        fragments = {
-            k: []
-            for k in spectra[0]['fragments'].keys()
+
+        index = state['index'][rows]
+        present = index >= 0
+
+        cols = np.flatnonzero(present.any(axis=0))
+        first = np.argmax(present[:, cols], axis=0)
+        cols = cols[np.lexsort((index[first, cols], first))]
+        present = present[:, cols]
+
+        if self.peak_quorum is not None:
+            keep = present.sum(axis=0) / len(rows) > self.peak_quorum
+            cols = cols[keep]
+            present = present[:, keep]
+
+        if len(cols) == 0:
+            return None
+
+        replicate_weight = state['weight'][rows, np.newaxis] * present
+        total_weight = replicate_weight.sum(axis=0)
+
+        header = state['headers'][rows[0]]
+        fragments = {}
+        for k in header['fragments']:
+            if k in state['values']:
+                fragments[k] = (
+                    (state['values'][k][rows][:, cols] * replicate_weight) \
+                        .sum(axis=0) / total_weight
+                ).tolist()
+            else:
+                fields = state['fields'][k]
+                fragments[k] = [fields[c] for c in cols.tolist()]
+
+        return {
+            k: fragments if k == 'fragments' else copy.deepcopy(v)
+            for k, v in header.items()
         }
-        fragment_intensity = fragments['fragmentIntensity']
-        fragment_mz = fragments.get('fragmentMZ', None)
-        
-        for t in fragment_index:
-            intensity = sum((
-                spectra[i]['fragments']['fragmentIntensity'][x] * weight[i]
-                for i, x in enumerate(t)
-                if x is not None
-            )) / sum((
-                weight[i]
-                for i, x in enumerate(t)
-                if x is not None
-            ))
-            fragment_intensity.append(intensity)
-            
-            if fragment_mz is not None:
-                mz = sum((
-                    spectra[i]['fragments']['fragmentMZ'][x] * weight[i]
-                    for i, x in enumerate(t)
-                    if x is not None
-                )) / sum((
-                    weight[i]
-                    for i, x in enumerate(t)
-                    if x is not None
-                ))
-                fragment_mz.append(mz)
-    
-            for k in fragments.keys():
-                if k == 'fragmentIntensity' or k == 'fragmentMZ':
-                    continue
-                
-                for i, x in enumerate(t):
-                    if x is not None:
-                        array = spectra[i]['fragments'].get(k, None)
-                        if array is not None:
-                            fragments[k].append(array[x])
-                        else:
-                            fragments[k].append(None)
-                        break
-                
-                if len(fragments[k]) < len(fragment_intensity):
-                    fragments[k].append(None)
-                  
-        result = copy.deepcopy(spectra[0])
-        result.update({
-            'fragments': fragments
-        })
-        return result
-    
-    
-    def remove_dissimilar_replicates(self, spectra):
-        similarity = self.similarity_scorer.pairwise_similarity(spectra)
-        
-        index = []
-        for i in range(len(spectra)):
-            score = np.median([
-                (similarity[i][j - i - 1] \
-                 if j > i \
-                 else similarity[j][i - j - 1])
-                for j in range(len(spectra))
-                if j != i
-            ])
-            if score > self.replicate_similarity_threshold:
-                index.append(i)
-        
-        return index
-    
-    
\ No newline at end of file
@@ -1,5 +1,6 @@
 import itertools
 import math
+import numpy as np
 
 
 def dot_product(x, y):
@@ -7,58 +8,113 @@ def dot_product(x, y):
     prod2 = sum(b * b for b in y)
     if prod1 == 0 or prod2 == 0:
         return 0
-    
+
     return sum(a * b for a, b in zip(x, y)) / math.sqrt(prod1 * prod2)
 
 
+def dot_product_matrix(intensity):
+    intensity = np.asarray(intensity, dtype=np.float64)
+    norm = np.sqrt(np.einsum('ij,ij->i', intensity, intensity))
+    nonzero = norm > 0
+    intensity = intensity / np.where(nonzero, norm, 1)[:, np.newaxis]
+    result = intensity @ intensity.T
+    result[~nonzero, :] = 0
+    result[:, ~nonzero] = 0
+    return result
+
+
+def aligned_fragment_matrix(spectra, ignore_none_annotation=True):
+    annotation = [spec['fragments']['fragmentAnnotation'] for spec in spectra]
+    lengths = np.fromiter(
+        (len(x) for x in annotation),
+        dtype=np.int64, count=len(annotation)
+    )
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    columns = {}
+    col = np.fromiter(
+        (
+            columns.setdefault(x, len(columns)) \
+                if x is not None or not ignore_none_annotation \
+                else -1
+            for x in itertools.chain.from_iterable(annotation)
+        ),
+        dtype=np.int64, count=offsets[-1]
+    )
+    intensity = np.fromiter(
+        itertools.chain.from_iterable(
+            spec['fragments']['fragmentIntensity'] for spec in spectra
+        ),
+        dtype=np.float64, count=offsets[-1]
+    )
+    row = np.repeat(np.arange(len(spectra)), lengths)
+    position = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+
+    keep = col >= 0
+    cell, first = np.unique(
+        row[keep] * len(columns) + col[keep],
+        return_index=True
+    )
+
+    shape = (len(spectra), len(columns))
+    result = {
+        'annotation': list(columns.keys()),
+        'index': np.full(shape, -1, dtype=np.int64),
+        'intensity': np.zeros(shape, dtype=np.float64)
+    }
+    result['index'].flat[cell] = position[keep][first]
+    result['intensity'].flat[cell] = intensity[keep][first]
+    return result
+
+
 def align_fragments_by_annotation(spectra, ignore_none_annotation=True):
-    fragment_annotation = set(itertools.chain.from_iterable(
-        spec['fragments']['fragmentAnnotation']
-        for spec in spectra
-    ))
-    if ignore_none_annotation:
-        fragment_annotation = filter(
-            lambda x: x is not None, 
-            fragment_annotation
-        )
-    
-    fragment_annotation = list(fragment_annotation)
-    
+    index = aligned_fragment_matrix(
+        spectra,
+        ignore_none_annotation=ignore_none_annotation
+    )['index']
+
     return [
-        [
-            next(
-                (i for i, x in \
-                 enumerate(spec['fragments']['fragmentAnnotation'])
-                 if x == annot), 
-                None
-            )
-            for spec in spectra
-        ]
-        for annot in fragment_annotation
+        [int(x) if x >= 0 else None for x in t]
+        for t in index.T.tolist()
     ]
-    
-    
+
+
 class SimilarityScorer:
-    def __init__(self, 
+    def __init__(self,
                  alignment_func=align_fragments_by_annotation,
                  similarity_func=dot_product):
         if alignment_func is None:
             alignment_func=align_fragments_by_annotation
         self.alignment_func = alignment_func
-        
+
         if similarity_func is None:
             similarity_func = dot_product
         self.similarity_func = similarity_func
-    
-    
+
+
     def align_fragments(self, spectra):
         return self.alignment_func(spectra)
-    
-    
-    def pairwise_similarity(self, spectra):
+
+
+    def fragment_index_matrix(self, spectra):
+        if self.alignment_func is align_fragments_by_annotation:
+            return aligned_fragment_matrix(spectra)['index']
+
+        index = self.align_fragments(spectra)
+
+        return np.array([
+            [x if x is not None else -1 for x in t]
+            for t in index
+        ], dtype=np.int64).reshape((len(index), len(spectra))).T
+
+
+    def intensity_matrix(self, spectra):
+        if self.alignment_func is align_fragments_by_annotation:
+            return aligned_fragment_matrix(spectra)['intensity']
+
         index = self.align_fragments(spectra)
-        
-        intensity = [
+
+        return np.array([
             [
                 (spectra[i]['fragments']['fragmentIntensity'][t[i]] \
                  if t[i] is not None \
@@ -66,18 +122,37 @@ class SimilarityScorer:
                 for t in index
             ]
             for i in range(len(spectra))
-        ]
-               
+        ], dtype=np.float64).reshape((len(spectra), len(index)))
+
+
+    def similarity_matrix(self, spectra):
+        return self.intensity_similarity_matrix(
+            self.intensity_matrix(spectra)
+        )
+
+
+    def intensity_similarity_matrix(self, intensity):
+        if self.similarity_func is dot_product:
+            return dot_product_matrix(intensity)
+
+        n = len(intensity)
+        result = np.ones((n, n), dtype=np.float64)
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                result[i, j] = result[j, i] = \
+                    self.similarity_func(intensity[i], intensity[j])
+        return result
+
+
+    def pairwise_similarity(self, spectra):
+        similarity = self.similarity_matrix(spectra)
+
         return [
-            [
-                self.similarity_func(intensity[i], intensity[j])
-                for j in range(i + 1, len(spectra))
-            ]
+            similarity[i, (i + 1):].tolist()
             for i in range(len(spectra) - 1)
         ]
-            
-    
+
+
     def similarity(self, spectrum1, spectrum2):
         return self.pairwise_similarity([spectrum1, spectrum2])[0][0]
-    
-    
\ No newline at end of file
+
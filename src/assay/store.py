@@ -0,0 +1,305 @@
+import json
+import numbers
+import numpy as np
+
+from util import NumpyEncoder, memmap_npz_member, save_pickle, load_pickle
+from .modseq import stringify_modification, parse_modification
+
+
+VALUE = 0
+NONE = 1
+ABSENT = 2
+
+
+class _Absent:
+    def __repr__(self):
+        return 'ABSENT'
+
+ABSENT_VALUE = _Absent()
+
+
+def is_assay_store_file(file):
+    return file.endswith('.npz')
+
+
+def encode_column(values, kind=None):
+    state = np.array([
+        VALUE if x is not None and x is not ABSENT_VALUE else \
+        (NONE if x is None else ABSENT)
+        for x in values
+    ], dtype=np.int8)
+    present = [x for x in values if x is not None and x is not ABSENT_VALUE]
+
+    if kind is None:
+        if all(isinstance(x, (bool, np.bool_)) for x in present):
+            kind = 'bool'
+        elif all(isinstance(x, numbers.Integral) and \
+                 not isinstance(x, (bool, np.bool_))
+                 for x in present):
+            kind = 'int'
+        elif all(isinstance(x, numbers.Real) and \
+                 not isinstance(x, (bool, np.bool_))
+                 for x in present):
+            kind = 'float'
+        elif all(isinstance(x, str) for x in present):
+            kind = 'str'
+        else:
+            kind = 'json'
+
+    if kind == 'bool':
+        fill, dtype = False, bool
+    elif kind == 'int':
+        fill, dtype = 0, np.int64
+    elif kind == 'float':
+        fill, dtype = np.nan, np.float64
+    else:
+        fill, dtype = '', str
+
+    def _encode(x):
+        if x is None or x is ABSENT_VALUE:
+            return fill
+        if kind == 'json':
+            return json.dumps(x, cls=NumpyEncoder)
+        if kind == 'modification':
+            return stringify_modification(x) or ''
+        return x
+
+    array = np.array([_encode(x) for x in values], dtype=dtype)
+    return array, (state if np.any(state != VALUE) else None), kind
+
+
+def decode_values(array, state, kind):
+    values = array.tolist()
+    if kind == 'json':
+        values = [json.loads(x) if x != '' else None for x in values]
+    elif kind == 'modification':
+        values = [parse_modification(x) for x in values]
+
+    if state is not None:
+        state = state.tolist()
+        values = [
+            x if s == VALUE else (None if s == NONE else ABSENT_VALUE)
+            for x, s in zip(values, state)
+        ]
+    return values
+
+
+def save_assay_store(assays, file):
+    precursor_columns = {}
+    fragment_columns = {}
+    fragment_count = []
+    n = 0
+
+    for assay in assays:
+        for k, v in assay.items():
+            if k == 'fragments':
+                continue
+            if k not in precursor_columns:
+                precursor_columns[k] = [ABSENT_VALUE] * n
+            precursor_columns[k].append(v)
+        for k, column in precursor_columns.items():
+            if len(column) == n:
+                column.append(ABSENT_VALUE)
+
+        fragments = assay.get('fragments', None) or {}
+        count = max((len(v) for v in fragments.values()), default=0)
+        if any(len(v) != count for v in fragments.values()):
+            raise ValueError(
+                'fragment columns not match: ' + \
+                str(assay.get('peptideSequence', None))
+            )
+        total = sum(fragment_count)
+        for k, v in fragments.items():
+            if k not in fragment_columns:
+                fragment_columns[k] = [ABSENT_VALUE] * total
+            fragment_columns[k].extend(v)
+        for k, column in fragment_columns.items():
+            if len(column) == total:
+                column.extend([ABSENT_VALUE] * count)
+
+        fragment_count.append(count)
+        n += 1
+
+    arrays = {
+        'offsets': np.concatenate(([0], np.cumsum(
+            np.array(fragment_count, dtype=np.int64)
+        )))
+    }
+    schema = {'precursor': {}, 'fragment': {}}
+
+    for group, columns in (
+        ('precursor', precursor_columns),
+        ('fragment', fragment_columns)
+    ):
+        for k, values in columns.items():
+            array, state, kind = encode_column(
+                values,
+                kind='modification' \
+                    if group == 'precursor' and k == 'modification' \
+                    else None
+            )
+            arrays[group + '.' + k] = array
+            if state is not None:
+                arrays[group + '.' + k + '.state'] = state
+            schema[group][k] = kind
+
+    arrays['schema'] = np.array(json.dumps(schema))
+
+    # store uncompressed so that columns can be memory-mapped
+    with open(file, 'wb') as f:
+        np.savez(f, **arrays)
+
+    return n
+
+
+class AssayStore:
+    def __init__(self, file, mmap_mode='r'):
+        self.file = file
+
+        with np.load(file, allow_pickle=False) as data:
+            self.schema = json.loads(str(data['schema']))
+            members = data.files
+
+            def _load(name):
+                if name not in members:
+                    return None
+                array = None
+                if mmap_mode is not None:
+                    array = memmap_npz_member(file, name, mode=mmap_mode)
+                if array is None:
+                    array = data[name]
+                return array
+
+            self.offsets = np.asarray(_load('offsets'))
+            self.precursors = {
+                k: (_load('precursor.' + k), _load('precursor.' + k + '.state'))
+                for k in self.schema['precursor'].keys()
+            }
+            self.fragments = {
+                k: (_load('fragment.' + k), _load('fragment.' + k + '.state'))
+                for k in self.schema['fragment'].keys()
+            }
+
+        self._index = None
+
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+    def __iter__(self):
+        return (self.assay(i) for i in range(len(self)))
+
+
+    def __getitem__(self, index):
+        return self.assay(index)
+
+
+    def precursor_values(self, name):
+        array, state = self.precursors[name]
+        return [
+            x if x is not ABSENT_VALUE else None
+            for x in decode_values(
+                array, state, self.schema['precursor'][name]
+            )
+        ]
+
+
+    def assay(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('assay index out of range: ' + str(index))
+
+        result = {}
+        for k, (array, state) in self.precursors.items():
+            value = decode_values(
+                array[index:index + 1],
+                state[index:index + 1] if state is not None else None,
+                self.schema['precursor'][k]
+            )[0]
+            if value is not ABSENT_VALUE:
+                result[k] = value
+
+        start = self.offsets[index]
+        end = self.offsets[index + 1]
+        fragments = {}
+        for k, (array, state) in self.fragments.items():
+            values = decode_values(
+                array[start:end],
+                state[start:end] if state is not None else None,
+                self.schema['fragment'][k]
+            )
+            if end > start and all(x is ABSENT_VALUE for x in values):
+                continue
+            fragments[k] = values
+        result['fragments'] = fragments
+
+        return result
+
+
+    def build_index(self):
+        def _key_values(name):
+            if name not in self.precursors:
+                return [None] * len(self)
+            array, state = self.precursors[name]
+            values = array.tolist()
+            if state is not None:
+                values = [
+                    x if s == VALUE else None
+                    for x, s in zip(values, state.tolist())
+                ]
+            return values
+
+        index = {}
+        for i, key in enumerate(zip(
+            _key_values('peptideSequence'),
+            _key_values('modification'),
+            _key_values('precursorCharge')
+        )):
+            index.setdefault(key, []).append(i)
+
+        self._index = index
+        return index
+
+
+    def find(self, sequence, modification=None, charge=None):
+        if self._index is None:
+            self.build_index()
+
+        if modification is not None and not isinstance(modification, str):
+            modification = stringify_modification(modification)
+        if charge is not None:
+            charge = int(charge)
+
+        return self._index.get((sequence, modification, charge), [])
+
+
+    def get(self, sequence, modification=None, charge=None):
+        return [
+            self.assay(i)
+            for i in self.find(
+                sequence, modification=modification, charge=charge
+            )
+        ]
+
+
+def load_assays(file, return_generator=False, mmap_mode='r'):
+    if is_assay_store_file(file):
+        result = AssayStore(file, mmap_mode=mmap_mode)
+    else:
+        result = load_pickle(file)
+
+    if return_generator:
+        result = iter(result)
+    return result
+
+
+def save_assays(assays, file):
+    if is_assay_store_file(file):
+        return save_assay_store(assays, file)
+
+    if not isinstance(assays, list):
+        assays = list(assays)
+    save_pickle(assays, file)
+    return len(assays)
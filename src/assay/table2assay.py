@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 
 from .modseq import parse_modification
 from .values import set_assay_values
@@ -36,19 +37,85 @@ class DataFrameToAssayConverter:
         return assay
 
 
-    def dataframe_to_assays(self, data, return_generator=False):
+    def assay_ids(self, data):
         key = data.columns.intersection([
             c.get('name')
             for c in self.columns
             if isinstance(c, dict) and c.get('key', False)
         ])
-        assay_id = data[key].ne(data[key].shift()).any(axis=1).cumsum()
-        groups = data.groupby(by=assay_id, sort=False, as_index=False)
+        return data[key].ne(data[key].shift()) \
+            .fillna(True).astype(bool).any(axis=1).cumsum()
+
+
+    def group_offsets(self, data):
+        assay_id = self.assay_ids(data).values
+        return np.concatenate((
+            np.flatnonzero(np.diff(assay_id, prepend=-1)),
+            [len(assay_id)]
+        ))
+
+
+    def dataframe_to_assays(self, data, return_generator=False):
+        offsets = self.group_offsets(data)
+        starts = offsets[:-1]
+
+        list_values = {}
+        first_values = {}
+        for col in self.columns:
+            if not isinstance(col, dict):
+                if col in data.columns:
+                    first_values[col] = data[col].iloc[starts].tolist()
+                continue
+
+            name = col.get('name')
+            if name in data.columns:
+                if col.get('list', False):
+                    list_values[name] = data[name].tolist()
+                else:
+                    first_values[name] = data[name].iloc[starts].tolist()
+
+        def _parse_groups():
+            for i, (start, end) in enumerate(zip(
+                starts.tolist(), offsets[1:].tolist()
+            )):
+                values = {k: v[i] for k, v in first_values.items()}
+                values.update(
+                    (k, v[start:end]) for k, v in list_values.items()
+                )
+
+                assay = {}
+                set_assay_values(assay, self.columns, **values)
+                yield assay
+
+        results = _parse_groups()
+        if not return_generator:
+            results = list(results)
+        return results
+
+
+    def dataframe_chunks_to_assays(self, chunks, return_generator=False):
+        def _chunks_to_assays():
+            rest = None
+            for data in chunks:
+                if rest is not None:
+                    data = pd.concat((rest, data), ignore_index=True)
+                if len(data) == 0:
+                    continue
+
+                assay_id = self.assay_ids(data).values
+                last = np.searchsorted(assay_id, assay_id[-1])
+                if last > 0:
+                    yield from self.dataframe_to_assays(
+                        data.iloc[:last], return_generator=True
+                    )
+                rest = data.iloc[last:]
+
+            if rest is not None and len(rest) > 0:
+                yield from self.dataframe_to_assays(
+                    rest, return_generator=True
+                )
 
-        results = (
-            self.parse_psm(group)
-            for i, group in groups
-        )
+        results = _chunks_to_assays()
         if not return_generator:
             results = list(results)
         return results
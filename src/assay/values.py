@@ -80,7 +80,15 @@ def set_assay_values(assay, params, func_args=None, **values):
     return assay
 
 
-def assign_assays_values(assays, keys, params, data):
+def _normalize_key(x):
+    if x is None or isinstance(x, float) and np.isnan(x):
+        return None
+    if isinstance(x, np.generic):
+        return x.item()
+    return x
+
+
+def assign_assays_values(assays, keys, params, data, return_missing=False):
     key_columns = []
     key_params = []
     for k in keys:
@@ -89,18 +97,30 @@ def assign_assays_values(assays, keys, params, data):
             key_columns.append(name)
             key_params.append(k)
 
-    data = data.set_index(key_columns)
+    value_columns = [c for c in data.columns if c not in key_columns]
+    values = {c: data[c].tolist() for c in value_columns}
 
-    for assay in assays:
-        assay_id = tuple(get_assay_values(assay, key_params).values())
+    index = {}
+    for i, key in enumerate(zip(*(data[c].tolist() for c in key_columns))):
+        index.setdefault(tuple(map(_normalize_key, key)), i)
 
-        values = data.loc[assay_id].to_dict()
-        for name, value in list(values.items()):
-            if isinstance(value, np.generic):
-                 values[name] = value.item()
+    missing = 0
+    for assay in assays:
+        assay_id = tuple(map(
+            _normalize_key,
+            get_assay_values(assay, key_params).values()
+        ))
+
+        i = index.get(assay_id, None)
+        if i is None:
+            missing += 1
+            continue
 
-        set_assay_values(assay, params, **values)
+        set_assay_values(
+            assay, params,
+            **{c: v[i] for c, v in values.items()}
+        )
 
+    if return_missing:
+        return assays, missing
     return assays
-
-
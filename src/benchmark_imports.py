@@ -0,0 +1,124 @@
+import argparse
+
+parser = argparse.ArgumentParser(
+    description='Benchmark the startup time of data-only entry points.'
+)
+parser.add_argument(
+    '--repeat', type=int, default=3,
+    help='number of runs per entry point, the fastest is reported (default: %(default)s)'
+)
+parser.add_argument(
+    '--max_seconds', type=float, default=1.0,
+    help='fail if an entry point takes longer than this (default: %(default)s)'
+)
+parser.add_argument(
+    '--entry_points', nargs='+',
+    help='entry points to run (default: all)'
+)
+parser.add_argument(
+    '--out',
+    help='output JSON file (default: print to stdout)'
+)
+
+args = parser.parse_args()
+repeat = args.repeat
+max_seconds = args.max_seconds
+selected_entry_points = args.entry_points
+out_file = args.out
+
+# %%
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(filename)s: [%(levelname)s] %(message)s'
+)
+
+# %%
+entry_points = {
+    'python': [],
+    'digest_proteins': ['sequence.fasta', 'sequence.digest'],
+    'filter_assays': ['assay', 'assay.store'],
+    'build_assays_from_prediction': [
+        'util', 'formatting.generic', 'assay.values', 'assay.store'
+    ],
+    'convert_assays_to_Spectronaut_library': [
+        'assay.store', 'assay.assay2table', 'formatting.spectronaut'
+    ],
+    'extract_from_SpectroMine': [
+        'formatting.generic', 'formatting.generic.report',
+        'formatting.spectronaut', 'assay.table2assay'
+    ],
+    'remove_redundant_assays': ['assay.store', 'assay.consensus'],
+    'prediction_client': [
+        'common.serving', 'pepms2', 'peprt', 'pepim', 'pepdetect'
+    ]
+}
+
+if globals().get('selected_entry_points', None) is not None:
+    entry_points = {
+        k: v for k, v in entry_points.items()
+        if k in selected_entry_points
+    }
+
+# %%
+import json
+import os
+import subprocess
+import sys
+import time
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+
+probe = \
+    'import sys\n' + \
+    'for m in sys.argv[1:]:\n' + \
+    '    __import__(m)\n' + \
+    'print(int(any(m in sys.modules for m in ("tensorflow", "keras"))))\n'
+
+
+def run_entry_point(modules):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', probe] + modules,
+        cwd=src_dir, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    ).stdout
+    seconds = time.perf_counter() - start
+    return seconds, bool(int(output.strip() or 0))
+
+
+# %%
+result = {}
+failed = []
+
+for name, modules in entry_points.items():
+    runs = [run_entry_point(modules) for _ in range(max(repeat, 1))]
+    seconds = min(x[0] for x in runs)
+    tensorflow_loaded = any(x[1] for x in runs)
+
+    result[name] = {
+        'modules': modules,
+        'seconds': seconds,
+        'tensorflow_loaded': tensorflow_loaded
+    }
+
+    logging.info('{0}: {1:.3f} s{2}'.format(
+        name, seconds,
+        ', TensorFlow loaded' if tensorflow_loaded else ''
+    ))
+
+    if seconds > max_seconds or tensorflow_loaded:
+        failed.append(name)
+
+# %%
+if globals().get('out_file', None) is not None:
+    with open(out_file, 'w') as f:
+        json.dump(result, f, indent=2)
+    logging.info('benchmark saved: ' + out_file)
+else:
+    print(json.dumps(result, indent=2))
+
+if failed:
+    logging.error('slow entry points: ' + '; '.join(failed))
+    sys.exit(1)
@@ -0,0 +1,503 @@
+import argparse
+
+parser = argparse.ArgumentParser(
+    description='Benchmark the stages of spectral library generation.'
+)
+parser.add_argument(
+    '--peptide',
+    help='input peptide list file (default: data/peptides/Pan_human.peptide.csv)'
+)
+parser.add_argument(
+    '--ms2_model',
+    help='MS2 model file (default: data/models/charge2/epoch_035.hdf5)'
+)
+parser.add_argument(
+    '--rt_model',
+    help='iRT model file, an untrained model is timed if not set'
+)
+parser.add_argument(
+    '--detectability_model',
+    help='detectability model file, an untrained model is timed if not set'
+)
+parser.add_argument(
+    '--peptide_number', type=int, default=5000,
+    help='number of peptides used in each stage (default: %(default)s)'
+)
+parser.add_argument(
+    '--protein_number', type=int, default=2000,
+    help='number of proteins in the synthetic FASTA (default: %(default)s)'
+)
+parser.add_argument(
+    '--replicate_number', type=int, default=3,
+    help='number of replicates per assay for consensus combining (default: %(default)s)'
+)
+parser.add_argument(
+    '--stages', nargs='+',
+    help='stages to run (default: all)'
+)
+parser.add_argument(
+    '--seed', type=int, default=0,
+    help='random seed (default: %(default)s)'
+)
+parser.add_argument(
+    '--out',
+    help='output JSON file (default: print to stdout)'
+)
+
+args = parser.parse_args()
+peptide_file = args.peptide
+ms2_model_file = args.ms2_model
+rt_model_file = args.rt_model
+detectability_model_file = args.detectability_model
+peptide_number = args.peptide_number
+protein_number = args.protein_number
+replicate_number = args.replicate_number
+stages = args.stages
+seed = args.seed
+out_file = args.out
+
+# %%
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(filename)s: [%(levelname)s] %(message)s'
+)
+
+# %%
+import os
+
+data_dir = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data'
+)
+
+if globals().get('peptide_file', None) is None:
+    peptide_file = os.path.join(data_dir, 'peptides', 'Pan_human.peptide.csv')
+
+if globals().get('ms2_model_file', None) is None:
+    ms2_model_file = os.path.join(
+        data_dir, 'models', 'charge2', 'epoch_035.hdf5'
+    )
+
+all_stages = [
+    'digest', 'encode', 'ms2', 'irt', 'detectability',
+    'ions_to_assays', 'assign_values', 'filter_assays',
+    'consensus', 'spectronaut_export'
+]
+
+if globals().get('stages', None) is None:
+    stages = all_stages
+
+for stage in stages:
+    if stage not in all_stages:
+        raise ValueError('invalid stage: ' + str(stage))
+
+# %%
+import resource
+import sys
+import tempfile
+import time
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return rss / 1024 / 1024
+    return rss / 1024
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return None
+
+
+work_dir = tempfile.mkdtemp(prefix='deepdia_benchmark_')
+results = {}
+inputs = {}
+
+def run_stage(name, func):
+    logging.info('running stage: ' + name)
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    items, extra = func()
+    seconds = time.perf_counter() - start
+    rss_after = current_rss_mb()
+
+    result = {
+        'items': items,
+        'seconds': seconds,
+        'items_per_second': items / seconds if seconds > 0 else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_delta_mb': rss_after - rss_before \
+            if rss_before is not None and rss_after is not None else None
+    }
+    result.update(extra)
+    results[name] = result
+
+    logging.info('stage finished: {0}, {1} items, {2:.3f} s, {3:.1f} items/s' \
+        .format(name, items, seconds, result['items_per_second'] or 0))
+
+
+def get_input(name):
+    if name not in inputs:
+        inputs[name] = input_builders[name]()
+    return inputs[name]
+
+# %%
+import random
+import numpy as np
+import pandas as pd
+
+def build_fasta():
+    rng = random.Random(seed)
+    amino_acids = 'ACDEFGHIKLMNPQRSTVWY'
+    weights = [
+        8.3, 1.4, 5.5, 6.7, 3.9, 7.1, 2.3, 5.9, 5.8, 9.7,
+        2.4, 4.1, 4.7, 3.9, 5.3, 6.6, 5.4, 6.9, 1.1, 2.9
+    ]
+
+    file = os.path.join(work_dir, 'benchmark.fasta')
+    with open(file, 'w') as f:
+        for i in range(protein_number):
+            sequence = 'M' + ''.join(rng.choices(
+                amino_acids, weights, k=rng.randint(100, 900)
+            ))
+            f.write(
+                '>sp|B{0:05d}|BENCH{0}_HUMAN Benchmark protein {0} ' \
+                'OS=Homo sapiens OX=9606 GN=BENCH{0} PE=1 SV=1\n' \
+                .format(i)
+            )
+            for j in range(0, len(sequence), 60):
+                f.write(sequence[j:(j + 60)] + '\n')
+    return file
+
+
+def build_peptides():
+    from pepms2 import PeptideMS2Options
+    options = PeptideMS2Options.default()
+
+    peptides = pd.read_csv(peptide_file)
+    peptides = peptides.loc[
+        (peptides['sequence'].str.len() <= options.max_sequence_length) & \
+        peptides['sequence'].map(lambda s: \
+            all(map(lambda a: a in options.amino_acids, s)))
+    ]
+    if len(peptides) > peptide_number:
+        peptides = peptides.sample(n=peptide_number, random_state=seed)
+    return peptides.reset_index(drop=True)
+
+
+def build_digested_peptides():
+    from sequence.fasta import read_fasta
+    from sequence.digest import digest
+
+    peptides = digest(
+        read_fasta(get_input('fasta'), parsing_rule='UniProt'),
+        protease='Trypsin/P', max_missed_cleavages=1,
+        term_window_size=7
+    )
+    if len(peptides) > peptide_number:
+        peptides = peptides.sample(n=peptide_number, random_state=seed)
+    return peptides.reset_index(drop=True)
+
+
+def build_ms2_predictor():
+    from pepms2 import PeptideMS2Predictor
+    return PeptideMS2Predictor(model_path=ms2_model_file)
+
+
+def build_rt_predictor():
+    from peprt import PeptideRTPredictor
+    from peprt.modeling import build_model
+
+    predictor = PeptideRTPredictor(model_path=rt_model_file)
+    if rt_model_file is None:
+        predictor.model = build_model(predictor.options)
+    return predictor
+
+
+def build_detectability_predictor():
+    from pepdetect import PeptideDetectabilityPredictor
+    from pepdetect.modeling import build_model
+
+    predictor = PeptideDetectabilityPredictor(
+        model_path=detectability_model_file
+    )
+    if detectability_model_file is None:
+        predictor.model = build_model(predictor.options)
+    return predictor
+
+
+def build_ions():
+    peptides = get_input('peptides')
+    ions = get_input('ms2_predictor').predict(
+        peptides['sequence'], peptides.get('modification', None)
+    )
+    for entry in ions:
+        entry['charge'] = 2
+    return ions
+
+
+def build_irt():
+    peptides = get_input('peptides')
+    return get_input('rt_predictor').predict(
+        peptides['sequence'], peptides.get('modification', None)
+    )
+
+
+def build_assays():
+    from formatting.generic import IonsToAssayConverter
+    return IonsToAssayConverter().ions_to_assays(get_input('ions'))
+
+
+def build_replicates():
+    rng = np.random.RandomState(seed)
+    replicates = []
+    for assay in get_input('assays'):
+        for i in range(replicate_number):
+            replicate = {
+                k: v for k, v in assay.items()
+                if k != 'fragments'
+            }
+            fragments = dict(assay['fragments'])
+            intensity = np.asarray(fragments['fragmentIntensity'])
+            fragments['fragmentIntensity'] = (
+                intensity * rng.uniform(0.8, 1.2, size=len(intensity))
+            ).tolist()
+            replicate['fragments'] = fragments
+            replicates.append(replicate)
+    return replicates
+
+
+input_builders = {
+    'fasta': build_fasta,
+    'peptides': build_peptides,
+    'digested_peptides': build_digested_peptides,
+    'ms2_predictor': build_ms2_predictor,
+    'rt_predictor': build_rt_predictor,
+    'detectability_predictor': build_detectability_predictor,
+    'ions': build_ions,
+    'irt': build_irt,
+    'assays': build_assays,
+    'replicates': build_replicates
+}
+
+# %%
+def stage_digest():
+    from sequence.fasta import read_fasta
+    from sequence.digest import digest, filter_peptides_by_mass, \
+        group_duplicated_peptides
+
+    proteins = read_fasta(get_input('fasta'), parsing_rule='UniProt')
+    peptides = digest(
+        proteins,
+        protease='Trypsin/P', max_missed_cleavages=2,
+        term_window_size=7
+    )
+    peptides = filter_peptides_by_mass(peptides, max_peptide_mass=4000)
+    peptides = group_duplicated_peptides(peptides)
+    return len(proteins), {'peptides': len(peptides)}
+
+
+def stage_encode():
+    from pepms2 import PeptideMS2Options
+    from pepms2.preprocessing import PeptideMS2DataConverter
+
+    peptides = get_input('peptides')
+    converter = PeptideMS2DataConverter(PeptideMS2Options.default())
+    converter.peptides_to_tensor(
+        peptides['sequence'], peptides.get('modification', None)
+    )
+    return len(peptides), {}
+
+
+def stage_ms2():
+    peptides = get_input('peptides')
+    predictor = get_input('ms2_predictor')
+    predictor.predict(
+        peptides['sequence'], peptides.get('modification', None)
+    )
+    return len(peptides), {'model': ms2_model_file}
+
+
+def stage_irt():
+    peptides = get_input('peptides')
+    predictor = get_input('rt_predictor')
+    predictor.predict(
+        peptides['sequence'], peptides.get('modification', None)
+    )
+    return len(peptides), {'model': rt_model_file or 'untrained'}
+
+
+def stage_detectability():
+    peptides = get_input('digested_peptides')
+    predictor = get_input('detectability_predictor')
+    predictor.predict(peptides)
+    return len(peptides), \
+        {'model': detectability_model_file or 'untrained'}
+
+
+def stage_ions_to_assays():
+    from formatting.generic import IonsToAssayConverter
+
+    ions = get_input('ions')
+    assays = IonsToAssayConverter().ions_to_assays(ions)
+    return len(ions), {'fragments': sum(
+        len(assay['fragments']['fragmentMZ']) for assay in assays
+    )}
+
+
+def stage_assign_values():
+    from formatting.generic.mod import stringify_modification
+    from assay.values import assign_assays_values
+
+    assays = get_input('assays')
+    peptides = get_input('peptides')
+    irt = get_input('irt')
+
+    if 'protein' in peptides.columns:
+        assign_assays_values(
+            assays,
+            data=peptides[['sequence', 'protein']] \
+                .drop_duplicates(subset=['sequence']),
+            keys=[{'name': 'sequence', 'path': 'peptideSequence'}],
+            params=[{'name': 'protein', 'path': ['metadata', 'protein']}]
+        )
+    assign_assays_values(
+        assays,
+        data=irt.drop_duplicates(subset=['sequence', 'modification']),
+        keys=[
+            {'name': 'sequence', 'path': 'peptideSequence'},
+            {'name': 'modification', 'path': 'modification',
+             'convert': stringify_modification}
+        ],
+        params=['rt', {'name': 'irt', 'path': 'iRT'}]
+    )
+    return len(assays), {}
+
+
+def stage_filter_assays():
+    from assay import AssayBuilder
+
+    assays = get_input('assays')
+    filtered = AssayBuilder().filter_assays(
+        assays,
+        min_fragment_number=6,
+        precursor_charge=[2, 3],
+        min_peptide_length=7,
+        max_peptide_length=50,
+        fragment_type=['b', 'y'],
+        fragment_charge=[1, 2],
+        fragment_loss_type=['noloss', 'NH3', 'H2O'],
+        min_fragment_mz=200,
+        max_fragment_mz=2000,
+        min_relative_fragment_intensity=0.05,
+        max_fragment_number=20
+    )
+    return len(assays), {'remaining': len(filtered)}
+
+
+def stage_consensus():
+    from assay.consensus import ConsensusAssayCombiner
+
+    replicates = get_input('replicates')
+    assays = ConsensusAssayCombiner().remove_redundant(replicates)
+    return len(replicates), {'consensus': len(assays)}
+
+
+def stage_spectronaut_export():
+    from assay.assay2table import AssayToDataFrameConverter
+    from formatting.spectronaut import Spectronaut_assay_library_columns
+
+    assays = get_input('assays')
+    converter = AssayToDataFrameConverter(
+        columns=Spectronaut_assay_library_columns()
+    )
+    data = converter.assays_to_dataframe(assays)
+    data.to_csv(
+        os.path.join(work_dir, 'benchmark.library.xls'),
+        index=False, sep='\t'
+    )
+    return len(assays), {'transitions': len(data)}
+
+
+stage_functions = {
+    'digest': stage_digest,
+    'encode': stage_encode,
+    'ms2': stage_ms2,
+    'irt': stage_irt,
+    'detectability': stage_detectability,
+    'ions_to_assays': stage_ions_to_assays,
+    'assign_values': stage_assign_values,
+    'filter_assays': stage_filter_assays,
+    'consensus': stage_consensus,
+    'spectronaut_export': stage_spectronaut_export
+}
+
+stage_inputs = {
+    'digest': ['fasta'],
+    'encode': ['peptides'],
+    'ms2': ['peptides', 'ms2_predictor'],
+    'irt': ['peptides', 'rt_predictor'],
+    'detectability': ['digested_peptides', 'detectability_predictor'],
+    'ions_to_assays': ['ions'],
+    'assign_values': ['assays', 'peptides', 'irt'],
+    'filter_assays': ['assays'],
+    'consensus': ['replicates'],
+    'spectronaut_export': ['assays']
+}
+
+# %%
+for stage in stages:
+    # inputs are prepared outside of the timed section
+    for name in stage_inputs[stage]:
+        get_input(name)
+    run_stage(stage, stage_functions[stage])
+
+# %%
+import json
+import platform
+import shutil
+import subprocess
+
+def get_version():
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+report = {
+    'version': get_version(),
+    'python': platform.python_version(),
+    'numpy': np.__version__,
+    'pandas': pd.__version__,
+    'platform': platform.platform(),
+    'cpu_count': os.cpu_count(),
+    'parameters': {
+        'peptide': peptide_file,
+        'peptide_number': peptide_number,
+        'protein_number': protein_number,
+        'replicate_number': replicate_number,
+        'seed': seed
+    },
+    'stages': results
+}
+
+shutil.rmtree(work_dir, ignore_errors=True)
+
+if globals().get('out_file', None) is not None:
+    with open(out_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info('benchmark saved: ' + out_file)
+else:
+    print(json.dumps(report, indent=2))
@@ -52,7 +52,7 @@ if globals().get('peptide_files', None) is None:
 if globals().get('ions_files', None) is None:
     ions_files = list_files(
         path='.',
-        pattern='prediction\\.ions\\.json$',
+        pattern='prediction\\.ions\\.(json|npz)$',
         recursive=True
     )
 
@@ -114,13 +114,13 @@ else:
     peptides = None
 
 # %%
-from util import load_json
+from util import load_ions
 
 ions = []
 for ions_file in ions_files:
     logging.info('load ions: ' + ions_file)
 
-    ions_ = load_json(ions_file)
+    ions_ = load_ions(ions_file)
 
     ions.extend(ions_)
     logging.info('ions loaded: {0}, {1} entries' \
@@ -182,29 +182,44 @@ assays = converter.ions_to_assays(ions=ions)
 logging.info('assays converted: {0} spectra' \
              .format(len(assays)))
 
+mass_cache_stats = converter.assay_builder.mass_cache_stats()
+if mass_cache_stats is not None and \
+    mass_cache_stats['hits'] + mass_cache_stats['misses'] > 0:
+    logging.info('mass cache: {hits} hits, {misses} misses ' \
+        '({hit_rate:.1%} hit rate), {size} entries' \
+        .format(**mass_cache_stats))
+
 if peptides is not None:
     logging.info('assigning peptide info')
-    assign_assays_values(
+    _, missing = assign_assays_values(
         assays, data=peptides,
         keys=[{'name': 'sequence', 'path': 'peptideSequence'}],
-        params=[{'name': 'protein', 'path': ['metadata', 'protein']}]
+        params=[{'name': 'protein', 'path': ['metadata', 'protein']}],
+        return_missing=True
     )
+    if missing > 0:
+        logging.warning('peptide info not found: {0} spectra' \
+                        .format(missing))
 
 if rt is not None:
     logging.info('assigning peptide retention time/iRT')
-    assign_assays_values(
+    _, missing = assign_assays_values(
         assays, data=rt,
         keys=[
             {'name': 'sequence', 'path': 'peptideSequence'}, 
             {'name': 'modification', 'path': 'modification',
              'convert': stringify_modification}
         ],
-        params=['rt', {'name': 'irt', 'path': 'iRT'}]
+        params=['rt', {'name': 'irt', 'path': 'iRT'}],
+        return_missing=True
     )
+    if missing > 0:
+        logging.warning('retention time/iRT not found: {0} spectra' \
+                        .format(missing))
 
 if im is not None:
     logging.info('assigning peptide ion mobility')
-    assign_assays_values(
+    _, missing = assign_assays_values(
         assays, data=im,
         keys=[
             {'name': 'sequence', 'path': 'peptideSequence'}, 
@@ -212,16 +227,20 @@ if im is not None:
              'convert': stringify_modification},
             {'name': 'charge', 'path': 'precursorCharge'},
         ],
-        params=['ionMobility']
+        params=['ionMobility'],
+        return_missing=True
     ) 
+    if missing > 0:
+        logging.warning('ion mobility not found: {0} spectra' \
+                        .format(missing))
 
 # %%
-from util import save_pickle
+from assay.store import save_assays
 
 logging.info('saving assays: {0}' \
     .format(out_file))
 
-save_pickle(assays, out_file)
+save_assays(assays, out_file)
 
 logging.info('assays saved: {0}, {1} spectra' \
     .format(out_file, len(assays)))
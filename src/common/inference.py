@@ -0,0 +1,376 @@
+import collections
+import copy
+import numpy as np
+
+
+def _relu(x):
+    return np.maximum(x, 0)
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0, 1)
+
+
+def _linear(x):
+    return x
+
+
+activations = {
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'tanh': np.tanh,
+    'linear': _linear,
+    None: _linear
+}
+
+
+Padding = collections.namedtuple('Padding', ['value', 'steps', 'masked'])
+
+
+def _check_padding(layer, padding, constant=True, supported=True):
+    if padding is None or padding.steps == 0:
+        return False
+    if not supported or (constant and padding.value is None):
+        raise ValueError(
+            '{0} does not support truncated input' \
+            .format(type(layer).__name__)
+        )
+    return True
+
+
+class Layer:
+    weight_count = 0
+
+    def set_weights(self, weights):
+        if len(weights) != self.weight_count:
+            raise ValueError(
+                '{0} expects {1} weights, got {2}' \
+                .format(type(self).__name__, self.weight_count, len(weights))
+            )
+
+
+    def forward(self, x, mask=None, padding=None):
+        return x, mask, padding
+
+
+class Conv1D(Layer):
+    weight_count = 2
+
+    def __init__(self, kernel_size, activation='relu'):
+        self.kernel_size = kernel_size
+        self.activation = activations[activation]
+
+
+    def set_weights(self, weights):
+        super().set_weights(weights)
+        self.kernel, self.bias = weights
+
+
+    def forward(self, x, mask=None, padding=None):
+        if _check_padding(self, padding):
+            n = min(self.kernel_size - 1, padding.steps)
+            x = np.concatenate([
+                x,
+                np.broadcast_to(padding.value, (x.shape[0], n, x.shape[2]))
+            ], axis=1)
+            padding = Padding(
+                self.activation(
+                    padding.value @ self.kernel.sum(axis=0) + self.bias
+                ),
+                padding.steps - n, False
+            )
+
+        length = x.shape[1] - self.kernel_size + 1
+        y = self.bias + sum(
+            x[:, i:i + length, :] @ self.kernel[i]
+            for i in range(self.kernel_size)
+        )
+        return self.activation(y), None, padding
+
+
+class Masking(Layer):
+    def __init__(self, mask_value=0.):
+        self.mask_value = mask_value
+
+
+    def forward(self, x, mask=None, padding=None):
+        mask = np.any(x != self.mask_value, axis=-1)
+        if _check_padding(self, padding):
+            masked = not np.any(padding.value != self.mask_value)
+            padding = Padding(
+                padding.value * (not masked), padding.steps, masked
+            )
+        return x * mask[..., np.newaxis], mask, padding
+
+
+class MaxPooling1D(Layer):
+    def __init__(self, pool_size=2, strides=None):
+        self.pool_size = pool_size
+        self.strides = strides or pool_size
+
+
+    def forward(self, x, mask=None, padding=None):
+        _check_padding(self, padding, supported=False)
+
+        length = (x.shape[1] - self.pool_size) // self.strides + 1
+        end = (length - 1) * self.strides + 1
+        y = x[:, 0:end:self.strides, :]
+        for i in range(1, self.pool_size):
+            y = np.maximum(y, x[:, i:i + end:self.strides, :])
+        return y, None, None
+
+
+class Flatten(Layer):
+    def forward(self, x, mask=None, padding=None):
+        _check_padding(self, padding, supported=False)
+
+        return x.reshape((x.shape[0], -1)), None, None
+
+
+class Dropout(Layer):
+    pass
+
+
+class Dense(Layer):
+    weight_count = 2
+
+    def __init__(self, activation='relu'):
+        self.activation = activations[activation]
+
+
+    def set_weights(self, weights):
+        super().set_weights(weights)
+        self.kernel, self.bias = weights
+
+
+    def forward(self, x, mask=None, padding=None):
+        if _check_padding(self, padding, constant=False) and \
+            padding.value is not None:
+            padding = padding._replace(
+                value=self.activation(padding.value @ self.kernel + self.bias)
+            )
+        return self.activation(x @ self.kernel + self.bias), mask, padding
+
+
+class TimeDistributed(Layer):
+    def __init__(self, layer):
+        self.layer = layer
+        self.weight_count = layer.weight_count
+
+
+    def set_weights(self, weights):
+        self.layer.set_weights(weights)
+
+
+    def forward(self, x, mask=None, padding=None):
+        return self.layer.forward(x, mask, padding)
+
+
+class LSTM(Layer):
+    weight_count = 3
+
+    def __init__(self, units, return_sequences=False,
+                 activation='tanh', recurrent_activation='sigmoid',
+                 go_backwards=False):
+        self.units = units
+        self.return_sequences = return_sequences
+        self.activation = activations[activation]
+        self.recurrent_activation = activations[recurrent_activation]
+        self.go_backwards = go_backwards
+
+
+    def set_weights(self, weights):
+        super().set_weights(weights)
+        self.kernel, self.recurrent_kernel, self.bias = weights
+
+
+    def step(self, z, h, c):
+        units = self.units
+        z = z + h @ self.recurrent_kernel
+        i = self.recurrent_activation(z[:, :units])
+        f = self.recurrent_activation(z[:, units:2 * units])
+        o = self.recurrent_activation(z[:, 3 * units:])
+        c = f * c + i * self.activation(z[:, 2 * units:3 * units])
+        h = o * self.activation(c)
+        return h, c
+
+
+    def initial_state(self, batch_size, padding=None, dtype=np.float32):
+        h = np.zeros((1, self.units), dtype=dtype)
+        c = np.zeros((1, self.units), dtype=dtype)
+
+        if _check_padding(self, padding, constant=False) and \
+            not padding.masked:
+            if self.go_backwards:
+                _check_padding(self, padding)
+                z = (padding.value @ self.kernel + self.bias)[np.newaxis, :]
+                for _ in range(padding.steps):
+                    h, c = self.step(z, h, c)
+            elif not self.return_sequences:
+                _check_padding(self, padding, supported=False)
+
+        return np.repeat(h, batch_size, axis=0), \
+            np.repeat(c, batch_size, axis=0)
+
+
+    def forward(self, x, mask=None, padding=None):
+        batch_size, length = x.shape[0], x.shape[1]
+
+        z = x @ self.kernel + self.bias
+        h, c = self.initial_state(batch_size, padding, dtype=z.dtype)
+        if self.return_sequences:
+            y = np.zeros((batch_size, length, self.units), dtype=z.dtype)
+
+        steps = range(length - 1, -1, -1) if self.go_backwards \
+            else range(length)
+        for t in steps:
+            h_, c_ = self.step(z[:, t, :], h, c)
+
+            if mask is not None:
+                m = mask[:, t, np.newaxis]
+                c = np.where(m, c_, c)
+                h = np.where(m, h_, h)
+                if self.return_sequences:
+                    y[:, t, :] = np.where(m, h_, 0)
+            else:
+                c, h = c_, h_
+                if self.return_sequences:
+                    y[:, t, :] = h
+
+        if not self.return_sequences:
+            return h, None, None
+        if padding is not None:
+            padding = padding._replace(value=None)
+        return y, mask, padding
+
+
+class Bidirectional(Layer):
+    def __init__(self, layer):
+        self.forward_layer = layer
+        self.backward_layer = copy.copy(layer)
+        self.backward_layer.go_backwards = not layer.go_backwards
+        self.weight_count = layer.weight_count * 2
+
+
+    def set_weights(self, weights):
+        n = self.forward_layer.weight_count
+        self.forward_layer.set_weights(weights[:n])
+        self.backward_layer.set_weights(weights[n:])
+
+
+    def forward(self, x, mask=None, padding=None):
+        y_forward, mask_out, padding_out = \
+            self.forward_layer.forward(x, mask, padding)
+        y_backward, _, _ = self.backward_layer.forward(x, mask, padding)
+        return np.concatenate([y_forward, y_backward], axis=-1), \
+            mask_out, padding_out
+
+
+def read_hdf5_weights(file):
+    import h5py
+
+    with h5py.File(file, 'r') as f:
+        group = f['model_weights'] if 'model_weights' in f else f
+
+        def decode(names):
+            return [
+                x.decode('utf-8') if isinstance(x, bytes) else str(x)
+                for x in names
+            ]
+
+        result = []
+        for layer_name in decode(group.attrs['layer_names']):
+            layer_group = group[layer_name]
+            result.append((layer_name, [
+                np.asarray(layer_group[name])
+                for name in decode(layer_group.attrs['weight_names'])
+            ]))
+        return result
+
+
+def read_npz_weights(file):
+    with np.load(file) as data:
+        layer_names = [str(x) for x in data['layer_names']]
+        weight_counts = data['weight_counts']
+        return [
+            (layer_name, [
+                data['layer{0}_weight{1}'.format(i, j)]
+                for j in range(weight_counts[i])
+            ])
+            for i, layer_name in enumerate(layer_names)
+        ]
+
+
+def read_weights(file):
+    if file.endswith('.npz'):
+        return read_npz_weights(file)
+    else:
+        return read_hdf5_weights(file)
+
+
+def export_weights(weights, file):
+    if isinstance(weights, str):
+        weights = read_weights(weights)
+
+    arrays = {
+        'layer_names': np.array([x[0] for x in weights]),
+        'weight_counts': np.array([len(x[1]) for x in weights])
+    }
+    for i, (_, layer_weights) in enumerate(weights):
+        for j, w in enumerate(layer_weights):
+            arrays['layer{0}_weight{1}'.format(i, j)] = w
+    np.savez(file, **arrays)
+
+
+class NumpyModel:
+    def __init__(self, layers, dtype=np.float32):
+        self.layers = layers
+        self.dtype = dtype
+
+
+    def load_weights(self, file):
+        weights = [w for w in read_weights(file) if len(w[1]) > 0]
+        layers = [l for l in self.layers if l.weight_count > 0]
+        if len(weights) != len(layers):
+            raise ValueError(
+                'model has {0} layers with weights, file has {1}: {2}' \
+                .format(len(layers), len(weights), file)
+            )
+        for layer, (_, layer_weights) in zip(layers, weights):
+            layer.set_weights([
+                np.asarray(w, dtype=self.dtype) for w in layer_weights
+            ])
+
+
+    def predict(self, x, batch_size=1024, length=None, **kwargs):
+        x = np.asarray(x, dtype=self.dtype)
+
+        padding = None
+        if length is not None and length > x.shape[1]:
+            padding = Padding(
+                np.zeros(x.shape[2], dtype=self.dtype),
+                length - x.shape[1], False
+            )
+
+        result = []
+        for start in range(0, max(len(x), 1), batch_size):
+            y, mask, padding_out = x[start:start + batch_size], None, padding
+            for layer in self.layers:
+                y, mask, padding_out = layer.forward(y, mask, padding_out)
+            result.append(y)
+        y = np.concatenate(result)
+
+        if padding_out is not None and padding_out.steps > 0:
+            y = np.concatenate([
+                y,
+                np.zeros(
+                    (y.shape[0], padding_out.steps) + y.shape[2:],
+                    dtype=y.dtype
+                )
+            ], axis=1)
+        return y
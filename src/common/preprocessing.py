@@ -1,10 +1,36 @@
 import re
 import numpy as np
 
-try:
-    from keras.utils import pad_sequences
-except ImportError:
-    from keras.preprocessing.sequence import pad_sequences
+
+def parse_modification_sites(modification):
+    if modification is None or modification == '' or \
+        str(modification) == 'nan':
+        return []
+
+    result = []
+    for mod in modification.split(';'):
+        mat = re.search('[A-Z]([0-9]+)\\((.*)\\)', mod)
+        if mat is not None:
+            pos = int(mat.group(1)) - 1
+            name = mat.group(2)
+            result.append((pos, name))
+        #else:
+        #    raise ValueError(modification)
+    return result
+
+
+def unique_rows(x):
+    x = np.ascontiguousarray(x)
+    if len(x) == 0:
+        return x, np.zeros(0, dtype=np.int64)
+
+    keys = x.reshape((len(x), -1)).view(
+        np.dtype((np.void, x.dtype.itemsize * (x.size // len(x))))
+    ).ravel()
+    _, index, inverse = np.unique(
+        keys, return_index=True, return_inverse=True
+    )
+    return x[index], inverse.ravel()
 
 
 class PeptideDataConverter:
@@ -41,18 +67,9 @@ class PeptideDataConverter:
 
     def peptide_to_array(self, sequence, modification=None):
         sequence = sequence.upper()
-        if modification == None or modification == '' or str(modification) == 'nan':
-            return [self.amino_acid_to_vector(aa) for aa in sequence]
-
         mod_list = [None] * len(sequence)
-        for mod in modification.split(';'):
-            mat = re.search('[A-Z]([0-9]+)\\((.*)\\)', mod)
-            if mat is not None:
-                pos = int(mat.group(1)) - 1
-                name = mat.group(2)
-                mod_list[pos] = name
-            #else:
-            #    raise ValueError(modification)
+        for pos, name in parse_modification_sites(modification):
+            mod_list[pos] = name
 
         return [
             self.amino_acid_to_vector(aa, mod)
@@ -60,15 +77,80 @@ class PeptideDataConverter:
         ]
 
 
+    def amino_acid_codes(self):
+        aa_codes = np.zeros(256, dtype=np.int32)
+        for i, aa in enumerate(self.options.amino_acids):
+            aa_codes[ord(aa)] = i + 1
+
+        mod_codes = {}
+        code = len(self.options.amino_acids)
+        for aa, mods in self.options.modifications.items():
+            for m in mods:
+                code += 1
+                mod_codes.setdefault((aa, m), code)
+
+        return aa_codes, mod_codes
+
+
+    def peptides_to_indices(self, sequences, modifications=None):
+        maxlen = self.options.max_sequence_length
+        aa_codes, mod_codes = self.amino_acid_codes()
+
+        sequences = [str(seq).upper() for seq in sequences]
+        lengths = np.fromiter(
+            (len(seq) for seq in sequences),
+            dtype=np.int64, count=len(sequences)
+        )
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        residues = ''.join(sequences)
+        codes = aa_codes[np.frombuffer(
+            residues.encode('ascii', errors='replace'),
+            dtype=np.uint8
+        )]
+        invalid = np.flatnonzero(codes == 0)
+        if len(invalid) > 0:
+            raise ValueError(
+                'invalid amino acid: ' + str(residues[invalid[0]])
+            )
+
+        if modifications is not None and len(mod_codes) > 0:
+            for i, (seq, mods) in enumerate(zip(sequences, modifications)):
+                for pos, name in parse_modification_sites(mods):
+                    code = mod_codes.get((seq[pos], name), None)
+                    if code is not None:
+                        codes[offsets[i] + pos % len(seq)] = code
+
+        # keep the last residues of sequences longer than maxlen, the same
+        # as pad_sequences(..., padding='post') with default truncating
+        row = np.repeat(np.arange(len(sequences)), lengths)
+        col = np.arange(len(codes)) - np.repeat(offsets[:-1], lengths)
+        shift = np.repeat(np.maximum(lengths - maxlen, 0), lengths)
+        keep = col >= shift
+
+        indices = np.zeros((len(sequences), maxlen), dtype=np.int32)
+        indices[row[keep], col[keep] - shift[keep]] = codes[keep]
+        return indices
+
+
+    def indices_to_tensor(self, indices):
+        tensor = np.zeros(
+            indices.shape + (self.options.amino_acid_size(),),
+            dtype=np.int32
+        )
+        row, col = np.nonzero(indices)
+        tensor[row, col, indices[row, col] - 1] = 1
+        return tensor
+
+
     def peptides_to_tensor(self, sequences, modifications=None):
-        if modifications is None:
-            modifications = [None] * len(sequences)
-        return pad_sequences(
-            [
-                self.peptide_to_array(seq, mods)
-                for seq, mods in zip(sequences, modifications)
-            ],
-            maxlen=self.options.max_sequence_length,
-            padding='post'
+        return self.indices_to_tensor(
+            self.peptides_to_indices(sequences, modifications)
         )
 
+
+    def unique_peptides_to_tensor(self, sequences, modifications=None):
+        indices, inverse = unique_rows(
+            self.peptides_to_indices(sequences, modifications)
+        )
+        return self.indices_to_tensor(indices), inverse
@@ -0,0 +1,356 @@
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from util import NumpyEncoder
+
+
+class MicroBatchingModel:
+    def __init__(self, model, max_batch_size=4096, max_delay=0.01):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.requests = queue.Queue()
+        self.batch_count = 0
+        self.request_count = 0
+
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+    def predict(self, x, **kwargs):
+        request = {
+            'x': x,
+            'done': threading.Event(),
+            'result': None,
+            'error': None
+        }
+        self.requests.put(request)
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['result']
+
+
+    def _next_batch(self):
+        batch = [self.requests.get()]
+        size = len(batch[0]['x'])
+        deadline = time.time() + self.max_delay
+        while size < self.max_batch_size:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request['x'])
+        return batch
+
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                x = np.concatenate([r['x'] for r in batch]) \
+                    if len(batch) > 1 else batch[0]['x']
+                y = self.model.predict(x)
+                offsets = np.cumsum([0] + [len(r['x']) for r in batch])
+                for i, r in enumerate(batch):
+                    r['result'] = y[offsets[i]:offsets[i + 1]]
+            except Exception as e:
+                for r in batch:
+                    r['error'] = e
+
+            self.batch_count += 1
+            self.request_count += len(batch)
+            for r in batch:
+                r['done'].set()
+
+
+    def stats(self):
+        return {
+            'batches': self.batch_count,
+            'requests': self.request_count
+        }
+
+
+def _to_list(x):
+    if x is None:
+        return None
+    if isinstance(x, (pd.Series, np.ndarray)):
+        return x.tolist()
+    return list(x)
+
+
+class PredictionService:
+    def __init__(self, max_batch_size=4096, max_delay=0.01):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.predictors = {}
+
+
+    def add_predictor(self, model_type, predictor, name='default'):
+        predictor.model = MicroBatchingModel(
+            predictor.model,
+            max_batch_size=self.max_batch_size,
+            max_delay=self.max_delay
+        )
+        self.predictors.setdefault(model_type, {})[name] = predictor
+
+
+    def get_predictor(self, model_type, name=None):
+        predictors = self.predictors.get(model_type, None)
+        if not predictors:
+            raise KeyError('no model loaded: ' + str(model_type))
+        if name is None:
+            if len(predictors) == 1:
+                return next(iter(predictors.values()))
+            name = 'default'
+        if name not in predictors:
+            raise KeyError('no model loaded: ' + str(model_type) + \
+                           '/' + str(name))
+        return predictors[name]
+
+
+    def models(self):
+        return {
+            model_type: {
+                name: predictor.model.stats()
+                for name, predictor in predictors.items()
+            }
+            for model_type, predictors in self.predictors.items()
+        }
+
+
+    def predict(self, request):
+        model_type = request.get('type')
+        predictor = self.get_predictor(model_type, request.get('model', None))
+
+        if model_type == 'ms2':
+            sequences = request['sequences']
+            modifications = request.get('modifications', None)
+            if request.get('array', False):
+                prediction = predictor.predict_array(sequences, modifications)
+                return {
+                    'intensity': prediction['intensity'],
+                    'offsets': prediction['offsets'],
+                    'labels': prediction['labels']
+                }
+            return {
+                'ions': [
+                    pred['ions']
+                    for pred in predictor.predict(sequences, modifications)
+                ]
+            }
+
+        elif model_type in ('rt', 'im'):
+            prediction = predictor.predict(
+                request['sequences'], request.get('modifications', None)
+            )
+            values = prediction[predictor.value_name].values
+            return {'values': values, 'dtype': str(values.dtype)}
+
+        elif model_type == 'detectability':
+            prediction = predictor.predict(pd.DataFrame.from_dict(
+                request['data']
+            ))
+            values = prediction['detectability'].values
+            return {'values': values, 'dtype': str(values.dtype)}
+
+        else:
+            raise ValueError('invalid model type: ' + str(model_type))
+
+
+def prediction_request_handler(service):
+    class PredictionRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, data):
+            body = json.dumps(data, cls=NumpyEncoder).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+        def do_GET(self):
+            if self.path.rstrip('/') in ('', '/models'):
+                self._send_json(200, service.models())
+            else:
+                self._send_json(404, {'error': 'not found: ' + self.path})
+
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/predict':
+                self._send_json(404, {'error': 'not found: ' + self.path})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length))
+                result = service.predict(request)
+            except (KeyError, ValueError, TypeError) as e:
+                self._send_json(400, {'error': repr(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {'error': repr(e)})
+                return
+
+            self._send_json(200, result)
+
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictionRequestHandler
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def create_prediction_server(service, host='127.0.0.1', port=8765):
+    return PredictionServer(
+        (host, port), prediction_request_handler(service)
+    )
+
+
+class PredictionClient:
+    def __init__(self, url='http://127.0.0.1:8765', timeout=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+
+    def request(self, data):
+        request = urllib.request.Request(
+            self.url + '/predict',
+            data=json.dumps(data, cls=NumpyEncoder).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(
+                request, timeout=self.timeout
+            ) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', '')
+            except ValueError:
+                message = ''
+            raise RuntimeError(
+                'prediction server error {0}: {1}'.format(e.code, message)
+            )
+
+
+    def models(self):
+        with urllib.request.urlopen(
+            self.url + '/models', timeout=self.timeout
+        ) as response:
+            return json.loads(response.read())
+
+
+class RemoteMS2Predictor:
+    def __init__(self, client, model=None, labels=None):
+        self.client = client
+        self.model = model
+        self.labels = labels
+
+
+    def _request(self, sequences, modifications, array=False):
+        return self.client.request({
+            'type': 'ms2',
+            'model': self.model,
+            'sequences': _to_list(sequences),
+            'modifications': _to_list(modifications),
+            'array': array
+        })
+
+
+    def predict(self, sequences, modifications=None):
+        ions = self._request(sequences, modifications)['ions']
+        if modifications is None:
+            modifications = [None] * len(ions)
+        return [
+            {
+                'peptide': seq,
+                'modification': mod,
+                'ions': x
+            } for seq, x, mod in zip(sequences, ions, modifications)
+        ]
+
+
+    def predict_array(self, sequences, modifications=None):
+        result = self._request(sequences, modifications, array=True)
+        labels = result['labels']
+        return {
+            'peptide': list(sequences),
+            'modification': list(modifications) \
+                if modifications is not None \
+                else [None] * len(sequences),
+            'intensity': np.array(
+                result['intensity'], dtype=np.float32
+            ).reshape((-1, len(labels))),
+            'offsets': np.array(result['offsets'], dtype=np.int64),
+            'labels': labels
+        }
+
+
+class RemoteRTPredictor:
+    def __init__(self, client, model_type='rt', model=None,
+                 value_name='irt'):
+        self.client = client
+        self.model_type = model_type
+        self.model = model
+        self.value_name = value_name
+
+
+    def predict(self, sequences, modifications=None):
+        result = self.client.request({
+            'type': self.model_type,
+            'model': self.model,
+            'sequences': _to_list(sequences),
+            'modifications': _to_list(modifications)
+        })
+        values = np.array(result['values'], dtype=result['dtype'])
+
+        result = pd.DataFrame.from_dict({
+            'sequence': _to_list(sequences),
+            'modification': _to_list(modifications) \
+                if modifications is not None \
+                else [None] * len(values),
+            self.value_name: values
+        })
+        if isinstance(sequences, pd.Series):
+            result.index = sequences.index
+        return result
+
+
+class RemoteDetectabilityPredictor:
+    def __init__(self, client, model=None):
+        self.client = client
+        self.model = model
+
+
+    def predict(self, data):
+        result = data[['sequence', 'nTerminal', 'cTerminal']]
+        response = self.client.request({
+            'type': 'detectability',
+            'model': self.model,
+            'data': {k: v.tolist() for k, v in result.items()}
+        })
+        return result.assign(detectability=np.array(
+            response['values'], dtype=response['dtype']
+        ))
@@ -1,8 +1,3 @@
-from keras.callbacks import ModelCheckpoint, CSVLogger, \
-    EarlyStopping, ReduceLROnPlateau
-from keras.models import load_model
-import keras.backend as K
-
 from .split import split_train_validate
 
 
@@ -36,6 +31,8 @@ class TrainerBase:
 
 
     def load_model(self, model_path, **kwargs):
+        from keras.models import load_model
+
         self.model = load_model(model_path, **kwargs)
         return self.model
 
@@ -48,6 +45,10 @@ class TrainerBase:
                           x_validate, y_validate,
                           epochs=100, patience=15, 
                           lr=None):
+        from keras.callbacks import ModelCheckpoint, CSVLogger, \
+            EarlyStopping, ReduceLROnPlateau
+        import keras.backend as K
+
         callbacks = []
         
         if self.log_path is not None:
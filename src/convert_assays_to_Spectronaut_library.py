@@ -11,10 +11,25 @@ parser.add_argument(
     '--out',
     help='output spectral library file'
 )
+parser.add_argument(
+    '--stream', default=False, action='store_true',
+    help='convert and write assays in chunks without building the whole table'
+)
+parser.add_argument(
+    '--chunk_size', type=int, default=10000,
+    help='number of assays per chunk in streaming mode (default: %(default)s)'
+)
+parser.add_argument(
+    '--gzip', default=False, action='store_true',
+    help='compress output file with gzip'
+)
 
 args = parser.parse_args()
 assay_files = getattr(args, 'in')
 out_file = args.out
+stream = args.stream
+chunk_size = args.chunk_size
+use_gzip = args.gzip
 
 # %%
 import logging
@@ -30,7 +45,7 @@ from util import list_files
 if globals().get('assay_files', None) is None:
     assay_files = list_files(
         path='.',
-        pattern='\\.assay\\.pickle$'
+        pattern='\\.assay\\.(pickle|npz)$'
     )
 
 if len(assay_files) == 0:
@@ -47,49 +62,103 @@ if globals().get('out_file', None) is None:
         out_file += '_' + str(len(assay_files))
     out_file += '.library.xls'
 
+if globals().get('use_gzip', False) and not out_file.endswith('.gz'):
+    out_file += '.gz'
+
 # %%
-from util import load_pickle
+from assay.store import load_assays
 from assay.assay2table import AssayToDataFrameConverter
 from formatting.spectronaut import Spectronaut_assay_library_columns
 
-# %%
-assays = []
-for assay_file in assay_files:
-    logging.info('loading assays: ' + assay_file)
-
-    assay_data = load_pickle(assay_file)
-    assays.extend(assay_data)
-
-    logging.info('assays loaded: {0}, {1} spectra' \
-        .format(assay_file, len(assay_data)))
-
-logging.info('assays loaded: {0} spectra totally' \
-    .format(len(assays)))
-
 # %%
 converter = AssayToDataFrameConverter(
     columns=Spectronaut_assay_library_columns()
 )
 
+sep = '\t' if not out_file.endswith('.csv') and \
+    not out_file.endswith('.csv.gz') else ','
+
 # %%
-logging.info('converting assays to table')
+if globals().get('stream', False):
+    import time
+
+    def iter_assays():
+        global assay_count
+        for assay_file in assay_files:
+            logging.info('loading assays: ' + assay_file)
+            for assay in load_assays(assay_file, return_generator=True):
+                assay_count += 1
+                yield assay
+
+    def log_progress(data):
+        global transition_count
+        transition_count += len(data)
+
+        elapsed = max(time.time() - start_time, 1e-9)
+        logging.info(
+            'table written: {0} spectra, {1} transitions, ' \
+            '{2:.0f} transitions/s' \
+            .format(
+                assay_count, transition_count,
+                transition_count / elapsed
+            )
+        )
+
+    logging.info('converting assays to table: {0}' \
+        .format(out_file))
+
+    start_time = time.time()
+    assay_count = 0
+    transition_count = 0
+
+    converter.write_table(
+        iter_assays(), out_file,
+        chunk_size=chunk_size,
+        sep=sep,
+        callback=log_progress
+    )
 
-data = converter.assays_to_dataframe(assays)
+    elapsed = max(time.time() - start_time, 1e-9)
+    logging.info(
+        'table saved: {0}, {1} spectra, {2} transitions, {3:.1f} s, ' \
+        '{4:.0f} transitions/s, {5:.1f} MB/s' \
+        .format(
+            out_file, assay_count, transition_count, elapsed,
+            transition_count / elapsed,
+            os.path.getsize(out_file) / elapsed / 1024 / 1024
+        )
+    )
 
-logging.info('assays converted: {0} transitions' \
-    .format(len(data)))
+else:
+    assays = []
+    for assay_file in assay_files:
+        logging.info('loading assays: ' + assay_file)
 
-# %%
-logging.info('saving table: {0}' \
-    .format(out_file))
-
-data.to_csv(
-    out_file,
-    index=False, 
-    sep='\t' if not out_file.endswith('.csv') \
-        else ','
-)
+        assay_data = load_assays(assay_file)
+        assays.extend(assay_data)
+
+        logging.info('assays loaded: {0}, {1} spectra' \
+            .format(assay_file, len(assay_data)))
+
+    logging.info('assays loaded: {0} spectra totally' \
+        .format(len(assays)))
+
+    logging.info('converting assays to table')
+
+    data = converter.assays_to_dataframe(assays)
+
+    logging.info('assays converted: {0} transitions' \
+        .format(len(data)))
+
+    logging.info('saving table: {0}' \
+        .format(out_file))
+
+    data.to_csv(
+        out_file,
+        index=False,
+        sep=sep
+    )
 
-logging.info('table saved: {0}, {1} transitions' \
-    .format(out_file, len(data)))
+    logging.info('table saved: {0}, {1} transitions' \
+        .format(out_file, len(data)))
 
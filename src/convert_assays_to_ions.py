@@ -30,7 +30,7 @@ from util import list_files
 if globals().get('assay_files', None) is None:
     assay_files = list_files(
         path='.',
-        pattern='\\.assay\\.pickle$'
+        pattern='\\.assay\\.(pickle|npz)$'
     )
 
 if len(assay_files) == 0:
@@ -48,14 +48,15 @@ if globals().get('out_file', None) is None:
     out_file += '.ions.json'
 
 # %%
-from util import save_json, load_pickle
+from util import save_ions, is_ions_array_file
+from assay.store import load_assays
 
 # %%
 assays = []
 for assay_file in assay_files:
     logging.info('loading assays: ' + assay_file)
 
-    assay_data = load_pickle(assay_file)
+    assay_data = load_assays(assay_file)
     assays.extend(assay_data)
 
     logging.info('assays loaded: {0}, {1} spectra' \
@@ -83,12 +84,13 @@ for charge in set((x['charge'] for x in ions)):
     out_file_charge = os.path.splitext(out_file)[0]
     if out_file_charge.endswith('.ions'):
         out_file_charge = out_file_charge[:-len('.ions')]
-    out_file_charge += '_charge' + str(charge) + '.ions.json'
+    out_file_charge += '_charge' + str(charge) + \
+        ('.ions.npz' if is_ions_array_file(out_file) else '.ions.json')
 
     logging.info('saving ions: {0}, charge {1}+' \
         .format(out_file_charge, charge, len(ions_charge)))
 
-    save_json(ions_charge, out_file_charge)
+    save_ions(ions_charge, out_file_charge)
 
     logging.info('ions saved: {0}, charge {1}+, {2} spectra' \
         .format(out_file_charge, charge, len(ions_charge)))
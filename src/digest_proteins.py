@@ -70,6 +70,11 @@ group_duplicated_group.add_argument(
 )
 parser.set_defaults(group_duplicated=False)
 
+parser.add_argument(
+    '--workers', type=int, default=1,
+    help='number of worker processes for digestion; only used where processes are forked, otherwise digestion is serial (default: %(default)s)'
+)
+
 parser.add_argument(
     '--split_miss', default=False, action='store_true',
     help='split peptides to separate files according to numbers of missed cleavages  (default: %(default)s)'
@@ -88,6 +93,7 @@ max_peptide_mass = args.max_peptide_mass
 remove_n_term_methionine = args.remove_n_term_methionine
 term_window_size = args.term_window_size
 group_duplicated = args.group_duplicated
+workers = args.workers
 
 # %%
 import logging
@@ -138,7 +144,10 @@ proteins = []
 for fasta_file in fasta_files:
     logging.info('loading protein sequences: ' + fasta_file)
 
-    proteins_ = read_fasta(fasta_file, parsing_rule=fasta_rule)
+    proteins_ = read_fasta(
+        fasta_file, parsing_rule=fasta_rule,
+        fields=['id', 'sequence']
+    )
     proteins.extend(proteins_)
 
     logging.info('protein sequences loaded: {0}, {1} sequences' \
@@ -148,13 +157,13 @@ logging.info('protein sequences loaded: {0} sequences totally' \
     .format(len(proteins)))
 
 # %%
-from sequence.digest import digest, group_duplicated_peptides, \
-    filter_peptides_by_mass
+from sequence.digest import digest, digest_parallel, \
+    group_duplicated_peptides, filter_peptides_by_mass
 
 logging.info('digesting protein sequences')
 
-peptides = digest(
-    proteins, protease=protease,
+digest_args = dict(
+    protease=protease,
     max_missed_cleavages=max_missed_cleavages,
     min_peptide_length=min_peptide_length,
     max_peptide_length=max_peptide_length,
@@ -162,6 +171,13 @@ peptides = digest(
     term_window_size=term_window_size
 )
 
+workers = globals().get('workers', None)
+if workers is not None and workers > 1:
+    logging.info('use workers: ' + str(workers))
+    peptides = digest_parallel(proteins, workers=workers, **digest_args)
+else:
+    peptides = digest(proteins, **digest_args)
+
 logging.info('protein sequences digested: {0} peptides'.format(len(peptides)))
 
 # %%
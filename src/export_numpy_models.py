@@ -0,0 +1,162 @@
+import argparse
+
+parser = argparse.ArgumentParser(
+    description='Export model weights for the NumPy inference engine.'
+)
+parser.add_argument(
+    '--model', nargs='+',
+    help='input model files (.hdf5)'
+)
+parser.add_argument(
+    '--type', choices=['ms2', 'rt', 'im', 'detectability'], default='ms2',
+    help='model type (default: %(default)s)'
+)
+parser.add_argument(
+    '--out', nargs='+',
+    help='output weight files (.npz)'
+)
+parser.add_argument(
+    '--verify', type=int, default=0, metavar='N',
+    help='compare NumPy and Keras predictions on N random peptides, requires TensorFlow (default: %(default)s)'
+)
+parser.add_argument(
+    '--tolerance', type=float, default=1e-4,
+    help='maximum absolute difference allowed by --verify (default: %(default)s)'
+)
+
+args = parser.parse_args()
+model_files = args.model
+model_type = args.type
+out_files = args.out
+verify = args.verify
+tolerance = args.tolerance
+
+# %%
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(filename)s: [%(levelname)s] %(message)s'
+)
+
+# %%
+import os
+from util import list_files
+
+if globals().get('model_files', None) is None:
+    model_files = list_files(
+        path='models' if os.path.isdir('models') else '.',
+        pattern='^epoch_[0-9]+\\.hdf5$',
+        recursive=True
+    )
+
+if len(model_files) == 0:
+    raise ValueError('no model file')
+
+if globals().get('out_files', None) is None:
+    out_files = [os.path.splitext(f)[0] + '.npz' for f in model_files]
+
+if len(out_files) != len(model_files):
+    raise ValueError('numbers of model files and output files not match')
+
+# %%
+if model_type == 'ms2':
+    from pepms2 import PeptideMS2Options, PeptideMS2Predictor
+
+    options = PeptideMS2Options.default()
+
+    def predictor(model_path, engine):
+        return PeptideMS2Predictor(
+            options=options, model_path=model_path, engine=engine
+        )
+
+elif model_type == 'rt':
+    from peprt import PeptideRTOptions, PeptideRTPredictor
+
+    options = PeptideRTOptions.default()
+
+    def predictor(model_path, engine):
+        return PeptideRTPredictor(
+            options=options, model_path=model_path, engine=engine
+        )
+
+elif model_type == 'im':
+    from pepim import ion_mobility_options, ion_mobility_predictor
+
+    options = ion_mobility_options()
+
+    def predictor(model_path, engine):
+        return ion_mobility_predictor(
+            options=options, model_path=model_path, engine=engine
+        )
+
+elif model_type == 'detectability':
+    from pepdetect import PeptideDetectabilityOptions, \
+        PeptideDetectabilityPredictor
+
+    options = PeptideDetectabilityOptions.default()
+
+    def predictor(model_path, engine):
+        return PeptideDetectabilityPredictor(
+            options=options, model_path=model_path, engine=engine
+        )
+
+# %%
+import numpy as np
+
+
+def random_peptides(n, seed=0):
+    rng = np.random.default_rng(seed)
+    amino_acids = [a for a in options.amino_acids if a.isalpha()]
+    lengths = rng.integers(7, options.max_sequence_length + 1, size=n)
+    return [
+        ''.join(rng.choice(amino_acids, size=l))
+        for l in lengths
+    ]
+
+
+def model_input(predictor, sequences):
+    if model_type == 'detectability':
+        import pandas as pd
+
+        return predictor.converter.sequences_to_tensor(pd.DataFrame({
+            'sequence': sequences,
+            'nTerminal': [''] * len(sequences),
+            'cTerminal': [''] * len(sequences)
+        }))
+    else:
+        return predictor.converter.peptides_to_tensor(sequences, None)
+
+
+# %%
+import sys
+from common.inference import export_weights
+
+failed = []
+
+for model_file, out_file in zip(model_files, out_files):
+    logging.info('exporting model: ' + model_file)
+
+    export_weights(model_file, out_file)
+
+    logging.info('model exported: ' + out_file)
+
+    if verify > 0:
+        numpy_predictor = predictor(out_file, engine='numpy')
+        keras_predictor = predictor(model_file, engine='keras')
+
+        x = model_input(numpy_predictor, random_peptides(verify))
+        difference = float(np.max(np.abs(
+            numpy_predictor.model.predict(x) - \
+            keras_predictor.model.predict(x, verbose=0)
+        )))
+
+        logging.info('maximum difference from Keras: {0}, {1:.3g}' \
+                     .format(out_file, difference))
+
+        if not difference <= tolerance:
+            failed.append(out_file)
+
+if failed:
+    logging.error('NumPy and Keras predictions differ: ' + '; '.join(failed))
+    sys.exit(1)
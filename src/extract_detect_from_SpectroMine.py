@@ -24,6 +24,10 @@ parser.add_argument(
     default='SpectroMine',
     help='input report type (default: %(default)s)'
 )
+parser.add_argument(
+    '--chunk_size', type=int, default=1000000,
+    help='number of report rows read per chunk (default: %(default)s)'
+)
 
 parser.add_argument(
     '--supplement_run_pattern',
@@ -112,6 +116,7 @@ peptide_report_files = args.peptide
 fasta_files = args.fasta
 out_file = args.out
 report_type = args.type
+chunk_size = args.chunk_size
 
 supplement_run_pattern = args.supplement_run_pattern
 supplement_runs = args.supplement_runs
@@ -123,7 +128,7 @@ report_cleaner_args = vars(args)
     'protein', 'peptide', 'fasta', 'out', 'type',
     'supplement_run_pattern', 'supplement_runs',
     'use_evidence_count',
-    'fasta_rule'
+    'fasta_rule', 'chunk_size'
 ]]
 
 
@@ -194,16 +199,23 @@ if globals().get('out_file', None) is None:
     out_file += '.detectability.csv'
 
 # %%
-import pandas as pd
+from formatting.generic.report import read_report
+
+if report_type == 'Spectronaut':
+    from formatting.spectronaut import \
+        Spectronaut_protein_report_columns as protein_report_columns, \
+        Spectronaut_peptide_report_columns as peptide_report_columns
+else:
+    from formatting.spectronaut import \
+        SpectroMine_protein_report_columns as protein_report_columns, \
+        SpectroMine_peptide_report_columns as peptide_report_columns
 
 logging.info('loading protein report(s): ' + '; '.join(protein_report_files))
 
-protein_report = pd.concat(
-    (
-        pd.read_csv(f, sep=',' if f.endswith('.csv') else '\t')
-        for f in protein_report_files
-    ),
-    ignore_index=True
+protein_report = read_report(
+    protein_report_files,
+    columns=protein_report_columns(),
+    chunk_size=globals().get('chunk_size', None)
 )
 
 logging.info('protein report(s) loaded: {0} rows' \
@@ -211,12 +223,12 @@ logging.info('protein report(s) loaded: {0} rows' \
 
 logging.info('loading peptide report(s): ' + '; '.join(peptide_report_files))
 
-peptide_report = pd.concat(
-    (
-        pd.read_csv(f, sep=',' if f.endswith('.csv') else '\t')
-        for f in peptide_report_files
+peptide_report = read_report(
+    peptide_report_files,
+    columns=peptide_report_columns(
+        use_evidence_count=use_evidence_count
     ),
-    ignore_index=True
+    chunk_size=globals().get('chunk_size', None)
 )
 
 logging.info('peptide report(s) loaded: {0} rows' \
@@ -249,15 +261,6 @@ logging.info('protein sequences loaded: {0} sequences totally' \
 # %%
 from formatting.generic import PeptideDetectabilityReportCleaner
 
-if report_type == 'Spectronaut':
-    from formatting.spectronaut import \
-        Spectronaut_protein_report_columns as protein_report_columns, \
-        Spectronaut_peptide_report_columns as peptide_report_columns
-else:
-    from formatting.spectronaut import \
-        SpectroMine_protein_report_columns as protein_report_columns, \
-        SpectroMine_peptide_report_columns as peptide_report_columns
-
 cleaner = PeptideDetectabilityReportCleaner(
     protein_report_columns=protein_report_columns(),
     peptide_report_columns=peptide_report_columns(
@@ -16,6 +16,10 @@ parser.add_argument(
     default='SpectroMine',
     help='input report type (default: %(default)s)'
 )
+parser.add_argument(
+    '--chunk_size', type=int, default=1000000,
+    help='number of report rows read per chunk (default: %(default)s)'
+)
 
 filter_group = parser.add_argument_group('entries filters')
 filter_group.add_argument(
@@ -48,11 +52,13 @@ args = parser.parse_args()
 report_files = getattr(args, 'in')
 out_file = args.out
 report_type = args.type
+chunk_size = args.chunk_size
 
 filter_args = vars(args)
 filter_args.pop('in')
 filter_args.pop('out')
 filter_args.pop('type')
+filter_args.pop('chunk_size')
 
 # %%
 import logging
@@ -88,24 +94,9 @@ if globals().get('out_file', None) is None:
         out_file += '_' + str(len(report_files))
     out_file += '.ionMobility.csv'
 
-# %%
-import pandas as pd
-
-logging.info('loading report(s): ' + '; '.join(report_files))
-
-report = pd.concat(
-    (
-        pd.read_csv(f, sep=',' if f.endswith('.csv') else '\t')
-        for f in report_files
-    ),
-    ignore_index=True
-)
-
-logging.info('report(s) loaded: {0} rows' \
-    .format(len(report)))
-
 # %%
 from formatting.generic import PeptideReportCleaner
+from formatting.generic.report import read_report, concat_reports
 
 if report_type == 'Spectronaut':
     from formatting.spectronaut import \
@@ -116,9 +107,25 @@ else:
 
 cleaner = PeptideReportCleaner(columns=im_report_columns())
 
-logging.info('parsing ion mobility report')
+logging.info('loading report(s): ' + '; '.join(report_files))
+
+report = read_report(
+    report_files,
+    columns=im_report_columns(),
+    chunk_size=globals().get('chunk_size', None),
+    return_generator=True
+)
+
+report_rows = 0
+data = []
+for chunk in report:
+    report_rows += len(chunk)
+    data.append(cleaner.parse_report(chunk))
 
-data = cleaner.parse_report(report)
+data = concat_reports(data)
+
+logging.info('report(s) loaded: {0} rows' \
+    .format(report_rows))
 
 logging.info('ion mobility report parsed: {0} entries' \
     .format(len(data)))
@@ -95,7 +95,7 @@ if globals().get('out_file', None) is None:
 # %%
 import pandas as pd
 
-from util import save_pickle
+from assay.store import save_assays
 from assay.table2assay import DataFrameToAssayConverter
 from assay import AssayBuilder
 from formatting.maxquant import MaxQuant_assay_parsing_columns
@@ -156,11 +156,18 @@ print('')
 logging.info('assays converted: {0} spectra' \
     .format(len(assays)))
 
+mass_cache_stats = assay_builder.mass_cache_stats()
+if mass_cache_stats is not None and \
+    mass_cache_stats['hits'] + mass_cache_stats['misses'] > 0:
+    logging.info('mass cache: {hits} hits, {misses} misses ' \
+        '({hit_rate:.1%} hit rate), {size} entries' \
+        .format(**mass_cache_stats))
+
 # %%
 logging.info('saving assays: {0}' \
     .format(out_file))
 
-save_pickle(assays, out_file)
+save_assays(assays, out_file)
 
 logging.info('assays saved: {0}, {1} spectra' \
     .format(out_file, len(assays)))
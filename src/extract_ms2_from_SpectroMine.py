@@ -16,6 +16,10 @@ parser.add_argument(
     default='SpectroMine',
     help='input report type (default: %(default)s)'
 )
+parser.add_argument(
+    '--chunk_size', type=int, default=1000000,
+    help='number of report rows read per chunk (default: %(default)s)'
+)
 
 filter_group = parser.add_argument_group('entries filters')
 filter_group.add_argument(
@@ -64,11 +68,13 @@ args = parser.parse_args()
 report_files = getattr(args, 'in')
 out_file = args.out
 report_type = args.type
+chunk_size = args.chunk_size
 
 filter_args = vars(args)
 filter_args.pop('in')
 filter_args.pop('out')
 filter_args.pop('type')
+filter_args.pop('chunk_size')
 
 # %%
 import logging
@@ -105,11 +111,10 @@ if globals().get('out_file', None) is None:
     out_file += '.assay.pickle'
 
 # %%
-import pandas as pd
-
-from util import save_pickle
+from assay.store import save_assays
 from assay import AssayBuilder
 from assay.table2assay import DataFrameToAssayConverter
+from formatting.generic.report import read_report
 
 if report_type == 'Spectronaut':
     from formatting.spectronaut import \
@@ -121,24 +126,20 @@ else:
 # %%
 logging.info('loading report(s): ' + '; '.join(report_files))
 
-report = pd.concat(
-    (
-        pd.read_csv(f, sep=',' if f.endswith('.csv') else '\t')
-        for f in report_files
-    ),
-    ignore_index=True
+report = read_report(
+    report_files,
+    columns=assay_parsing_columns(),
+    chunk_size=globals().get('chunk_size', None),
+    return_generator=True
 )
 
-logging.info('report(s) loaded: {0} rows' \
-    .format(len(report)))
-
 # %%
 converter = DataFrameToAssayConverter(
     columns=assay_parsing_columns()
 )
 
-assays = converter.dataframe_to_assays(
-    data=report,
+assays = converter.dataframe_chunks_to_assays(
+    report,
     return_generator=True
 )
 
@@ -169,11 +170,18 @@ print('')
 logging.info('assays converted: {0} spectra' \
     .format(len(assays)))
 
+mass_cache_stats = assay_builder.mass_cache_stats()
+if mass_cache_stats is not None and \
+    mass_cache_stats['hits'] + mass_cache_stats['misses'] > 0:
+    logging.info('mass cache: {hits} hits, {misses} misses ' \
+        '({hit_rate:.1%} hit rate), {size} entries' \
+        .format(**mass_cache_stats))
+
 # %%
 logging.info('saving assays: {0}' \
     .format(out_file))
 
-save_pickle(assays, out_file)
+save_assays(assays, out_file)
 
 logging.info('assays saved: {0}, {1} spectra' \
     .format(out_file, len(assays)))
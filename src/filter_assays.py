@@ -113,7 +113,7 @@ from util import list_files
 if globals().get('assay_files', None) is None:
     assay_files = list_files(
         path='.',
-        pattern='\\.assay\\.pickle$'
+        pattern='\\.assay\\.(pickle|npz)$'
     )
 
 if len(assay_files) == 0:
@@ -128,10 +128,10 @@ if globals().get('out_file', None) is None:
         out_file = out_file[:-len('.assay')]
     if len(assay_files) > 1:
         out_file += '_' + str(len(assay_files))
-    out_file += '_filtered.assay.pickle'
+    out_file += '_filtered.assay' + os.path.splitext(assay_files[0])[1]
 
 # %%
-from util import save_pickle, load_pickle
+from assay.store import save_assays, load_assays
 from assay import AssayBuilder
 import pandas as pd
 
@@ -140,7 +140,7 @@ assays = []
 for assay_file in assay_files:
     logging.info('loading assays: ' + assay_file)
 
-    assay_data = load_pickle(assay_file)
+    assay_data = load_assays(assay_file)
     assays.extend(assay_data)
 
     logging.info('assays loaded: {0}, {1} spectra' \
@@ -181,11 +181,18 @@ assays = assay_builder.filter_assays(
 logging.info('assays filtered: {0} spectra remaining' \
     .format(len(assays)))
 
+mass_cache_stats = assay_builder.mass_cache_stats()
+if mass_cache_stats is not None and \
+    mass_cache_stats['hits'] + mass_cache_stats['misses'] > 0:
+    logging.info('mass cache: {hits} hits, {misses} misses ' \
+        '({hit_rate:.1%} hit rate), {size} entries' \
+        .format(**mass_cache_stats))
+
 # %%
 logging.info('saving assays: {0}' \
     .format(out_file))
 
-save_pickle(assays, out_file)
+save_assays(assays, out_file)
 
 logging.info('assays saved: {0}, {1} spectra' \
     .format(out_file, len(assays)))
@@ -1,3 +1,5 @@
+import itertools
+
 from assay import AssayBuilder
 from .mod import parse_modification
 
@@ -70,10 +72,13 @@ class IonsToAssayConverter():
             None
 
 
-    def ions_entry_to_assay(self, ions):
-        result = self.theoretical_fragments(
-            ions
-        )
+    def ions_entry_to_assay(self, ions, theoretical_fragments=None):
+        if theoretical_fragments is not None:
+            result = theoretical_fragments
+        else:
+            result = self.theoretical_fragments(
+                ions
+            )
 
         precursor_charge = ions.get('charge', None)
         if precursor_charge is not None:
@@ -110,12 +115,58 @@ class IonsToAssayConverter():
         return result
 
 
-    def ions_to_assays(self, ions,
-                       return_generator=False):
-        result = (
-            self.ions_entry_to_assay(entry)
-            for entry in ions
+    def theoretical_fragments_batch_supported(self):
+        # the batch path computes fragments by AssayBuilder directly and
+        # does not expand wildcard losses such as 'modloss'
+        if type(self).theoretical_fragments is not \
+            IonsToAssayConverter.theoretical_fragments:
+            return False
+
+        builder_type = type(self.assay_builder)
+        if not hasattr(builder_type, 'theoretical_fragments_batch'):
+            return False
+        if builder_type.theoretical_fragments is not \
+            AssayBuilder.theoretical_fragments and \
+            builder_type.theoretical_fragments_batch is \
+            AssayBuilder.theoretical_fragments_batch:
+            return False
+
+        return not any(
+            'modloss' in str(loss).split('+')
+            for loss in self.assay_builder.fragment_loss_types
         )
+
+
+    def ions_to_assays(self, ions,
+                       return_generator=False,
+                       batch_size=1000):
+        def _ions_to_assays(ions):
+            if not self.theoretical_fragments_batch_supported():
+                for entry in ions:
+                    yield self.ions_entry_to_assay(entry)
+                return
+
+            ions = iter(ions)
+            while True:
+                batch = list(itertools.islice(ions, batch_size))
+                if len(batch) == 0:
+                    break
+
+                theoretical_fragments = \
+                    self.assay_builder.theoretical_fragments_batch(
+                        [entry['peptide'] for entry in batch],
+                        [
+                            parse_modification(entry.get('modification', None))
+                            for entry in batch
+                        ]
+                    )
+                for entry, fragments in zip(batch, theoretical_fragments):
+                    yield self.ions_entry_to_assay(
+                        entry,
+                        theoretical_fragments=fragments
+                    )
+
+        result = _ions_to_assays(ions)
         if not return_generator:
             result = list(result)
         return result
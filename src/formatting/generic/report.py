@@ -0,0 +1,109 @@
+import itertools
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+def report_column_names(columns):
+    if isinstance(columns, dict):
+        names = itertools.chain.from_iterable(
+            v.keys() for v in columns.values()
+        )
+    else:
+        names = (
+            c.get('name') if isinstance(c, dict) else c
+            for c in columns
+        )
+    return list(dict.fromkeys(names))
+
+
+def report_column_dtypes(columns):
+    if isinstance(columns, dict):
+        items = itertools.chain.from_iterable(
+            v.items() for v in columns.values()
+        )
+    else:
+        items = (
+            (c.get('name'), c)
+            for c in columns
+            if isinstance(c, dict)
+        )
+
+    dtypes = {}
+    for name, col in items:
+        dtype = col.get('dtype', None)
+        if dtype is not None:
+            dtypes.setdefault(name, dtype)
+    return dtypes
+
+
+def concat_reports(reports):
+    reports = [x for x in reports if x is not None]
+    if len(reports) == 0:
+        return pd.DataFrame()
+    if len(reports) == 1:
+        return reports[0]
+
+    categories = [
+        k for k, v in reports[0].dtypes.items()
+        if isinstance(v, pd.CategoricalDtype) and \
+            all(
+                k in x.columns and \
+                isinstance(x[k].dtype, pd.CategoricalDtype)
+                for x in reports
+            )
+    ]
+    result = pd.concat(reports, ignore_index=True)
+    for k in categories:
+        result[k] = pd.Series(
+            union_categoricals(
+                [x[k] for x in reports],
+                sort_categories=True
+            ),
+            index=result.index
+        )
+    return result
+
+
+def read_report(files, columns=None, chunk_size=None, dtype=None,
+                return_generator=False):
+    if isinstance(files, str):
+        files = [files]
+
+    names = report_column_names(columns) if columns is not None else None
+    dtypes = report_column_dtypes(columns) if columns is not None else {}
+    if dtype is not None:
+        dtypes.update(dtype)
+
+    def read_args(file):
+        sep = ',' if file.endswith('.csv') else '\t'
+
+        usecols = None
+        if names is not None:
+            header = pd.read_csv(file, sep=sep, nrows=0).columns
+            usecols = [c for c in header if c in names]
+
+        return {
+            'sep': sep,
+            'usecols': usecols,
+            'dtype': {
+                k: v for k, v in dtypes.items()
+                if usecols is None or k in usecols
+            }
+        }
+
+    def read_chunks(file):
+        with pd.read_csv(
+            file, chunksize=chunk_size, **read_args(file)
+        ) as reader:
+            yield from reader
+
+    if chunk_size is None:
+        result = (pd.read_csv(f, **read_args(f)) for f in files)
+    else:
+        result = itertools.chain.from_iterable(
+            read_chunks(f) for f in files
+        )
+
+    if not return_generator:
+        result = concat_reports(result)
+    return result
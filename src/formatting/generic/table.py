@@ -1,9 +1,23 @@
 from collections import OrderedDict
+import numpy as np
 import pandas as pd
 
 from assay.modseq import check_modifications
 
 
+def map_values(value, convert):
+    if not isinstance(value.dtype, pd.CategoricalDtype):
+        return value.map(convert)
+
+    codes = value.cat.codes.values
+    mapped = np.empty(len(value.cat.categories) + 1, dtype=object)
+    for i, x in enumerate(value.cat.categories):
+        mapped[i] = convert(x)
+    if np.any(codes < 0):
+        mapped[-1] = convert(np.nan)
+    return pd.Series(mapped[codes], index=value.index).infer_objects()
+
+
 class PeptideReportCleaner:
     def __init__(self, columns):
         if columns is None:
@@ -23,7 +37,7 @@ class PeptideReportCleaner:
 
                     convert = col.get('parse', None)
                     if callable(convert):
-                        value = value.map(convert)
+                        value = map_values(value, convert)
 
                     result[col.get('name', colname)] = value
 
@@ -73,7 +87,8 @@ class PeptideReportCleaner:
             if agg is not None:
                 result = result.groupby(
                     by=key_name,
-                    as_index=False
+                    as_index=False,
+                    observed=True
                 ).aggregate({
                     col.get('name', colname): col.get('action', 'first')
                     for colname, col in agg.items()
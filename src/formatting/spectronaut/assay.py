@@ -72,74 +72,89 @@ def Spectronaut_library_parsing_columns():
         {
             'key': True,
             'name': 'StrippedPeptide',
+            'dtype': 'category',
             'path': 'peptideSequence'
         },
         {
             'key': True,
             'name': 'ModifiedPeptide',
+            'dtype': 'category',
             'path': 'modification',
             'convert': parse_modification_Spectronaut
         },
         {
             'key': True,
             'name': 'PrecursorCharge',
+            'dtype': 'Int64',
             'path': 'precursorCharge',
             'convert': int
         },
         {
             'key': True,
             'name': 'ProteinGroups',
+            'dtype': 'category',
             'path': ['metadata', 'protein']
         },
         {
             'key': True,
             'name': 'ReferenceRun',
+            'dtype': 'category',
             'path': ['metadata', 'file']
         },
         {
             'list': True,
             'name': 'FragmentMz',
+            'dtype': 'float64',
             'path': ['fragments', 'fragmentMZ']
         },
         {
             'list': True,
             'name': 'RelativeIntensity',
+            'dtype': 'float64',
             'path': ['fragments', 'fragmentIntensity']
         },
         {
             'list': True,
             'name': 'FragmentCharge',
+            'dtype': 'Int64',
             'path': ['fragments', 'fragmentCharge']
         },
         {
             'list': True,
             'name': 'FragmentType',
+            'dtype': 'category',
             'path': ['fragments', 'fragmentType']
         },
         {
             'list': True,
             'name': 'FragmentNumber',
+            'dtype': 'Int64',
             'path': ['fragments', 'fragmentNumber']
         },
         {
             'list': True,
             'name': 'FragmentLossType',
+            'dtype': 'category',
             'path': ['fragments', 'fragmentLossType']
         },
         {
             'name': 'iRT',
+            'dtype': 'float64',
             'path': 'iRT'
         },
         {
             'name': 'PrecursorMz',
+            'dtype': 'float64',
             'path': 'precursorMZ'
         },
         {
             'name': 'IonMobility',
+            'dtype': 'float64',
             'path': 'ionMobility'
         },
         {
             'name': 'ReferenceRunQvalue',
+            'dtype': 'float64',
             'path': ['metadata', 'qvalue']
         }
     ]
@@ -152,87 +167,105 @@ def SpectroMine_assay_parsing_columns():
         {
             'key': True,
             'name': 'PEP.StrippedSequence',
+            'dtype': 'category',
             'path': 'peptideSequence'
         },
         {
             'key': True,
             'name': 'PP.PIMID',
+            'dtype': 'category',
             'path': 'modification',
             'convert': parse_modification_Spectronaut
         },
         {
             'key': True,
             'name': 'PP.Charge',
+            'dtype': 'Int64',
             'path': 'precursorCharge',
             'convert': int
         },
         {
             'key': True,
             'name': 'PG.ProteinAccessions',
+            'dtype': 'category',
             'path': ['metadata', 'protein']
         },
         {
             'key': True,
             'name': 'R.FileName',
+            'dtype': 'category',
             'path': ['metadata', 'file']
         },
         {
             'key': True,
             'name': 'PSM.MS2ScanNumber',
+            'dtype': 'Int64',
             'path': ['metadata', 'scan']
         },
         {
             'list': True,
             'name': 'FI.CalibratedMZ',
+            'dtype': 'float64',
             'path': ['fragments', 'fragmentMZ']
         },
         {
             'list': True,
             'name': 'FI.Intensity',
+            'dtype': 'float64',
             'path': ['fragments', 'fragmentIntensity']
         },
         {
             'list': True,
             'name': 'FI.Charge',
+            'dtype': 'Int64',
             'path': ['fragments', 'fragmentCharge']
         },
         {
             'list': True,
             'name': 'FI.FrgType',
+            'dtype': 'category',
             'path': ['fragments', 'fragmentType']
         },
         {
             'list': True,
             'name': 'FI.FrgNum',
+            'dtype': 'Int64',
             'path': ['fragments', 'fragmentNumber']
         },
         {
             'list': True,
             'name': 'FI.LossType',
+            'dtype': 'category',
             'path': ['fragments', 'fragmentLossType']
         },
         {
             'name': 'PP.EmpiricalRT',
+            'dtype': 'float64',
             'path': 'rt'
         },
         {
             'name': 'PP.iRTEmpirical',
+            'dtype': 'float64',
             'path': 'iRT'
         },
         {
             'name': 'PSM.CalibratedMS1MZ',
+            'dtype': 'float64',
             'path': 'precursorMZ'
         },
         {
             'name': 'PSM.IonMobility',
+            'dtype': 'float64',
             'path': 'ionMobility'
         },
         {
             'name': 'PSM.Qvalue',
+            'dtype': 'float64',
             'path': ['metadata', 'qvalue']
         },
         {
             'name': 'PSM.Score',
+            'dtype': 'float64',
             'path': ['metadata', 'score']
         }
     ]
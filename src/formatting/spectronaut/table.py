@@ -9,7 +9,8 @@ def SpectroMine_rt_report_columns():
                 'name': 'sequence'
             },
             'PP.PIMID': {
-                'drop': True
+                'drop': True,
+                'dtype': 'category'
             }
         },
         'info': {            
@@ -19,20 +20,24 @@ def SpectroMine_rt_report_columns():
                 'write': stringify_modification
             },
             'PP.EmpiricalRT': {
-                'name': 'rt'
+                'name': 'rt',
+                'dtype': 'float64'
             },
             'PP.iRTEmpirical': {
-                'name': 'irt'
+                'name': 'irt',
+                'dtype': 'float64'
             }
         },
         'score': {
             'PSM.Score': {
                 'ascending': False,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             },
             'PSM.Qvalue': {
                 'ascending': True,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             }
         }
     }
@@ -47,10 +52,12 @@ def SpectroMine_im_report_columns():
                 'name': 'sequence'
             },
             'PP.PIMID': {
-                'drop': True
+                'drop': True,
+                'dtype': 'category'
             },
             'PP.Charge': {
-                'name': 'charge'
+                'name': 'charge',
+                'dtype': 'Int64'
             }
         },
         'info': {            
@@ -60,17 +67,20 @@ def SpectroMine_im_report_columns():
                 'write': stringify_modification
             },
             'PSM.IonMobility': {
-                'name': 'ionMobility'
+                'name': 'ionMobility',
+                'dtype': 'float64'
             }
         },
         'score': {
             'PSM.Score': {
                 'ascending': False,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             },
             'PSM.Qvalue': {
                 'ascending': True,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             }
         }
     }
@@ -87,14 +97,16 @@ def SpectroMine_peptide_report_columns(use_evidence_count=False):
         },
         'info': {
             'R.FileName': {
-                'name': 'run'
+                'name': 'run',
+                'dtype': 'category'
             }
         },
         'agg': {
             'PG.ProteinAccessions': {
                 'name': 'protein',
                 'parse': lambda x: x and x.split(';')[0],
-                'action': 'first'
+                'action': 'first',
+                'dtype': 'category'
             },
             'R.FileName': {
                 'name': 'run'
@@ -113,7 +125,8 @@ def SpectroMine_peptide_report_columns(use_evidence_count=False):
         columns['agg'].update({
             'PEP.Label-Free Quant': {
                 'name': 'quantity',
-                'action': 'mean'
+                'action': 'mean',
+                'dtype': 'float64'
             }
         })
 
@@ -125,7 +138,8 @@ def SpectroMine_protein_report_columns():
         'key': {
             'PG.ProteinAccessions': {
                 'name': 'protein',
-                'parse': lambda x: x and x.split(';')[0]
+                'parse': lambda x: x and x.split(';')[0],
+                'dtype': 'category'
             }
         },
         'score': {
@@ -144,7 +158,8 @@ def Spectronaut_rt_report_columns():
     columns = {
         'key': {            
             'EG.PrecursorId': {
-                'drop': True
+                'drop': True,
+                'dtype': 'category'
             }
         },
         'info': {            
@@ -157,20 +172,24 @@ def Spectronaut_rt_report_columns():
                 'write': stringify_modification
             },
             'EG.ApexRT': {
-                'name': 'rt'
+                'name': 'rt',
+                'dtype': 'float64'
             },
             'EG.iRTEmpirical': {
-                'name': 'irt'
+                'name': 'irt',
+                'dtype': 'float64'
             }
         },
         'score': {
             'EG.Cscore': {
                 'ascending': False,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             },
             'EG.Qvalue': {
                 'ascending': True,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             }
         }
     }
@@ -182,7 +201,8 @@ def Spectronaut_im_report_columns():
     columns = {
         'key': {
             'EG.PrecursorId': {
-                'drop': True
+                'drop': True,
+                'dtype': 'category'
             }
         },
         'info': {
@@ -199,17 +219,20 @@ def Spectronaut_im_report_columns():
                 'parse': lambda x: int(x.split('.')[-1])
             },
             'EG.IonMobility': {
-                'name': 'ionMobility'
+                'name': 'ionMobility',
+                'dtype': 'float64'
             }
         },
         'score': {
             'EG.Cscore': {
                 'ascending': False,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             },
             'EG.Qvalue': {
                 'ascending': True,
-                'drop': True
+                'drop': True,
+                'dtype': 'float64'
             }
         }
     }
@@ -226,14 +249,16 @@ def Spectronaut_peptide_report_columns(use_evidence_count=False):
         },
         'info': {
             'R.FileName': {
-                'name': 'run'
+                'name': 'run',
+                'dtype': 'category'
             }
         },
         'agg': {
             'PG.ProteinAccessions': {
                 'name': 'protein',
                 'parse': lambda x: x and x.split(';')[0],
-                'action': 'first'
+                'action': 'first',
+                'dtype': 'category'
             },
             'R.FileName': {
                 'name': 'run'
@@ -252,7 +277,8 @@ def Spectronaut_peptide_report_columns(use_evidence_count=False):
         columns['agg'].update({
             'PEP.Quantity': {
                 'name': 'quantity',
-                'action': 'mean'
+                'action': 'mean',
+                'dtype': 'float64'
             }
         })
 
@@ -1,17 +1,16 @@
-from keras.models import Sequential
-from keras.regularizers import l2
-
-try:
-    from keras.layers import Conv1D, MaxPooling1D, \
-        Dense, Dropout, Flatten, LSTM, Bidirectional
-except ImportError:
-    from keras.layers.convolutional import Conv1D, MaxPooling1D
-    from keras.layers.core import Dense, Dropout, Flatten
-    from keras.layers.recurrent import LSTM
-    from keras.layers.wrappers import Bidirectional
+def build_model(options, metrics=["mean_absolute_error"]):
+    from keras.models import Sequential
+    from keras.regularizers import l2
 
+    try:
+        from keras.layers import Conv1D, MaxPooling1D, \
+            Dense, Dropout, Flatten, LSTM, Bidirectional
+    except ImportError:
+        from keras.layers.convolutional import Conv1D, MaxPooling1D
+        from keras.layers.core import Dense, Dropout, Flatten
+        from keras.layers.recurrent import LSTM
+        from keras.layers.wrappers import Bidirectional
 
-def build_model(options, metrics=["mean_absolute_error"]):
     model = Sequential()
     model.add(Conv1D(
         filters=64,
@@ -45,3 +44,18 @@ def build_model(options, metrics=["mean_absolute_error"]):
     )
     return model
 
+
+def build_numpy_model(options):
+    from common.inference import NumpyModel, Conv1D, MaxPooling1D, \
+        Dense, Dropout, Flatten, LSTM, Bidirectional
+
+    return NumpyModel([
+        Conv1D(kernel_size=5, activation='relu'),
+        MaxPooling1D(pool_size=2, strides=2),
+        Bidirectional(LSTM(128, return_sequences=True)),
+        Dropout(),
+        Flatten(),
+        Dense(activation='relu'),
+        Dropout(),
+        Dense(activation='relu')
+    ])
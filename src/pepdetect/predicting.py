@@ -1,13 +1,14 @@
 from .options import PeptideDetectabilityOptions
 from .preprocessing import PeptideDetectabilityDataConverter
-from .modeling import build_model
+from .modeling import build_model, build_numpy_model
 
 
 class PeptideDetectabilityPredictor:
 
     def __init__(self, options=PeptideDetectabilityOptions.default(),
-                 model_path=None, model=None):
+                 model_path=None, model=None, engine='keras'):
         self.options = options
+        self.engine = engine
         self.converter = PeptideDetectabilityDataConverter(self.options)
         if model_path is not None:
             self.load_model(model_path)
@@ -16,7 +17,12 @@ class PeptideDetectabilityPredictor:
 
 
     def load_model(self, model_path, **kwargs):
-        model = build_model(self.options, **kwargs)
+        if self.engine == 'numpy':
+            model = build_numpy_model(self.options)
+        elif self.engine == 'keras':
+            model = build_model(self.options, **kwargs)
+        else:
+            raise ValueError('invalid engine: ' + str(self.engine))
         model.load_weights(model_path)
         self.model = model
 
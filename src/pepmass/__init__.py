@@ -1,2 +1,3 @@
 from .pepmass import PeptideMassCalculator
 from .modmass import ModifiedPeptideMassCalculator
+from .cache import MassCache, CachedMassCalculator
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+
+
+class MassCache:
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    def __len__(self):
+        return len(self.data)
+
+
+    def get(self, key, default=None):
+        value = self.data.get(key, default)
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+
+    def clear(self):
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.data),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / total if total > 0 else 0.0
+        }
+
+
+def _freeze(x):
+    if isinstance(x, (list, tuple, range)):
+        return tuple(_freeze(v) for v in x)
+    elif isinstance(x, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in x.items()))
+    else:
+        return x
+
+
+def modification_key(modification):
+    if modification is None:
+        return None
+    if not isinstance(modification, list):
+        modification = [modification]
+
+    def _to_str(m):
+        if isinstance(m, dict):
+            name = m['name']
+            position = m.get('position', None)
+            site = m.get('site', None)
+        else:
+            name, position, site = m.name, m.position, m.site
+        return name + '(' + \
+            (str(position) if position is not None else '') + \
+            (str(site) if site is not None else '') + ')'
+
+    return ';'.join(sorted(_to_str(m) for m in modification))
+
+
+def normalize_sequence(sequence):
+    if isinstance(sequence, str):
+        return sequence.upper()
+    return sequence
+
+
+def configuration_key(calculator):
+    def _mod_key(mods):
+        return tuple(
+            (m.name, _freeze(m.site), m.delta_mass, m.loss_name, m.loss_mass)
+            for m in mods
+        )
+
+    return (
+        type(calculator).__name__,
+        _freeze(getattr(calculator, 'aa_residues', None)),
+        _freeze(getattr(calculator, 'elements', None)),
+        tuple(
+            (
+                k,
+                getattr(v, 'n_term', None),
+                _freeze(getattr(v, 'atoms', None))
+            )
+            for k, v in sorted(getattr(calculator, 'fragments', {}).items())
+        ),
+        _freeze(getattr(calculator, 'neutral_losses', None)),
+        _mod_key(getattr(calculator, 'fixed_modifications', [])),
+        _mod_key(getattr(calculator, 'variable_modifications', []))
+    )
+
+
+class CachedMassCalculator:
+    def __init__(self, calculator, cache=None, maxsize=10000):
+        if cache is None:
+            cache = MassCache(maxsize=maxsize)
+        self.calculator = calculator
+        self.cache = cache
+        self.configuration = configuration_key(calculator)
+
+
+    def __getattr__(self, name):
+        return getattr(self.calculator, name)
+
+
+    def _cached(self, method, sequence, modification=None, **kwargs):
+        sequence = normalize_sequence(sequence)
+        key = (
+            method, str(sequence), modification_key(modification),
+            _freeze(kwargs), self.configuration
+        )
+        result = self.cache.get(key)
+        if result is None:
+            if modification is not None:
+                kwargs['modification'] = modification
+            result = getattr(self.calculator, method)(
+                sequence=sequence, **kwargs
+            )
+            self.cache.put(key, result)
+        return _copy_result(result)
+
+
+    def mw(self, sequence, modification=None, **kwargs):
+        return self._cached(
+            'mw', sequence, modification=modification, **kwargs
+        )
+
+
+    def precursor_mz(self, sequence, modification=None, charge=1,
+                     **kwargs):
+        return self._cached(
+            'precursor_mz', sequence, modification=modification,
+            charge=charge, **kwargs
+        )
+
+
+    def fragment_neutral_mw(self, sequence, modification=None, **kwargs):
+        return self._cached(
+            'fragment_neutral_mw', sequence, modification=modification,
+            **kwargs
+        )
+
+
+    def fragment_mz(self, sequence, modification=None, **kwargs):
+        return self._cached(
+            'fragment_mz', sequence, modification=modification,
+            **kwargs
+        )
+
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+
+def _copy_result(result):
+    if isinstance(result, list):
+        return [_copy_result(x) for x in result]
+    elif isinstance(result, dict):
+        return {k: _copy_result(v) for k, v in result.items()}
+    else:
+        return result
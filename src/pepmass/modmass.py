@@ -1,3 +1,5 @@
+import numpy as np
+
 from .pepmass import PeptideMassCalculator
 from .modinfo import ModInfo, find_modification, \
     default_fixed_modifications, default_variable_modifications
@@ -687,7 +689,7 @@ class ModifiedPeptideMassCalculator(PeptideMassCalculator):
                     if 'noloss' in common_loss_any_mod_loss:
                         common_loss_any_func = lambda x: \
                             not any(map(lambda l:
-                                x.get('loss', '').endswith('+' + l),
+                                x.endswith('+' + l),
                                 self.neutral_losses.keys()))
                     else:
                         common_loss_any_func = lambda x: \
@@ -746,6 +748,242 @@ class ModifiedPeptideMassCalculator(PeptideMassCalculator):
         return fragment_mw
 
 
+    def parse_fragment_loss(self, loss):
+        if loss is None or loss == '' or loss == 'noloss' or loss == 'None':
+            return 'noloss', None, None, 0
+
+        common_loss = None
+        mod_loss = None
+        n_loss = 0
+        for term in loss.split('+'):
+            if term in self.neutral_losses and common_loss is None:
+                common_loss = term
+                continue
+
+            t = term.split('*', 1)
+            if len(t) == 2 and t[0].isdigit() and int(t[0]) > 0:
+                n, name = int(t[0]), t[1]
+            else:
+                n, name = 1, term
+            if mod_loss is None and any(
+                m.loss_name == name
+                for m in self.fixed_modifications + self.variable_modifications
+            ):
+                mod_loss = name
+                n_loss = n
+                continue
+
+            raise ValueError('invalid loss: ' + loss)
+
+        if mod_loss is None:
+            label = common_loss
+        else:
+            label = (str(n_loss) + '*' if n_loss > 1 else '') + mod_loss + \
+                ('+' + common_loss if common_loss is not None else '')
+        return label, common_loss, mod_loss, n_loss
+
+
+    def residue_mass_matrix(self, sequences, modifications=None):
+        sequences = list(sequences)
+        if modifications is None:
+            modifications = [None] * len(sequences)
+
+        lengths = np.fromiter(
+            (len(seq) for seq in sequences),
+            dtype=np.int64, count=len(sequences)
+        )
+        for i in np.flatnonzero(lengths <= 1):
+            raise ValueError('sequence length < 2: ' + sequences[i])
+        maxlen = int(lengths.max()) if len(sequences) > 0 else 0
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        aa_mass = np.full(256, np.nan)
+        for aa, mass in self.aa_residues.items():
+            aa_mass[ord(aa)] = mass
+
+        residues = ''.join(sequences)
+        codes = np.frombuffer(
+            residues.encode('ascii', errors='replace'),
+            dtype=np.uint8
+        )
+        mass = aa_mass[codes]
+        invalid = np.flatnonzero(np.isnan(mass))
+        if len(invalid) > 0:
+            raise ValueError(
+                'unknown aa residue: ' + str(residues[invalid[0]])
+            )
+
+        loss_count = {}
+        def _add_loss(mod, index):
+            if mod.loss_name is None or mod.loss_mass is None:
+                return
+            count = loss_count.get(mod.loss_name, None)
+            if count is None:
+                count = np.zeros(len(codes), dtype=np.int64)
+                loss_count[mod.loss_name] = count
+            np.add.at(count, index, 1)
+
+        for mod in self.fixed_modifications:
+            if mod.site == 'N-term':
+                index = offsets[:-1]
+            elif mod.site == 'C-term':
+                index = offsets[1:] - 1
+            else:
+                site = np.zeros(256, dtype=bool)
+                for aa in mod.site:
+                    site[ord(aa)] = True
+                index = np.flatnonzero(site[codes])
+            mass[index] += mod.delta_mass
+            _add_loss(mod, index)
+
+        for i, (sequence, modification) in \
+            enumerate(zip(sequences, modifications)):
+            if modification is None:
+                continue
+            if isinstance(modification, (dict, ModSite)):
+                modification = [modification]
+            for m in modification:
+                if isinstance(m, dict):
+                    m = ModSite.from_dict(m)
+                elif not isinstance(m, ModSite):
+                    raise TypeError('invalid modification: ' + \
+                        str(type(m)))
+                mod = self.find_var_mod(sequence, m)
+                if mod is None:
+                    continue
+                if m.site == 'N-term':
+                    index = offsets[i]
+                elif m.site == 'C-term':
+                    index = offsets[i + 1] - 1
+                else:
+                    index = offsets[i] + m.position - 1
+                mass[index] += mod.delta_mass
+                _add_loss(mod, [index])
+
+        row = np.repeat(np.arange(len(sequences)), lengths)
+        col = np.arange(len(codes)) - np.repeat(offsets[:-1], lengths)
+
+        def _to_matrix(values, dtype):
+            matrix = np.zeros((len(sequences), maxlen), dtype=dtype)
+            matrix[row, col] = values
+            return matrix
+
+        return _to_matrix(mass, np.float64), lengths, {
+            k: _to_matrix(v, np.int64)
+            for k, v in loss_count.items()
+        }
+
+
+    def fragment_neutral_mw_matrix(self, sequences, modifications=None,
+                                   fragment_type=None, loss=None):
+        if fragment_type is None:
+            fragment_type = ['b', 'y']
+        elif isinstance(fragment_type, str):
+            fragment_type = [fragment_type]
+        if loss is None:
+            loss = ['noloss']
+        elif isinstance(loss, str):
+            loss = [loss]
+
+        mass, lengths, loss_count = self.residue_mass_matrix(
+            sequences, modifications
+        )
+        n = len(lengths)
+        positions = max(mass.shape[1] - 1, 0)
+
+        number = np.arange(1, positions + 1)
+        rows = np.arange(n)[:, None]
+        n_term_valid = number[None, :] < lengths[:, None]
+        c_term_col = lengths[:, None] - 1 - number[None, :]
+        c_term_valid = c_term_col >= 0
+        c_term_col = np.maximum(c_term_col, 0)
+
+        def _fragment_cumsum(matrix, n_term):
+            cumsum = np.cumsum(matrix, axis=1)
+            if n_term:
+                return cumsum[:, :positions]
+            total = cumsum[np.arange(n), lengths - 1]
+            return total[:, None] - cumsum[rows, c_term_col]
+
+        ion_types = []
+        result = []
+        for t in fragment_type:
+            frag_type = self.fragment_type(t)
+            atom_mass = sum(
+                self.element_mass(k) * v
+                for k, v in (frag_type.atoms or {}).items()
+            )
+            fragment_mw = _fragment_cumsum(mass, frag_type.n_term) + atom_mass
+            valid = n_term_valid if frag_type.n_term else c_term_valid
+
+            for l in loss:
+                label, common_loss, mod_loss, n_loss = \
+                    self.parse_fragment_loss(l)
+                mw = fragment_mw.copy()
+                if common_loss is not None:
+                    mw -= self.neutral_loss_mass(common_loss)
+                if mod_loss is not None:
+                    count = loss_count.get(mod_loss, None)
+                    loss_mass = next(
+                        m.loss_mass
+                        for m in self.fixed_modifications + \
+                            self.variable_modifications
+                        if m.loss_name == mod_loss
+                    )
+                    mw -= n_loss * loss_mass
+                    if count is None:
+                        mw[:] = np.nan
+                    else:
+                        count = _fragment_cumsum(count, frag_type.n_term)
+                        mw[count < n_loss] = np.nan
+                mw[~valid] = np.nan
+
+                ion_types.append({'fragment_type': t, 'loss': label})
+                result.append(mw)
+
+        result = np.stack(result, axis=-1) if len(result) > 0 \
+            else np.zeros((n, positions, 0))
+        return result, ion_types
+
+
+    def fragment_mz_matrix(self, sequences, modifications=None,
+                           fragment_type=None, charge=None, loss=None):
+        if charge is None:
+            charge = [1]
+        elif isinstance(charge, int):
+            charge = [charge]
+        for ch in charge:
+            if ch <= 0:
+                raise ValueError('invalid charge: ' + str(ch))
+
+        fragment_mw, ion_types = self.fragment_neutral_mw_matrix(
+            sequences, modifications,
+            fragment_type=fragment_type, loss=loss
+        )
+        if isinstance(loss, (list, tuple)):
+            loss_order = [self.parse_fragment_loss(l)[0] for l in loss]
+        else:
+            loss_order = [x['loss'] for x in ion_types]
+
+        # ordered by charge, loss and fragment type, the same as
+        # PeptideMassCalculator.fragment_mz
+        proton = self.element_mass('proton')
+        order = sorted(
+            range(len(ion_types)),
+            key=lambda j: loss_order.index(ion_types[j]['loss'])
+        )
+        result = []
+        result_ion_types = []
+        for ch in charge:
+            for j in order:
+                result.append((fragment_mw[:, :, j] + ch * proton) / ch)
+                result_ion_types.append(dict(ion_types[j], charge=ch))
+
+        result = np.stack(result, axis=-1) if len(result) > 0 \
+            else np.zeros(fragment_mw.shape[:2] + (0,))
+        return result, result_ion_types
+
+
 
 if __name__ == '__main__':
     pep_calc = ModifiedPeptideMassCalculator();
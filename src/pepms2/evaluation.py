@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from .options import PeptideMS2Options
+from .preprocessing import PeptideMS2DataConverter
+
+
+def _flatten(x, mask=None):
+    x = np.asarray(x, dtype=np.float64)
+    if mask is not None:
+        x = x * mask[:, :, np.newaxis]
+    return x.reshape((len(x), -1))
+
+
+def cosine_similarity(x, y, mask=None):
+    x = _flatten(x, mask)
+    y = _flatten(y, mask)
+    dot = np.einsum('ij,ij->i', x, y)
+    norm = np.sqrt(np.einsum('ij,ij->i', x, x) * np.einsum('ij,ij->i', y, y))
+    return np.divide(dot, norm, out=np.zeros_like(dot), where=norm > 0)
+
+
+def cosine_to_spectral_angle(cosine):
+    return 1 - 2 * np.arccos(np.clip(cosine, -1, 1)) / np.pi
+
+
+def spectral_angle(x, y, mask=None):
+    return cosine_to_spectral_angle(cosine_similarity(x, y, mask))
+
+
+def pearson_correlation(x, y, mask=None):
+    if mask is None:
+        mask = np.ones(np.shape(x)[:2], dtype=bool)
+    mask = np.broadcast_to(mask[:, :, np.newaxis], np.shape(x)) \
+        .reshape((len(mask), -1))
+    count = np.maximum(mask.sum(axis=1, keepdims=True), 1)
+
+    def center(x):
+        x = _flatten(x) * mask
+        return (x - x.sum(axis=1, keepdims=True) / count) * mask
+
+    return cosine_similarity(center(x), center(y))
+
+
+class PeptideMS2Evaluator:
+    def __init__(self, options=PeptideMS2Options.default(),
+                 batch_size=4096):
+        self.options = options
+        self.batch_size = batch_size
+        self.converter = PeptideMS2DataConverter(self.options)
+        self.metrics = ['similarity', 'spectral_angle', 'pearson']
+
+
+    def evaluate_tensor(self, x, y, lengths):
+        mask = np.arange(np.shape(x)[1]) < \
+            (np.asarray(lengths)[:, np.newaxis] - 1)
+
+        similarity = cosine_similarity(x, y, mask)
+        return {
+            'similarity': similarity,
+            'spectral_angle': cosine_to_spectral_angle(similarity),
+            'pearson': pearson_correlation(x, y, mask)
+        }
+
+
+    def evaluate(self, experimental, predicted):
+        lengths = np.array([
+            len(d['peptide']) for d in experimental
+        ], dtype=np.int64)
+
+        result = {k: np.zeros(len(lengths)) for k in self.metrics}
+        order = np.argsort(lengths, kind='stable')
+        for start in range(0, len(order), self.batch_size):
+            index = order[start:(start + self.batch_size)]
+            maxlen = max(int(lengths[index[-1]]) - 1, 1)
+            scores = self.evaluate_tensor(
+                self.converter.stack_ions(
+                    (experimental[i]['ions'] for i in index),
+                    maxlen=maxlen
+                ),
+                predicted[index, :maxlen] \
+                    if isinstance(predicted, np.ndarray) \
+                    else self.converter.stack_ions(
+                        (predicted[i]['ions'] for i in index),
+                        maxlen=maxlen
+                    ),
+                lengths[index]
+            )
+            for k in self.metrics:
+                result[k][index] = scores[k]
+
+        return result
+
+
+    def report(self, scores, by=['charge', 'length'],
+               quantiles=[0.025, 0.25, 0.5, 0.75, 0.975]):
+        metrics = [k for k in self.metrics if k in scores.columns]
+        groups = scores.groupby(by, dropna=False)
+
+        result = groups.size().rename('count').to_frame()
+        for k in metrics:
+            for q in quantiles:
+                result[k + '_q' + '{0:g}'.format(q * 100)] = \
+                    groups[k].quantile(q)
+        return result.reset_index()
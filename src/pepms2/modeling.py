@@ -1,18 +1,6 @@
-import keras.backend as K
-from keras.models import load_model as keras_load_model
-from keras.models import Sequential
-
-try:
-    from keras.layers import Conv1D, \
-        Dense, Dropout, Masking, LSTM, Bidirectional, TimeDistributed
-except ImportError:
-    from keras.layers.convolutional import Conv1D
-    from keras.layers.core import Dense, Dropout, Masking
-    from keras.layers.recurrent import LSTM
-    from keras.layers.wrappers import Bidirectional, TimeDistributed
-
-
 def cosine_similarity(y_true, y_pred):
+    import keras.backend as K
+
     length = K.int_shape(y_pred)[1]
     y_true = K.batch_flatten(y_true)
     y_pred = K.batch_flatten(y_pred)
@@ -24,6 +12,17 @@ def cosine_similarity(y_true, y_pred):
 
 
 def build_model(options, metrics=[cosine_similarity]):
+    from keras.models import Sequential
+
+    try:
+        from keras.layers import Conv1D, \
+            Dense, Dropout, Masking, LSTM, Bidirectional, TimeDistributed
+    except ImportError:
+        from keras.layers.convolutional import Conv1D
+        from keras.layers.core import Dense, Dropout, Masking
+        from keras.layers.recurrent import LSTM
+        from keras.layers.wrappers import Bidirectional, TimeDistributed
+
     model = Sequential()
     model.add(Conv1D(
         filters=64,
@@ -47,10 +46,25 @@ def build_model(options, metrics=[cosine_similarity]):
 
 def load_model(file, custom_objects={'cosine_similarity': cosine_similarity},
                **kwargs):
+    from keras.models import load_model as keras_load_model
+
     model = keras_load_model(file, custom_objects=custom_objects, **kwargs)
     return model
 
 
+def build_numpy_model(options):
+    from common.inference import NumpyModel, Conv1D, \
+        Dense, Dropout, Masking, LSTM, Bidirectional, TimeDistributed
+
+    return NumpyModel([
+        Conv1D(kernel_size=2, activation='relu'),
+        Masking(mask_value=0.),
+        Bidirectional(LSTM(128, return_sequences=True)),
+        Dropout(),
+        TimeDistributed(Dense(activation='relu'))
+    ])
+
+
 def build_model_from_weights(options, weights_path, **kwargs):
     model = build_model(options=options, **kwargs)
     model.load_weights(weights_path)
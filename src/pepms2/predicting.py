@@ -1,12 +1,18 @@
 from .options import PeptideMS2Options
 from .preprocessing import PeptideMS2DataConverter
-from .modeling import build_model # , load_model as _load_model
+from .modeling import build_model, build_numpy_model # , load_model as _load_model
+
+import logging
+import numpy as np
 
 
 class PeptideMS2Predictor:
     def __init__(self, options=PeptideMS2Options.default(),
-                 model_path=None, model=None):
+                 model_path=None, model=None, engine='keras',
+                 deduplicate=True):
         self.options = options
+        self.engine = engine
+        self.deduplicate = deduplicate
         self.converter = PeptideMS2DataConverter(self.options)
         if model_path is not None:
             self.load_model(model_path)
@@ -16,16 +22,67 @@ class PeptideMS2Predictor:
 
     def load_model(self, model_path, **kwargs):
         # self.model = _load_model(model_path, **kwargs)
-        model = build_model(self.options, **kwargs)
+        if self.engine == 'numpy':
+            model = build_numpy_model(self.options)
+        elif self.engine == 'keras':
+            model = build_model(self.options, **kwargs)
+        else:
+            raise ValueError('invalid engine: ' + str(self.engine))
         model.load_weights(model_path)
         self.model = model
 
 
-    def predict(self, sequences, modifications=None):
+    def predict_tensor(self, sequences, modifications=None,
+                       bucket_by_length=False):
+        if self.deduplicate:
+            x, inverse = self.converter.unique_peptides_to_tensor(
+                sequences, modifications
+            )
+            logging.info('unique peptides: {0} of {1} ({2:.1%})'.format(
+                len(x), len(inverse),
+                len(x) / len(inverse) if len(inverse) > 0 else 1
+            ))
+            return self.predict_unique_tensor(x, bucket_by_length)[inverse]
+
         x = self.converter.peptides_to_tensor(sequences, modifications)
-        y = self.model.predict(x)
+        return self.predict_unique_tensor(x, bucket_by_length)
+
+
+    def predict_unique_tensor(self, x, bucket_by_length=False):
+        if not bucket_by_length:
+            return self.model.predict(x)
+
+        if self.engine != 'numpy':
+            raise ValueError('length bucketing requires the numpy engine')
+
+        lengths = np.count_nonzero(np.any(x, axis=2), axis=1)
+        order = np.argsort(lengths, kind='stable')
+        bounds = np.flatnonzero(np.diff(lengths[order])) + 1
+
+        y = None
+        for index in np.split(order, bounds):
+            if len(index) == 0:
+                continue
+            y_ = self.model.predict(
+                x[index, :lengths[index[0]]],
+                length=x.shape[1]
+            )
+            if y is None:
+                y = np.zeros((len(x),) + y_.shape[1:], dtype=y_.dtype)
+            y[index] = y_
+        if y is None:
+            y = self.model.predict(x)
+        return y
+
+
+    def predict(self, sequences, modifications=None, bucket_by_length=False):
+        y = self.predict_tensor(sequences, modifications, bucket_by_length)
+        return self.tensor_to_prediction(y, sequences, modifications)
+
+
+    def tensor_to_prediction(self, tensor, sequences, modifications=None):
         pred = self.converter.tensor_to_ions(
-            y, [len(seq) for seq in sequences]
+            tensor, [len(seq) for seq in sequences]
         )
 
         if modifications is not None:
@@ -46,3 +103,20 @@ class PeptideMS2Predictor:
             ]
         return result
 
+
+    def predict_array(self, sequences, modifications=None,
+                      bucket_by_length=False):
+        y = self.predict_tensor(sequences, modifications, bucket_by_length)
+        intensity, offsets = self.converter.tensor_to_ions_array(
+            y, [len(seq) for seq in sequences]
+        )
+
+        return {
+            'peptide': list(sequences),
+            'modification': list(modifications) \
+                if modifications is not None \
+                else [None] * len(sequences),
+            'intensity': intensity,
+            'offsets': offsets,
+            'labels': [frag[0] for frag in self.options.fragments]
+        }
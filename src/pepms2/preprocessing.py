@@ -1,11 +1,8 @@
+import itertools
+import operator
 import numpy as np
 from common.preprocessing import PeptideDataConverter
 
-try:
-    from keras.utils import pad_sequences
-except ImportError:
-    from keras.preprocessing.sequence import pad_sequences
-
 
 def normalize_by_max(x):
     x = np.clip(x, a_min=0, a_max=None)
@@ -25,29 +22,51 @@ class PeptideMS2DataConverter(PeptideDataConverter):
         self.normalize = normalize_by_max
 
 
-    def ions_to_tensor(self, ions):
-        def column_stack_ions(x):
-            arrays = [
-                (x[frag[0]] if not frag[1] else x[frag[0]][::-1]) \
-                if frag[0] in x else [0]
-                for frag in self.options.fragments
-            ]
-            maxlen = max(map(len, arrays))
-            arrays = [
-                x if len(x) == maxlen else x + [0] * (maxlen - len(x))
-                for x in arrays
-            ]
-            return np.column_stack(arrays)
-
-        return pad_sequences(
-            [
-                self.transform_input(self.normalize(column_stack_ions(x)))
-                for x in ions
-            ],
-            maxlen=self.options.max_sequence_length - 1,
-            padding='post',
-            dtype='float'
+    def stack_ions(self, ions, maxlen=None):
+        ions = list(ions)
+        if maxlen is None:
+            maxlen = self.options.max_sequence_length - 1
+        arrays = [
+            list(map(operator.methodcaller('get', frag[0], ()), ions))
+            for frag in self.options.fragments
+        ]
+        lengths = np.array([
+            np.fromiter(map(len, arr), dtype=np.int64, count=len(arr))
+            for arr in arrays
+        ], dtype=np.int64).reshape((len(arrays), len(ions)))
+
+        # keep the last positions of longer spectra, the same as
+        # pad_sequences(..., padding='post') with default truncating
+        shift = np.maximum(lengths.max(axis=0, initial=0) - maxlen, 0)
+
+        tensor = np.zeros(
+            (len(ions), maxlen, len(self.options.fragments)),
+            dtype=np.float64
         )
+        for i, (frag, arr) in enumerate(zip(self.options.fragments, arrays)):
+            offsets = np.concatenate(([0], np.cumsum(lengths[i])))
+            values = np.fromiter(
+                itertools.chain.from_iterable(arr),
+                dtype=np.float64, count=offsets[-1]
+            )
+            row = np.repeat(np.arange(len(ions)), lengths[i])
+            position = np.arange(offsets[-1]) - \
+                np.repeat(offsets[:-1], lengths[i])
+            if frag[1]:
+                position = np.repeat(lengths[i], lengths[i]) - 1 - position
+            position -= shift[row]
+            keep = position >= 0
+            tensor.reshape(-1)[
+                (row[keep] * maxlen + position[keep]) * tensor.shape[2] + i
+            ] = values[keep]
+        return tensor
+
+
+    def ions_to_tensor(self, ions):
+        tensor = self.stack_ions(ions)
+        for i in range(len(tensor)):
+            tensor[i] = self.normalize(tensor[i])
+        return self.transform_input(tensor)
 
 
     def data_to_tensor(self, data):
@@ -78,3 +97,43 @@ class PeptideMS2DataConverter(PeptideDataConverter):
             for i, y in enumerate(tensor)
         ]
 
+
+    def tensor_to_intensity(self, tensor):
+        if len(tensor) == 0:
+            return np.zeros(np.shape(tensor))
+
+        if self.normalize is normalize_by_max:
+            tensor = np.clip(tensor, a_min=0, a_max=None)
+            xmax = np.max(tensor, axis=(1, 2), keepdims=True)
+            return self.transform_output(
+                np.divide(tensor, xmax, out=tensor, where=xmax > 0)
+            )
+
+        return np.stack([
+            self.transform_output(self.normalize(y))
+            for y in tensor
+        ])
+
+
+    def tensor_to_ions_array(self, tensor, sequence_lengths):
+        lengths = np.asarray(sequence_lengths, dtype=np.int64) - 1
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        row = np.repeat(np.arange(len(lengths)), lengths)
+        position = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+        reversed_position = np.repeat(lengths, lengths) - 1 - position
+
+        intensity = np.empty(
+            (offsets[-1], len(self.options.fragments)),
+            dtype=np.float32
+        )
+        if len(tensor) > 0:
+            tensor = self.tensor_to_intensity(tensor)
+            for i, frag in enumerate(self.options.fragments):
+                intensity[:, i] = tensor[
+                    row,
+                    position if not frag[1] else reversed_position,
+                    i
+                ]
+
+        return intensity, offsets
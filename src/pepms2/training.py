@@ -1,5 +1,3 @@
-from keras.callbacks import EarlyStopping, ModelCheckpoint, CSVLogger
-
 from .options import PeptideMS2Options
 from .preprocessing import PeptideMS2DataConverter
 from .modeling import build_model, load_model
@@ -1,16 +1,15 @@
-from keras.models import Sequential
-
-try:
-    from keras.layers import Conv1D, MaxPooling1D, \
-        Dense, Dropout, Flatten, LSTM, Bidirectional
-except ImportError:
-    from keras.layers.convolutional import Conv1D, MaxPooling1D
-    from keras.layers.core import Dense, Dropout, Flatten
-    from keras.layers.recurrent import LSTM
-    from keras.layers.wrappers import Bidirectional
+def build_model(options, metrics=["mean_absolute_percentage_error"]):
+    from keras.models import Sequential
 
+    try:
+        from keras.layers import Conv1D, MaxPooling1D, \
+            Dense, Dropout, Flatten, LSTM, Bidirectional
+    except ImportError:
+        from keras.layers.convolutional import Conv1D, MaxPooling1D
+        from keras.layers.core import Dense, Dropout, Flatten
+        from keras.layers.recurrent import LSTM
+        from keras.layers.wrappers import Bidirectional
 
-def build_model(options, metrics=["mean_absolute_percentage_error"]):
     model = Sequential()
     model.add(Conv1D(
         filters=64,
@@ -32,3 +31,18 @@ def build_model(options, metrics=["mean_absolute_percentage_error"]):
     )
     return model
 
+
+def build_numpy_model(options):
+    from common.inference import NumpyModel, Conv1D, MaxPooling1D, \
+        Dense, Dropout, Flatten, LSTM, Bidirectional
+
+    return NumpyModel([
+        Conv1D(kernel_size=5, activation='relu'),
+        MaxPooling1D(pool_size=2, strides=2),
+        Bidirectional(LSTM(128, return_sequences=True)),
+        Dropout(),
+        Flatten(),
+        Dense(activation='relu'),
+        Dense(activation='relu'),
+        Dense(activation='relu')
+    ])
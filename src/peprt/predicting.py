@@ -1,15 +1,19 @@
 from .options import PeptideRTOptions
 from .preprocessing import PeptideRTDataConverter
-from .modeling import build_model
+from .modeling import build_model, build_numpy_model
 
+import logging
 import pandas as pd
 from collections import OrderedDict
 
 
 class PeptideRTPredictor:
     def __init__(self, options=PeptideRTOptions.default(),
-                 model_path=None, model=None, value_name='irt'):
+                 model_path=None, model=None, value_name='irt',
+                 engine='keras', deduplicate=True):
         self.options = options
+        self.engine = engine
+        self.deduplicate = deduplicate
         self.value_name = value_name
         self.converter = PeptideRTDataConverter(
             self.options, 
@@ -22,14 +26,29 @@ class PeptideRTPredictor:
 
 
     def load_model(self, model_path, **kwargs):
-        model = build_model(self.options, **kwargs)
+        if self.engine == 'numpy':
+            model = build_numpy_model(self.options)
+        elif self.engine == 'keras':
+            model = build_model(self.options, **kwargs)
+        else:
+            raise ValueError('invalid engine: ' + str(self.engine))
         model.load_weights(model_path)
         self.model = model
 
 
     def predict(self, sequences, modifications=None):
-        x = self.converter.peptides_to_tensor(sequences, modifications)
-        y = self.model.predict(x)
+        if self.deduplicate:
+            x, inverse = self.converter.unique_peptides_to_tensor(
+                sequences, modifications
+            )
+            logging.info('unique peptides: {0} of {1} ({2:.1%})'.format(
+                len(x), len(inverse),
+                len(x) / len(inverse) if len(inverse) > 0 else 1
+            ))
+            y = self.model.predict(x)[inverse]
+        else:
+            x = self.converter.peptides_to_tensor(sequences, modifications)
+            y = self.model.predict(x)
         pred = self.converter.tensor_to_rt(y)
 
         return pd.DataFrame.from_dict(OrderedDict([
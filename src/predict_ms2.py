@@ -11,6 +11,22 @@ parser.add_argument(
     '--model',
     help='model file'
 )
+parser.add_argument(
+    '--engine', choices=['keras', 'numpy'], default='keras',
+    help='inference engine for local models; numpy does not require TensorFlow (default: %(default)s)'
+)
+parser.add_argument(
+    '--bucket_by_length', action='store_true', default=False,
+    help='run peptides of the same length together, padded only to that length (requires --engine numpy)'
+)
+parser.add_argument(
+    '--server',
+    help='URL of a running prediction server (e.g. http://127.0.0.1:8765); models are not loaded locally'
+)
+parser.add_argument(
+    '--server_model',
+    help='model name on the prediction server'
+)
 parser.add_argument(
     '--charge', type=int,
     help='precursor charge'
@@ -23,14 +39,28 @@ parser.add_argument(
     '--score', action='store_true', default=False,
     help='calculate similarties between predicted and experimental spectra (input files must contain experimental ions)'
 )
+parser.add_argument(
+    '--format', choices=['json', 'npz'], default='json',
+    help='output ions file format, JSON or columnar NumPy archive (default: %(default)s)'
+)
+parser.add_argument(
+    '--chunk_size', type=int,
+    help='read and predict peptide lists in chunks of N peptides and write predicted ions incrementally (default: %(default)s)'
+)
 
 
 args = parser.parse_args()
 peptide_files = getattr(args, 'in')
 model_file = args.model
+engine = args.engine
+bucket_by_length = args.bucket_by_length
+server_url = args.server
+server_model = args.server_model
 charge = args.charge
 out_files = args.out
 score = args.score
+chunk_size = args.chunk_size
+out_format = args.format
 
 # %%
 import logging
@@ -47,7 +77,7 @@ if globals().get('peptide_files', None) is None:
     peptide_files = list_files(
         path='.',
         pattern='\\.peptide\\.csv$' if not globals().get('score', False) \
-            else '(?<!prediction)\\.ions\\.json$'
+            else '(?<!prediction)\\.ions\\.(json|npz)$'
     )
 
 if len(peptide_files) == 0:
@@ -56,10 +86,13 @@ if len(peptide_files) == 0:
 # %%
 import os
 
-if globals().get('model_file', None) is None:
+if globals().get('model_file', None) is None and \
+    globals().get('server_url', None) is None:
     model_files = list_files(
         path='models' if os.path.isdir('models') else '.',
-        pattern='^epoch_[0-9]+\\.hdf5$',
+        pattern='^epoch_[0-9]+\\.hdf5$' \
+            if globals().get('engine', 'keras') == 'keras' \
+            else '^epoch_[0-9]+\\.(hdf5|npz)$',
         recursive=True
     )
 
@@ -81,7 +114,7 @@ if globals().get('out_files', None) is None:
             out_file = out_file[:-len('.ions')]
             out_file = re.sub('_charge[0-9]+$', '', out_file)
         out_file += ('_charge' + str(charge) if charge is not None else '') + \
-            '.prediction.ions.json'
+            '.prediction.ions.' + (globals().get('out_format', None) or 'json')
         out_files.append(out_file)
 
 if len(out_files) != len(peptide_files):
@@ -92,64 +125,124 @@ if len(out_files) != len(peptide_files):
 import pandas as pd
 
 from pepms2 import PeptideMS2Predictor, PeptideMS2Options
-from util import save_json
+from util import save_json_stream, save_ions, save_ions_arrays, \
+    save_ions_arrays_stream, is_ions_array_file
 
 
 options = PeptideMS2Options.default()
 
 
-logging.info('use model: ' + model_file)
+if globals().get('server_url', None) is not None:
+    from common.serving import PredictionClient, RemoteMS2Predictor
 
-predictor = PeptideMS2Predictor(
-    options=options,
-    model_path=model_file
-)
+    logging.info('use prediction server: ' + server_url)
+
+    predictor = RemoteMS2Predictor(
+        PredictionClient(server_url),
+        model=globals().get('server_model', None)
+    )
+
+else:
+    logging.info('use model: ' + model_file)
+
+    predictor = PeptideMS2Predictor(
+        options=options,
+        model_path=model_file,
+        engine=globals().get('engine', 'keras')
+    )
+
+
+predict_args = {}
+if globals().get('bucket_by_length', False):
+    if globals().get('server_url', None) is not None or \
+        globals().get('engine', 'keras') != 'numpy':
+        raise ValueError('length bucketing requires the numpy engine')
+    predict_args['bucket_by_length'] = True
 
 
 # %%
-import itertools
-from assay.similarity import dot_product
-from util import load_json
-
-def calculate_similarity(ions1, ions2):
-    keys1 = set(ions1['ions'].keys())
-    keys2 = set(ions2['ions'].keys())
-    keys_common = keys1.intersection(keys2)
-    
-    intensity1 = list(itertools.chain.from_iterable(
-        ions1['ions'][k]
-        for k in keys_common
-    ))
-    intensity2 = list(itertools.chain.from_iterable(
-        ions2['ions'][k]
-        for k in keys_common
-    ))
-    intensity1 += list(itertools.chain.from_iterable(
-        ions1['ions'][k]
-        for k in keys1.difference(keys_common)
-    ))
-    intensity2 += [0.0] * (len(intensity1) - len(intensity2))
-    intensity2 += list(itertools.chain.from_iterable(
-        ions2['ions'][k]
-        for k in keys2.difference(keys_common)
-    ))
-    intensity1 += [0.0] * (len(intensity2) - len(intensity1))
-
-    return dot_product(intensity1, intensity2)
-    
+from pepms2.evaluation import PeptideMS2Evaluator
+from util import load_ions
+
+evaluator = PeptideMS2Evaluator(options=options)
+
+
+# %%
+def filter_peptides(peptides):
+    return peptides.loc[
+        (peptides['sequence'].str.len() <= options.max_sequence_length) & \
+        peptides['sequence'].map(lambda s: \
+            all(map(lambda a: a in options.amino_acids, s))) \
+    , :]
+
+
+def predict_peptide_chunks(peptide_file, chunk_size, return_array=False):
+    for i, peptides in enumerate(
+        pd.read_csv(peptide_file, chunksize=chunk_size)
+    ):
+        peptides = filter_peptides(peptides)
+        if len(peptides) == 0:
+            continue
+
+        sequences = peptides['sequence'].values
+        modifications = peptides['modification'].values \
+            if 'modification' in peptides.columns else None
+
+        if return_array:
+            prediction = predictor.predict_array(sequences, modifications, **predict_args)
+
+            logging.info('peptide MS2 predicted: chunk {0}, {1} spectra' \
+                         .format(i + 1, len(prediction['peptide'])))
+
+            yield prediction
+            continue
+
+        prediction = predictor.predict(sequences, modifications, **predict_args)
+
+        logging.info('peptide MS2 predicted: chunk {0}, {1} spectra' \
+                     .format(i + 1, len(prediction)))
+
+        for pred in prediction:
+            if charge is not None:
+                pred['charge'] = charge
+            yield pred
+
 
 # %%
 for peptide_file, out_file in zip(peptide_files, out_files):
-    if not globals().get('score', False) and not peptide_file.endswith('ions.json'):
+    if not globals().get('score', False) and \
+        not peptide_file.endswith(('ions.json', 'ions.npz')) and \
+        globals().get('chunk_size', None):
+        logging.info('predict peptide MS2 in chunks of {0} peptides: {1}' \
+                     .format(chunk_size, peptide_file))
+
+        if is_ions_array_file(out_file):
+            count = save_ions_arrays_stream(
+                out_file,
+                predict_peptide_chunks(
+                    peptide_file, chunk_size,
+                    return_array=True
+                ),
+                labels=[frag[0] for frag in options.fragments],
+                charge=charge
+            )
+        else:
+            count = save_json_stream(
+                predict_peptide_chunks(peptide_file, chunk_size),
+                out_file
+            )
+
+        logging.info('peptide MS2 saved: {0}, {1} spectra' \
+            .format(out_file, count))
+        continue
+
+    if not globals().get('score', False) and \
+        not peptide_file.endswith(('ions.json', 'ions.npz')):
         logging.info('load peptides: ' + peptide_file)
         
         peptides = pd.read_csv(peptide_file)
 
-        peptides = peptides.loc[
-            (peptides['sequence'].str.len() <= options.max_sequence_length) & \
-            peptides['sequence'].map(lambda s: \
-                all(map(lambda a: a in options.amino_acids, s))) \
-        , :]
+        peptides = filter_peptides(peptides)
 
         logging.info('peptides loaded: {0} valid peptides' \
                     .format(len(peptides)))
@@ -160,7 +253,7 @@ for peptide_file, out_file in zip(peptide_files, out_files):
     else:
         logging.info('load peptide ions: ' + peptide_file)
 
-        ions = load_json(peptide_file)
+        ions = load_ions(peptide_file)
 
         ions = list(filter(
             lambda d: len(d['peptide']) <= options.max_sequence_length and \
@@ -175,8 +268,43 @@ for peptide_file, out_file in zip(peptide_files, out_files):
         modifications = [d.get('modification', None) for d in ions]
 
     logging.info('predict peptide MS2: ' + peptide_file)
+
+    if is_ions_array_file(out_file) and not globals().get('score', False):
+        prediction = predictor.predict_array(sequences, modifications, **predict_args)
+
+        logging.info('peptide MS2 predicted: {0} spectra' \
+                     .format(len(prediction['peptide'])))
+
+        logging.info('saving peptide MS2: {0}' \
+                     .format(out_file))
+
+        save_ions_arrays(
+            out_file,
+            peptide=prediction['peptide'],
+            modification=prediction['modification'],
+            charge=[charge] * len(prediction['peptide']) \
+                if charge is not None else None,
+            intensity=prediction['intensity'],
+            offsets=prediction['offsets'],
+            labels=prediction['labels']
+        )
+        count = len(prediction['peptide'])
+
+        logging.info('peptide MS2 saved: {0}, {1} spectra' \
+            .format(out_file, count))
+        continue
     
-    prediction = predictor.predict(sequences, modifications)
+    if globals().get('score', False) and \
+        isinstance(predictor, PeptideMS2Predictor):
+        y = predictor.predict_tensor(sequences, modifications, **predict_args)
+        prediction = predictor.tensor_to_prediction(
+            y, sequences, modifications
+        )
+        predicted_intensity = predictor.converter.tensor_to_intensity(y)
+        del y
+    else:
+        prediction = predictor.predict(sequences, modifications, **predict_args)
+        predicted_intensity = None
 
     logging.info('peptide MS2 predicted: {0} spectra' \
                  .format(len(prediction)))
@@ -188,7 +316,7 @@ for peptide_file, out_file in zip(peptide_files, out_files):
     logging.info('saving peptide MS2: {0}' \
                  .format(out_file))
 
-    save_json(prediction, out_file)
+    save_ions(prediction, out_file)
 
     logging.info('peptide MS2 saved: {0}, {1} spectra' \
         .format(out_file, len(prediction)))
@@ -199,16 +327,20 @@ for peptide_file, out_file in zip(peptide_files, out_files):
         scores = pd.DataFrame.from_dict({
             'sequence': sequences,
             'modification' : modifications,
-            'charge': [d['charge'] for d in ions],
-            'similarity': [
-                calculate_similarity(d, pred)
-                for d, pred in zip(ions, prediction)
-            ]
+            'charge': [d.get('charge', charge) for d in ions],
+            'length': [len(seq) for seq in sequences],
+            **evaluator.evaluate(
+                ions,
+                predicted_intensity \
+                    if predicted_intensity is not None \
+                    else prediction
+            )
         })
 
         out_score_file = os.path.splitext(out_file)[0]
         if out_score_file.endswith('.ions'):
             out_score_file = out_score_file[:-len('.ions')]
+        out_report_file = out_score_file + '.ions_score_report.csv'
         out_score_file += '.ions_score.csv' 
 
         scores.to_csv(out_score_file, index=False)
@@ -216,9 +348,16 @@ for peptide_file, out_file in zip(peptide_files, out_files):
         logging.info('scores saved: {0}, {1} peptides' \
             .format(out_score_file, len(scores)))
 
-        logging.info('intensity similarity: median={0}, quantile=({1}, {2})'.format(
-            scores['similarity'].median(),
-            scores['similarity'].quantile(0.25),
-            scores['similarity'].quantile(0.75)
-        ))
+        report = evaluator.report(scores)
+        report.to_csv(out_report_file, index=False)
+
+        logging.info('score report saved: {0}, {1} groups' \
+            .format(out_report_file, len(report)))
 
+        for k in evaluator.metrics:
+            logging.info('{0}: median={1}, quantile=({2}, {3})'.format(
+                'intensity similarity' if k == 'similarity' else k,
+                scores[k].median(),
+                scores[k].quantile(0.25),
+                scores[k].quantile(0.75)
+            ))
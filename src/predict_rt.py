@@ -11,6 +11,18 @@ parser.add_argument(
     '--model',
     help='model file'
 )
+parser.add_argument(
+    '--engine', choices=['keras', 'numpy'], default='keras',
+    help='inference engine for local models; numpy does not require TensorFlow (default: %(default)s)'
+)
+parser.add_argument(
+    '--server',
+    help='URL of a running prediction server (e.g. http://127.0.0.1:8765); models are not loaded locally'
+)
+parser.add_argument(
+    '--server_model',
+    help='model name on the prediction server'
+)
 parser.add_argument(
     '--reference',
     help='reference file'
@@ -27,6 +39,9 @@ parser.add_argument(
 args = parser.parse_args()
 peptide_files = getattr(args, 'in')
 model_file = args.model
+engine = args.engine
+server_url = args.server
+server_model = args.server_model
 reference_file = args.reference
 out_files = args.out
 score = args.score
@@ -55,10 +70,13 @@ if len(peptide_files) == 0:
 # %%
 import os
 
-if globals().get('model_file', None) is None:
+if globals().get('model_file', None) is None and \
+    globals().get('server_url', None) is None:
     model_files = list_files(
         path='models' if os.path.isdir('models') else '.',
-        pattern='^epoch_[0-9]+\\.hdf5$',
+        pattern='^epoch_[0-9]+\\.hdf5$' \
+            if globals().get('engine', 'keras') == 'keras' \
+            else '^epoch_[0-9]+\\.(hdf5|npz)$',
         recursive=True
     )
 
@@ -92,12 +110,26 @@ from peprt import PeptideRTPredictor, PeptideRTOptions
 options = PeptideRTOptions.default()
 
 
-logging.info('use model: ' + model_file)
+if globals().get('server_url', None) is not None:
+    from common.serving import PredictionClient, RemoteRTPredictor
 
-predictor = PeptideRTPredictor(
-    options=options,
-    model_path=model_file
-)
+    logging.info('use prediction server: ' + server_url)
+
+    predictor = RemoteRTPredictor(
+        PredictionClient(server_url),
+        model_type='rt',
+        model=globals().get('server_model', None),
+        value_name='irt'
+    )
+
+else:
+    logging.info('use model: ' + model_file)
+
+    predictor = PeptideRTPredictor(
+        options=options,
+        model_path=model_file,
+        engine=globals().get('engine', 'keras')
+    )
 
 # %%
 if globals().get('reference_file', None) is not None:
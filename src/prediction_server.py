@@ -0,0 +1,151 @@
+import argparse
+
+parser = argparse.ArgumentParser(
+    description='Run a local prediction server that keeps models loaded.'
+)
+parser.add_argument(
+    '--ms2', nargs='+',
+    help='MS2 model files, optionally named as NAME=FILE (e.g. charge2=epoch_035.hdf5)'
+)
+parser.add_argument(
+    '--rt', nargs='+',
+    help='retention time/iRT model files, optionally named as NAME=FILE'
+)
+parser.add_argument(
+    '--im', nargs='+',
+    help='ion mobility model files, optionally named as NAME=FILE'
+)
+parser.add_argument(
+    '--detectability', nargs='+',
+    help='detectability model files, optionally named as NAME=FILE'
+)
+parser.add_argument(
+    '--engine', choices=['keras', 'numpy'], default='keras',
+    help='inference engine; numpy does not require TensorFlow (default: %(default)s)'
+)
+parser.add_argument(
+    '--host', default='127.0.0.1',
+    help='host address to listen on (default: %(default)s)'
+)
+parser.add_argument(
+    '--port', type=int, default=8765,
+    help='port to listen on (default: %(default)s)'
+)
+parser.add_argument(
+    '--max_batch_size', type=int, default=4096,
+    help='maximum number of peptides combined into one model call (default: %(default)s)'
+)
+parser.add_argument(
+    '--max_delay', type=float, default=0.01,
+    help='maximum time in seconds to wait for concurrent requests (default: %(default)s)'
+)
+
+args = parser.parse_args()
+ms2_models = args.ms2
+rt_models = args.rt
+im_models = args.im
+detectability_models = args.detectability
+engine = args.engine
+host = args.host
+port = args.port
+max_batch_size = args.max_batch_size
+max_delay = args.max_delay
+
+# %%
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(filename)s: [%(levelname)s] %(message)s'
+)
+
+# %%
+def parse_model_files(model_files):
+    result = []
+    for x in model_files or []:
+        name, sep, model_file = x.partition('=')
+        if not sep:
+            name, model_file = 'default', x
+        result.append((name, model_file))
+    return result
+
+
+ms2_models = parse_model_files(globals().get('ms2_models', None))
+rt_models = parse_model_files(globals().get('rt_models', None))
+im_models = parse_model_files(globals().get('im_models', None))
+detectability_models = \
+    parse_model_files(globals().get('detectability_models', None))
+
+if not any((ms2_models, rt_models, im_models, detectability_models)):
+    raise ValueError('no model file')
+
+# %%
+from common.serving import PredictionService, create_prediction_server
+
+service = PredictionService(
+    max_batch_size=max_batch_size,
+    max_delay=max_delay
+)
+
+engine = globals().get('engine', 'keras')
+
+if ms2_models:
+    from pepms2 import PeptideMS2Predictor, PeptideMS2Options
+
+    for name, model_file in ms2_models:
+        logging.info('load MS2 model: {0}={1}'.format(name, model_file))
+        service.add_predictor('ms2', PeptideMS2Predictor(
+            options=PeptideMS2Options.default(),
+            model_path=model_file,
+            engine=engine
+        ), name=name)
+
+if rt_models:
+    from peprt import PeptideRTPredictor, PeptideRTOptions
+
+    for name, model_file in rt_models:
+        logging.info('load iRT model: {0}={1}'.format(name, model_file))
+        service.add_predictor('rt', PeptideRTPredictor(
+            options=PeptideRTOptions.default(),
+            model_path=model_file,
+            engine=engine
+        ), name=name)
+
+if im_models:
+    from pepim import ion_mobility_options, ion_mobility_predictor
+
+    for name, model_file in im_models:
+        logging.info('load ion mobility model: {0}={1}' \
+                     .format(name, model_file))
+        service.add_predictor('im', ion_mobility_predictor(
+            options=ion_mobility_options(),
+            model_path=model_file,
+            engine=engine
+        ), name=name)
+
+if detectability_models:
+    from pepdetect import PeptideDetectabilityPredictor, \
+        PeptideDetectabilityOptions
+
+    for name, model_file in detectability_models:
+        logging.info('load detectability model: {0}={1}' \
+                     .format(name, model_file))
+        service.add_predictor('detectability', PeptideDetectabilityPredictor(
+            options=PeptideDetectabilityOptions.default(),
+            model_path=model_file,
+            engine=engine
+        ), name=name)
+
+# %%
+server = create_prediction_server(service, host=host, port=port)
+
+logging.info('prediction server listening: http://{0}:{1}' \
+             .format(host, port))
+
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    server.server_close()
+    logging.info('prediction server stopped: {0}'.format(service.models()))
@@ -37,6 +37,19 @@ withinrun_group.add_argument(
 )
 parser.set_defaults(within_run=False)
 
+parser.add_argument(
+    '--workers', type=int, default=1,
+    help='number of worker processes for combining replicates; only used where processes are forked and not with --state, otherwise replicates are combined serially (default: %(default)s)'
+)
+parser.add_argument(
+    '--spill_threshold', type=int,
+    help='stream input assays and keep at most N of them in memory while grouping, spilling the rest to temporary files (default: keep all in memory)'
+)
+parser.add_argument(
+    '--state',
+    help='replicate state file; if it exists, merge the input assays into the saved replicates and write the updated full library, then save the state back (default: no state)'
+)
+
 args = parser.parse_args()
 assay_files = getattr(args, 'in')
 out_file = args.out
@@ -44,6 +57,9 @@ action = args.action
 score = args.score
 score_ascending = args.score_ascending
 within_run = args.within_run
+workers = args.workers
+spill_threshold = args.spill_threshold
+state_file = args.state
 
 # %%
 import logging
@@ -59,7 +75,7 @@ from util import list_files
 if globals().get('assay_files', None) is None:
     assay_files = list_files(
         path='.', 
-        pattern='\\.assay\\.pickle$'
+        pattern='\\.assay\\.(pickle|npz)$'
     )
     
 if len(assay_files) == 0:
@@ -93,27 +109,41 @@ if globals().get('out_file', None) is None:
     if len(assay_files) > 1:
         out_file += '_' + str(len(assay_files))
     if action == 'consensus':
-        out_file += '_consensus.assay.pickle'
+        out_file += '_consensus.assay'
     else:
-        out_file += '_nonredundant.assay.pickle'
+        out_file += '_nonredundant.assay'
+    out_file += os.path.splitext(assay_files[0])[1]
 
 # %%
-from util import save_pickle, load_pickle
+from assay.store import save_assays, load_assays
 from assay.combine import peptide_group_key
 
 # %%
-assays = []
-for assay_file in assay_files:
-    logging.info('loading assays: ' + assay_file)  
-    
-    assay_data = load_pickle(assay_file)
-    assays.extend(assay_data)
-    
-    logging.info('assays loaded: {0}, {1} spectra' \
-        .format(assay_file, len(assay_data)))
+if globals().get('spill_threshold', None) is None:
+    assays = []
+    for assay_file in assay_files:
+        logging.info('loading assays: ' + assay_file)  
+        
+        assay_data = load_assays(assay_file)
+        assays.extend(assay_data)
+        
+        logging.info('assays loaded: {0}, {1} spectra' \
+            .format(assay_file, len(assay_data)))
+
+    logging.info('assays loaded: {0} spectra totally' \
+        .format(len(assays))) 
+
+else:
+    def load_assay_files(assay_files):
+        for assay_file in assay_files:
+            logging.info('streaming assays: ' + assay_file)
 
-logging.info('assays loaded: {0} spectra totally' \
-    .format(len(assays))) 
+            yield from load_assays(assay_file, return_generator=True)
+
+    logging.info('grouping assays with at most {0} spectra buffered' \
+        .format(spill_threshold))
+
+    assays = load_assay_files(assay_files)
 
 # %%
 group_key = peptide_group_key(
@@ -145,7 +175,50 @@ if action == 'consensus':
 else:
     logging.info('removing redundant assays')
 
-assays = combiner.remove_redundant(assays)
+if globals().get('state_file', None) is None:
+    if globals().get('workers', None) is not None and workers > 1:
+        logging.info('use workers: ' + str(workers))
+
+    assays = combiner.remove_redundant(
+        assays,
+        workers=globals().get('workers', None),
+        spill_threshold=globals().get('spill_threshold', None)
+    )
+
+else:
+    from assay.combine import save_replicate_states, load_replicate_states
+
+    if os.path.isfile(state_file):
+        logging.info('loading replicate states: ' + state_file)
+
+        states = load_replicate_states(
+            state_file,
+            config=combiner.combiner_config()
+        )
+
+        logging.info('replicate states loaded: {0}, {1} groups' \
+            .format(state_file, len(states)))
+    else:
+        states = {}
+
+    if globals().get('workers', None) is not None and workers > 1:
+        logging.warning('workers are not used when updating replicate ' \
+            'states, combine serially')
+
+    assays = combiner.update(
+        states, assays,
+        spill_threshold=globals().get('spill_threshold', None)
+    )
+
+    logging.info('saving replicate states: ' + state_file)
+
+    save_replicate_states(
+        states, state_file,
+        config=combiner.combiner_config()
+    )
+
+    logging.info('replicate states saved: {0}, {1} groups' \
+        .format(state_file, len(states)))
 
 logging.info('redundant assays removed: {0} spectra remaining' \
     .format(len(assays)))
@@ -154,7 +227,7 @@ logging.info('redundant assays removed: {0} spectra remaining' \
 logging.info('saving assays: {0}' \
     .format(out_file))
 
-save_pickle(assays, out_file)
+save_assays(assays, out_file)
     
 logging.info('assays saved: {0}, {1} spectra' \
     .format(out_file, len(assays)))
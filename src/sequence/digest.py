@@ -1,4 +1,5 @@
 import itertools
+import logging
 import pandas as pd
 import numpy as np
 import re
@@ -105,7 +106,7 @@ def filter_peptides_by_mass(peptides,
             mass_calculator.mw(s) \
             if all(map(lambda aa: aa in mass_calculator.aa_residues, s)) \
             else np.nan
-        )
+        ).astype(float)
     )
 
     if min_peptide_mass is not None:
@@ -116,19 +117,77 @@ def filter_peptides_by_mass(peptides,
     return peptides
 
 
+def _digest_shard(args):
+    proteins, kwargs = args
+    return digest(proteins, **kwargs)
+
+
+def digest_parallel(proteins, workers=None, shard_size=500, **kwargs):
+    import multiprocessing
+
+    def _shards():
+        iterator = iter(proteins)
+        while True:
+            shard = [
+                {'id': protein['id'], 'sequence': protein['sequence']}
+                for protein in itertools.islice(iterator, shard_size)
+            ]
+            if len(shard) == 0:
+                break
+            yield shard, kwargs
+
+    # the scripts calling this have no __main__ guard, so worker processes
+    # can only be forked; other start methods would re-run the script
+    if multiprocessing.get_start_method() != 'fork':
+        logging.warning(
+            'multiprocessing start method is not fork, digest serially'
+        )
+        frames = [
+            frame
+            for frame in map(_digest_shard, _shards())
+            if len(frame) > 0
+        ]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            frames = [
+                frame
+                for frame in pool.imap(_digest_shard, _shards())
+                if len(frame) > 0
+            ]
+
+    if len(frames) == 0:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
 def group_duplicated_peptides(peptides):
-    agg_dict = {
-        k: lambda x: ';'.join(map(str, x)) \
-            if len(x) > 1 else x.iloc[0]
-        for k in peptides.columns
-        if k not in ['sequence', 'missedCleavages']
-    }
+    codes, sequences = pd.factorize(peptides['sequence'], sort=True)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(sequences))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    duplicated = np.flatnonzero(counts > 1)
+
+    def _join(column):
+        values = column.values[order]
+        result = values[starts] if len(values) > 0 else values
+        if len(duplicated) > 0:
+            result = result.astype(object)
+            for i in duplicated:
+                result[i] = ';'.join(map(
+                    str, values[starts[i]:(starts[i] + counts[i])]
+                ))
+        return result
+
+    result = {'sequence': np.asarray(sequences, dtype=object)}
+    for k in peptides.columns:
+        if k not in ['sequence', 'missedCleavages']:
+            result[k] = _join(peptides[k])
     if 'missedCleavages' in peptides.columns:
-        agg_dict['missedCleavages'] = min
-    
-    return peptides \
-        .groupby(by='sequence', as_index=False) \
-        .agg(agg_dict)
+        values = peptides['missedCleavages'].values[order]
+        result['missedCleavages'] = np.minimum.reduceat(values, starts) \
+            if len(values) > 0 else values
+
+    return pd.DataFrame(result)
 
 
 
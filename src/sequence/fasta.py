@@ -1,5 +1,4 @@
 import re
-from Bio import SeqIO
 
 
 fasta_rules = {
@@ -38,28 +37,66 @@ def build_fasta_header_parser(parsing_rule):
 
 
 
-def read_fasta(file, parsing_rule='default', return_iterator=False):
+def iter_fasta_records(file, buffer_size=1 << 20):
+    if isinstance(file, str):
+        with open(file, 'r', buffering=buffer_size) as f:
+            yield from iter_fasta_records(f)
+        return
+
+    title = None
+    lines = []
+    for line in file:
+        if line.startswith('>'):
+            if title is not None:
+                yield title, ''.join(lines)
+            title = line[1:].rstrip()
+            lines = []
+        elif title is not None:
+            line = line.strip()
+            if line:
+                lines.append(line.replace(' ', ''))
+
+    if title is not None:
+        yield title, ''.join(lines)
+
+
+def read_fasta(file, parsing_rule='default', return_iterator=False,
+               fields=None, use_biopython=False):
     header_parser = build_fasta_header_parser(parsing_rule)
+    # the first word of the title is the id of the default rule; any other
+    # field needs the header parsed
+    parse_header = fields is None or \
+        any(k not in ('id', 'sequence') for k in fields) or \
+        ('id' in fields and parsing_rule != 'default')
 
-    def _parse(record):
-        result = header_parser(record.description)
+    def _parse(title, sequence):
+        result = header_parser(title) if parse_header else None
 
         if result is None:
             result = {
-                'id': record.id,
-                'description': record.description
+                'id': title.split(None, 1)[0] if title else '',
+                'description': title
             }
 
-        result['sequence'] = str(record.seq)
+        result['sequence'] = sequence
+
+        if fields is not None:
+            result = {k: result.get(k, None) for k in fields}
 
         return result
 
-    fasta = SeqIO.parse(file, 'fasta')
-    proteins = (_parse(record) for record in fasta)
+    if use_biopython:
+        from Bio import SeqIO
+        records = (
+            (record.description, str(record.seq))
+            for record in SeqIO.parse(file, 'fasta')
+        )
+    else:
+        records = iter_fasta_records(file)
+
+    proteins = (_parse(title, sequence) for title, sequence in records)
 
     if not return_iterator:
         proteins = list(proteins)
 
     return proteins
-
-
@@ -82,7 +82,7 @@ if globals().get('train_dir', None) is None:
 if globals().get('data_files', None) is None:
     data_files = list_files(
         path=train_dir,
-        pattern='(?<!prediction)\\.ions\\.json$',
+        pattern='(?<!prediction)\\.ions\\.(json|npz)$',
         recursive=True
     )
 
@@ -108,13 +108,13 @@ from pepms2 import PeptideMS2Options, PeptideMS2Trainer
 options = PeptideMS2Options.default()
 
 # %%
-from util import load_json, save_json
+from util import load_ions, save_json
 
 data = []
 for data_file in data_files:
     logging.info('load data: ' + data_file)
 
-    data_ = load_json(data_file)
+    data_ = load_ions(data_file)
 
     data_ = list(filter(
         lambda d: len(d['peptide']) <= options.max_sequence_length and \
@@ -1,2 +1,3 @@
 from .io import *
 from .dict import *
+from .ions import *
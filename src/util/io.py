@@ -44,6 +44,18 @@ def save_json(data, file, **kwargs):
     with open(file, 'w') as f:
         json.dump(data, f, cls=NumpyEncoder, **kwargs)        
 
+def save_json_stream(data, file, **kwargs):
+    count = 0
+    with open(file, 'w') as f:
+        f.write('[')
+        for x in data:
+            if count > 0:
+                f.write(', ')
+            json.dump(x, f, cls=NumpyEncoder, **kwargs)
+            count += 1
+        f.write(']')
+    return count
+
 def load_json(file, **kwargs):
     with open(file, 'r') as f:
         return json.load(f, **kwargs)
@@ -0,0 +1,343 @@
+import itertools
+import json
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import numpy as np
+
+from .io import NumpyEncoder, save_json, load_json
+
+
+def is_ions_array_file(file):
+    return file.endswith('.npz')
+
+
+def ions_to_arrays(ions, labels=None):
+    ions = list(ions)
+
+    if labels is None:
+        labels = list(dict.fromkeys(itertools.chain.from_iterable(
+            entry['ions'].keys() for entry in ions
+        )))
+
+    lengths = np.array([
+        max((len(v) for v in entry['ions'].values()), default=0)
+        for entry in ions
+    ], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    intensity = np.zeros((offsets[-1], len(labels)), dtype=np.float32)
+    label_mask = np.zeros((len(ions), len(labels)), dtype=bool)
+    for i, entry in enumerate(ions):
+        for j, label in enumerate(labels):
+            x = entry['ions'].get(label, None)
+            if x is None:
+                continue
+            label_mask[i, j] = True
+            intensity[offsets[i]:(offsets[i] + len(x)), j] = x
+
+    result = {
+        'peptide': [entry['peptide'] for entry in ions],
+        'modification': [entry.get('modification', None) for entry in ions],
+        'charge': [entry.get('charge', None) for entry in ions],
+        'intensity': intensity,
+        'offsets': offsets,
+        'labels': labels,
+        'label_mask': label_mask
+    }
+
+    if any('metadata' in entry for entry in ions):
+        result['metadata'] = [entry.get('metadata', None) for entry in ions]
+
+    return result
+
+
+def save_ions_arrays(file, peptide, intensity, offsets, labels,
+                     modification=None, charge=None,
+                     label_mask=None, metadata=None):
+    def _to_int(x):
+        if x is None or (isinstance(x, float) and np.isnan(x)):
+            return 0
+        return int(x)
+
+    arrays = {
+        'peptide': np.array([str(x) for x in peptide], dtype=str),
+        'intensity': np.asarray(intensity, dtype=np.float32),
+        'offsets': np.asarray(offsets, dtype=np.int64),
+        'labels': np.array(labels, dtype=str)
+    }
+    if modification is not None:
+        arrays['modification'] = \
+            np.array([_to_str(x) for x in modification], dtype=str)
+    if charge is not None:
+        arrays['charge'] = \
+            np.array([_to_int(x) for x in charge], dtype=np.int32)
+    if label_mask is not None:
+        arrays['label_mask'] = np.asarray(label_mask, dtype=bool)
+    if metadata is not None:
+        arrays['metadata'] = np.array([
+            json.dumps(x, cls=NumpyEncoder) if x is not None else ''
+            for x in metadata
+        ], dtype=str)
+
+    # store uncompressed so that the intensity matrix can be memory-mapped
+    with open(file, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def _to_str(x):
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return ''
+    return str(x)
+
+
+def _write_npz_member(zf, name, dtype, shape, blocks):
+    with zf.open(name + '.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array_header_1_0(f, {
+            'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            'fortran_order': False,
+            'shape': shape
+        })
+        for block in blocks:
+            if isinstance(block, bytes):
+                f.write(block)
+            else:
+                shutil.copyfileobj(block, f)
+
+
+def save_ions_arrays_stream(file, chunks, labels=None, charge=None,
+                            block_size=100000):
+    # chunks are spooled to temporary files and copied into the archive
+    # at the end, so that only one chunk is held in memory
+    with tempfile.TemporaryDirectory(
+        dir=os.path.dirname(os.path.abspath(file))
+    ) as temp_dir:
+        spool = {
+            name: open(os.path.join(temp_dir, name), 'w+b')
+            for name in ('peptide', 'modification', 'intensity', 'offsets')
+        }
+        width = {'peptide': 1, 'modification': 1}
+        count = 0
+        rows = 0
+        try:
+            for chunk in chunks:
+                if chunk.get('labels', None) is not None:
+                    labels = list(chunk['labels'])
+
+                for name, values in (
+                    ('peptide', chunk['peptide']),
+                    ('modification', chunk['modification'])
+                ):
+                    values = [_to_str(x) for x in values]
+                    width[name] = max(
+                        width[name], max(map(len, values), default=0)
+                    )
+                    spool[name].write(
+                        ''.join(x + '\n' for x in values).encode('utf-8')
+                    )
+
+                spool['intensity'].write(np.ascontiguousarray(
+                    chunk['intensity'], dtype=np.float32
+                ).tobytes())
+                offsets = np.asarray(chunk['offsets'], dtype=np.int64)
+                spool['offsets'].write((offsets[1:] + rows).tobytes())
+                rows += int(offsets[-1])
+                count += len(chunk['peptide'])
+
+            if labels is None:
+                raise ValueError('no labels')
+
+            def _lines(name):
+                f = spool[name]
+                f.seek(0)
+                while True:
+                    lines = [
+                        line.decode('utf-8').rstrip('\n')
+                        for line in itertools.islice(f, block_size)
+                    ]
+                    if len(lines) == 0:
+                        break
+                    yield np.array(
+                        lines, dtype='<U' + str(width[name])
+                    ).tobytes()
+
+            def _rewind(name):
+                spool[name].seek(0)
+                return spool[name]
+
+            # store uncompressed so that the intensity matrix can be
+            # memory-mapped
+            with zipfile.ZipFile(
+                file, 'w', compression=zipfile.ZIP_STORED, allowZip64=True
+            ) as zf:
+                _write_npz_member(
+                    zf, 'peptide', '<U' + str(width['peptide']),
+                    (count,), _lines('peptide')
+                )
+                _write_npz_member(
+                    zf, 'intensity', np.float32,
+                    (rows, len(labels)), [_rewind('intensity')]
+                )
+                _write_npz_member(
+                    zf, 'offsets', np.int64, (count + 1,),
+                    [np.zeros(1, dtype=np.int64).tobytes(),
+                     _rewind('offsets')]
+                )
+                labels = np.array(labels, dtype=str)
+                _write_npz_member(
+                    zf, 'labels', labels.dtype, labels.shape,
+                    [labels.tobytes()]
+                )
+                _write_npz_member(
+                    zf, 'modification', '<U' + str(width['modification']),
+                    (count,), _lines('modification')
+                )
+                if charge is not None:
+                    _write_npz_member(
+                        zf, 'charge', np.int32, (count,),
+                        (
+                            np.full(
+                                min(block_size, count - i), int(charge),
+                                dtype=np.int32
+                            ).tobytes()
+                            for i in range(0, count, block_size)
+                        )
+                    )
+        finally:
+            for f in spool.values():
+                f.close()
+
+    return count
+
+
+def memmap_npz_member(file, name, mode='r'):
+    with zipfile.ZipFile(file) as zf:
+        info = zf.getinfo(name + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with open(file, 'rb') as f:
+        f.seek(info.header_offset)
+        header = f.read(30)
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if dtype.hasobject:
+        return None
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype=dtype)
+
+    return np.memmap(
+        file, dtype=dtype, mode=mode, shape=shape,
+        order='F' if fortran_order else 'C',
+        offset=offset
+    )
+
+
+class IonsArrayFile:
+    def __init__(self, file, mmap_mode='r'):
+        self.file = file
+
+        with np.load(file, allow_pickle=False) as data:
+            self.peptide = data['peptide']
+            self.offsets = data['offsets']
+            self.labels = data['labels'].tolist()
+            self.modification = data['modification'] \
+                if 'modification' in data.files else None
+            self.charge = data['charge'] \
+                if 'charge' in data.files else None
+            self.label_mask = data['label_mask'] \
+                if 'label_mask' in data.files else None
+            self.metadata = data['metadata'] \
+                if 'metadata' in data.files else None
+
+            intensity = None
+            if mmap_mode is not None:
+                intensity = memmap_npz_member(
+                    file, 'intensity', mode=mmap_mode
+                )
+            if intensity is None:
+                intensity = data['intensity']
+            self.intensity = intensity
+
+
+    def __len__(self):
+        return len(self.peptide)
+
+
+    def __iter__(self):
+        return (self.entry(i) for i in range(len(self)))
+
+
+    def __getitem__(self, index):
+        return self.entry(index)
+
+
+    def intensity_matrix(self, index):
+        return self.intensity[self.offsets[index]:self.offsets[index + 1]]
+
+
+    def entry(self, index):
+        if index < 0:
+            index += len(self)
+
+        matrix = np.asarray(self.intensity_matrix(index))
+        ions = {
+            label: matrix[:, j].tolist()
+            for j, label in enumerate(self.labels)
+            if self.label_mask is None or self.label_mask[index, j]
+        }
+
+        result = {
+            'peptide': str(self.peptide[index]),
+            'modification': None,
+            'charge': None,
+            'ions': ions
+        }
+
+        if self.modification is not None:
+            modification = str(self.modification[index])
+            if modification != '':
+                result['modification'] = modification
+
+        if self.charge is not None:
+            charge = int(self.charge[index])
+            if charge != 0:
+                result['charge'] = charge
+
+        if self.metadata is not None:
+            metadata = str(self.metadata[index])
+            if metadata != '':
+                result['metadata'] = json.loads(metadata)
+
+        return result
+
+
+def save_ions(ions, file, **kwargs):
+    if is_ions_array_file(file):
+        save_ions_arrays(file, **ions_to_arrays(ions))
+    else:
+        save_json(ions, file, **kwargs)
+
+
+def load_ions(file, return_generator=False, mmap_mode='r', **kwargs):
+    if is_ions_array_file(file):
+        result = iter(IonsArrayFile(file, mmap_mode=mmap_mode))
+        if not return_generator:
+            result = list(result)
+        return result
+    else:
+        result = load_json(file, **kwargs)
+        if return_generator:
+            result = iter(result)
+        return result
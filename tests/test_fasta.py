@@ -0,0 +1,49 @@
+import io
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from sequence.fasta import read_fasta
+
+
+FASTA = {
+    'default': \
+        '>P12345 Some protein\nMKTAYIAK\nQRQISFVK\n' + \
+        '>P67890\nMSDNE\n' + \
+        '> leading space\nMA\n' + \
+        '>\nMK\n',
+    'UniProt': \
+        '>sp|P12345|ABC_HUMAN Some protein OS=Homo sapiens OX=9606 ' + \
+        'GN=ABC PE=1 SV=2\nMKTAYIAK\nQRQISFVK\n' + \
+        '>tr|Q11111|Q11111_HUMAN Other protein OS=Homo sapiens OX=9606 ' + \
+        'PE=4 SV=1\nMSDNE\n' + \
+        '>not a UniProt title\nMA\n'
+}
+
+FIELDS = [
+    'id', 'description', 'sequence', 'database', 'name', 'organism', 'gene'
+]
+
+
+def field_combinations(rule):
+    fields = FIELDS if rule == 'UniProt' else FIELDS[:3]
+    for n in range(1, len(fields) + 1):
+        yield from itertools.combinations(fields, n)
+
+
+@pytest.mark.parametrize('rule', list(FASTA))
+def test_fields_match_full_parse(rule):
+    full = read_fasta(io.StringIO(FASTA[rule]), parsing_rule=rule)
+
+    for fields in field_combinations(rule):
+        proteins = read_fasta(
+            io.StringIO(FASTA[rule]), parsing_rule=rule, fields=list(fields)
+        )
+        assert proteins == [
+            {k: p.get(k, None) for k in fields} for p in full
+        ], fields
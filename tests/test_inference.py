@@ -0,0 +1,158 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+pytest.importorskip('tensorflow')
+
+from common.inference import export_weights
+from pepms2 import PeptideMS2Options
+from pepms2.preprocessing import PeptideMS2DataConverter
+import pepms2.modeling
+from peprt import PeptideRTOptions
+from peprt.preprocessing import PeptideRTDataConverter
+import peprt.modeling
+from pepdetect import PeptideDetectabilityOptions
+from pepdetect.preprocessing import PeptideDetectabilityDataConverter
+import pepdetect.modeling
+
+
+TOLERANCE = 1e-4
+
+
+def random_peptides(options, n, min_length=7, seed=0):
+    rng = np.random.default_rng(seed)
+    amino_acids = [a for a in options.amino_acids if a.isalpha()]
+    lengths = rng.integers(
+        min_length, options.max_sequence_length + 1, size=n
+    )
+    return [''.join(rng.choice(amino_acids, size=l)) for l in lengths]
+
+
+def ms2_input(options, sequences):
+    return PeptideMS2DataConverter(options) \
+        .peptides_to_tensor(sequences, None)
+
+
+def rt_input(options, sequences):
+    return PeptideRTDataConverter(options) \
+        .peptides_to_tensor(sequences, None)
+
+
+def detectability_input(options, sequences):
+    return PeptideDetectabilityDataConverter(options) \
+        .sequences_to_tensor(pd.DataFrame({
+            'sequence': sequences,
+            'nTerminal': [''] * len(sequences),
+            'cTerminal': [''] * len(sequences)
+        }))
+
+
+MODELS = {
+    'ms2': (PeptideMS2Options.default, pepms2.modeling, ms2_input),
+    'rt': (PeptideRTOptions.default, peprt.modeling, rt_input),
+    'detectability': (
+        PeptideDetectabilityOptions.default, pepdetect.modeling,
+        detectability_input
+    )
+}
+
+
+def saved_keras_model(modeling, options, path, seed=0):
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(seed)
+    model = modeling.build_model(options)
+
+    # positive biases and output weights keep the ReLU layers active
+    # with random weights
+    rng = np.random.default_rng(seed)
+    weights = [
+        rng.uniform(0, 0.1, size=w.shape).astype(w.dtype) \
+            if w.ndim == 1 else w
+        for w in model.get_weights()
+    ]
+    weights[-2] = np.abs(weights[-2])
+    model.set_weights(weights)
+    model.save(path)
+    return model
+
+
+@pytest.mark.parametrize('model_type', list(MODELS.keys()))
+def test_numpy_model_matches_keras(model_type, tmp_path):
+    default_options, modeling, model_input = MODELS[model_type]
+    options = default_options()
+
+    weights_file = str(tmp_path / 'epoch_001.hdf5')
+    keras_model = saved_keras_model(modeling, options, weights_file)
+
+    x = model_input(options, random_peptides(options, 64))
+    expected = keras_model.predict(x, verbose=0)
+    assert np.any(expected)
+
+    numpy_model = modeling.build_numpy_model(options)
+    numpy_model.load_weights(weights_file)
+    np.testing.assert_allclose(
+        numpy_model.predict(x), expected, atol=TOLERANCE
+    )
+
+    npz_file = str(tmp_path / 'epoch_001.npz')
+    export_weights(weights_file, npz_file)
+    numpy_model = modeling.build_numpy_model(options)
+    numpy_model.load_weights(npz_file)
+    np.testing.assert_allclose(
+        numpy_model.predict(x), expected, atol=TOLERANCE
+    )
+
+
+def test_bundled_ms2_model_matches_keras():
+    weights_file = os.path.join(
+        ROOT, 'data', 'models', 'charge2', 'epoch_035.hdf5'
+    )
+    if not os.path.isfile(weights_file):
+        pytest.skip('bundled MS2 model not found')
+
+    options = PeptideMS2Options.default()
+    keras_model = pepms2.modeling.build_model(options)
+    keras_model.load_weights(weights_file)
+    numpy_model = pepms2.modeling.build_numpy_model(options)
+    numpy_model.load_weights(weights_file)
+
+    x = ms2_input(options, random_peptides(options, 64, seed=1))
+    np.testing.assert_allclose(
+        numpy_model.predict(x), keras_model.predict(x, verbose=0),
+        atol=TOLERANCE
+    )
+
+
+@pytest.mark.parametrize('length', [7, 12, 30, 50])
+def test_padded_prediction_matches_full_length(length, tmp_path):
+    options = PeptideMS2Options.default()
+
+    weights_file = str(tmp_path / 'epoch_001.hdf5')
+    saved_keras_model(pepms2.modeling, options, weights_file)
+    numpy_model = pepms2.modeling.build_numpy_model(options)
+    numpy_model.load_weights(weights_file)
+
+    rng = np.random.default_rng(length)
+    amino_acids = [a for a in options.amino_acids if a.isalpha()]
+    sequences = [
+        ''.join(rng.choice(amino_acids, size=length))
+        for _ in range(16)
+    ]
+    x = ms2_input(options, sequences)
+
+    full = numpy_model.predict(x)
+    assert np.any(full[:, :length])
+    padded = numpy_model.predict(x[:, :length], length=x.shape[1])
+
+    assert padded.shape == full.shape
+    np.testing.assert_allclose(
+        padded[:, :length], full[:, :length], atol=1e-5
+    )
+    assert not np.any(padded[:, length:])